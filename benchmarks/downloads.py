@@ -0,0 +1,232 @@
+"""Behaviour check and timing of the download cache.
+
+Serves a gzipped ``objects.inv`` and a snippet from a local HTTP server, which
+counts the requests it gets and answers conditional ones with ``304``, and downloads
+them through ``extensions.downloads`` the way mkdocstrings and ``pymdownx.snippets``
+do once ``extensions/hooks/downloads.py`` is installed:
+
+- the first download has to reach the server, the next ones mustn't within the TTL
+- once the TTL is over, the server has to be asked and its ``304`` has to renew
+  the cached copy
+- if the server is gone, the stale copy has to be used
+- offline, the server mustn't be asked at all, and uncached URLs have to fail
+
+It exits non-zero on any difference. Then it times cached against network
+downloads. Everything is cached in a temporary directory.
+
+    python -m benchmarks.downloads [--repeat 200]
+"""
+
+import argparse
+import gzip
+import hashlib
+import http.server
+import logging
+import sys
+import tempfile
+import threading
+import time
+import types
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+from extensions.downloads import DownloadCache
+
+INVENTORY = gzip.compress(
+    b"# Sphinx inventory version 2\n"
+    b"# Project: Stand-in\n"
+    b"# Version: 1.0\n"
+    b"# The remainder of this file is compressed using zlib.\n" + b"x" * 4096
+)
+SNIPPET = b"--8<-- snippet\nline 1\nline 2\n"
+
+
+class StandIn(http.server.BaseHTTPRequestHandler):
+    files = {
+        "/objects.inv": (INVENTORY, "gzip"),
+        "/snippet.md": (SNIPPET, None),
+    }
+    requests = 0
+
+    def do_GET(self):
+        type(self).requests += 1
+        try:
+            body, encoding = self.files[self.path]
+        except KeyError:
+            self.send_error(404)
+            return
+
+        etag = '"' + hashlib.sha256(body).hexdigest()[:16] + '"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        if encoding:
+            self.send_header("Content-Encoding", encoding)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def load_inventory(request, url):
+    # as in mkdocstrings.plugin.MkdocstringsPlugin._load_inventory
+    req = request.Request(url, headers={"Accept-Encoding": "gzip"})
+    with request.urlopen(req) as resp:
+        content = resp
+        if "gzip" in resp.headers.get("content-encoding", ""):
+            content = gzip.GzipFile(fileobj=resp)
+        return content.read()
+
+
+def download_snippet(request, url):
+    # as in pymdownx.snippets.SnippetPreprocessor.download
+    req = request.Request(url, headers={})
+    with request.urlopen(req, timeout=10) as response:
+        assert response.status == 200
+        assert int(response.headers.get("content-length")) == len(SNIPPET)
+        return [line.decode("utf-8") for line in response.readlines()]
+
+
+def shim(cache):
+    return types.SimpleNamespace(Request=urllib.request.Request, urlopen=cache.urlopen)
+
+
+def check(base, path):
+    problems = []
+
+    def expect(what, condition):
+        if not condition:
+            problems.append(what)
+
+    inventory = f"{base}/objects.inv"
+    snippet = f"{base}/snippet.md"
+    expected_inventory = gzip.decompress(INVENTORY)
+    expected_snippet = SNIPPET.decode("utf-8").splitlines(keepends=True)
+
+    cache = DownloadCache(path, ttl=3600)
+    request = shim(cache)
+
+    StandIn.requests = 0
+    expect("first download", load_inventory(request, inventory) == expected_inventory)
+    expect("first snippet", download_snippet(request, snippet) == expected_snippet)
+    expect("first downloads reach the server", StandIn.requests == 2)
+
+    StandIn.requests = 0
+    expect("cached download", load_inventory(request, inventory) == expected_inventory)
+    expect("cached snippet", download_snippet(request, snippet) == expected_snippet)
+    expect("cached downloads stay local", StandIn.requests == 0)
+
+    # another build, with the TTL over
+    cache = DownloadCache(path, ttl=0)
+    request = shim(cache)
+    StandIn.requests = 0
+    expect("revalidated", load_inventory(request, inventory) == expected_inventory)
+    expect("revalidation asks the server", StandIn.requests == 1)
+    expect("revalidation is a 304", cache.revalidated == 1 and cache.downloads == 0)
+
+    cache = DownloadCache(path, ttl=3600)
+    StandIn.requests = 0
+    load_inventory(shim(cache), inventory)
+    expect("304 renews the cached copy", StandIn.requests == 0 and cache.hits == 1)
+
+    return problems
+
+
+def check_offline(base, path):
+    problems = []
+
+    def expect(what, condition):
+        if not condition:
+            problems.append(what)
+
+    cache = DownloadCache(path, ttl=0, offline=True)
+    request = shim(cache)
+    StandIn.requests = 0
+    expect(
+        "offline download of a cached URL",
+        load_inventory(request, f"{base}/objects.inv") == gzip.decompress(INVENTORY),
+    )
+    try:
+        load_inventory(request, f"{base}/uncached.inv")
+    except urllib.error.URLError:
+        pass
+    else:
+        problems.append("offline download of an uncached URL")
+    expect("offline downloads stay local", StandIn.requests == 0)
+    return problems
+
+
+def check_stale(base, path):
+    # a cached URL whose server is gone has to be served from the cache
+    cache = DownloadCache(path, ttl=0)
+    logging.getLogger("mkdocs.extensions.downloads").disabled = True
+    try:
+        content = load_inventory(shim(cache), f"{base}/objects.inv")
+    except OSError:
+        return ["stale copy while the server is gone"]
+    finally:
+        logging.getLogger("mkdocs.extensions.downloads").disabled = False
+
+    if content != gzip.decompress(INVENTORY) or cache.stale != 1:
+        return ["stale copy while the server is gone"]
+    return []
+
+
+def timed(repeat, func):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), StandIn)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "downloads"
+        problems = check(base, path) + check_offline(base, path)
+
+        server.shutdown()
+        server.server_close()
+        problems += check_stale(base, path)
+
+        if problems:
+            for problem in problems:
+                print(f"FAILED: {problem}")
+            sys.exit(1)
+        print("Download cache behaves as expected")
+
+        server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), StandIn)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        base = f"http://127.0.0.1:{server.server_address[1]}"
+        inventory = f"{base}/objects.inv"
+
+        network = timed(args.repeat, lambda: load_inventory(urllib.request, inventory))
+        cache = DownloadCache(path, ttl=3600)
+        load_inventory(shim(cache), inventory)
+        cached = timed(args.repeat, lambda: load_inventory(shim(cache), inventory))
+        server.shutdown()
+        server.server_close()
+
+    print(f"network (local server): {network * 1000:.3f} ms per download")
+    print(f"cached:                 {cached * 1000:.3f} ms per download")
+
+
+if __name__ == "__main__":
+    main()
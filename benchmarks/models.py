@@ -0,0 +1,147 @@
+"""Synthetic pydantic v1 models for the benchmarks.
+
+None of these need OctoPrint. ``install`` registers them in a synthetic module
+so that they can also be looked up by identifier, like the real config models.
+"""
+
+import sys
+import types
+from enum import Enum, IntEnum
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel, Field, create_model
+
+try:
+    from typing import Literal
+except ImportError:  # pragma: no cover
+    from typing_extensions import Literal
+
+MODULE = "benchmarks_synthetic"
+
+
+class SyntheticBase(BaseModel):
+    # like OctoPrint's own schema base model
+    class Config:
+        use_enum_values = True
+
+
+class ColorEnum(str, Enum):
+    red = "red"
+    green = "green"
+    blue = "blue"
+
+
+class LevelEnum(IntEnum):
+    low = 1
+    medium = 2
+    high = 3
+
+
+class PlainEnum(Enum):
+    one = "one"
+    two = "two"
+
+
+def _leaves(count: int, offset: int = 0) -> Dict:
+    kinds = (
+        lambda i: (int, Field(i, description=f"Integer field {i}.")),
+        lambda i: (Optional[str], Field(None, description="An optional string.")),
+        lambda i: (List[str], Field([], description="A list of strings.")),
+        lambda i: (bool, Field(i % 2 == 0, description="A flag.")),
+        lambda i: (Dict[str, int], Field({}, description="A mapping.")),
+        lambda i: (float, Field(i / 10, description="A float.")),
+    )
+    return {
+        f"field{offset + i}": kinds[(offset + i) % len(kinds)](offset + i)
+        for i in range(count)
+    }
+
+
+def wide_model(fields: int = 500, name: str = "Wide"):
+    return create_model(name, __base__=SyntheticBase, **_leaves(fields))
+
+
+def grouped_model(fields: int, width: int = 50, name: str = "Grouped"):
+    """A model with ``fields`` leaf fields, grouped into nested models of ``width``."""
+
+    groups = {}
+    for g in range(max(1, fields // width)):
+        count = min(width, fields - g * width)
+        group = create_model(
+            f"{name}Group{g}", __base__=SyntheticBase, **_leaves(count)
+        )
+        groups[f"group{g}"] = (group, Field(group(), description=f"Group {g}."))
+    return create_model(name, __base__=SyntheticBase, **groups)
+
+
+def deep_model(depth: int = 30, fields: int = 5, name: str = "Deep"):
+    nested = None
+    for level in reversed(range(depth)):
+        leaves = _leaves(fields, offset=level * fields)
+        if nested is not None:
+            leaves["child"] = (
+                nested,
+                Field(nested(), description=f"Level {level + 1}."),
+            )
+        nested = create_model(f"{name}{level}", __base__=SyntheticBase, **leaves)
+    return nested
+
+
+def list_model(lists: int = 20, fields: int = 10, name: str = "Lists"):
+    items = {}
+    for i in range(lists):
+        item = create_model(f"{name}Item{i}", __base__=SyntheticBase, **_leaves(fields))
+        items[f"items{i}"] = (List[item], Field([], description=f"List {i}."))
+    return create_model(name, __base__=SyntheticBase, **items)
+
+
+def enum_model(copies: int = 50, name: str = "Enums"):
+    fields = {}
+    for i in range(copies):
+        fields[f"color{i}"] = (ColorEnum, Field(ColorEnum.red, description="A color."))
+        fields[f"level{i}"] = (
+            LevelEnum,
+            Field(LevelEnum.medium, description="A level."),
+        )
+        fields[f"plain{i}"] = (PlainEnum, Field(PlainEnum.one, description="Plain."))
+        fields[f"maybe{i}"] = (
+            Optional[ColorEnum],
+            Field(ColorEnum.blue, description="An optional color."),
+        )
+    return create_model(name, __base__=SyntheticBase, **fields)
+
+
+def literal_model(copies: int = 50, name: str = "Literals"):
+    fields = {}
+    for i in range(copies):
+        fields[f"mode{i}"] = (
+            Literal["off", "on", "auto"],
+            Field("auto", description="A mode."),
+        )
+        fields[f"number{i}"] = (Literal[1, 2, 3], Field(1, description="A number."))
+        fields[f"maybe{i}"] = (
+            Optional[Literal["a", "b"]],
+            Field(None, description="An optional choice."),
+        )
+    return create_model(name, __base__=SyntheticBase, **fields)
+
+
+MODELS = {
+    "Wide": wide_model,
+    "Deep": deep_model,
+    "Lists": list_model,
+    "Enums": enum_model,
+    "Literals": literal_model,
+}
+
+
+def install() -> types.ModuleType:
+    """Creates all benchmark models in a synthetic module and returns it."""
+
+    module = sys.modules.get(MODULE)
+    if module is None:
+        module = types.ModuleType(MODULE)
+        for name, factory in MODELS.items():
+            setattr(module, name, factory(name=name))
+        sys.modules[MODULE] = module
+    return module
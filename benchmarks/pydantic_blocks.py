@@ -0,0 +1,183 @@
+"""Benchmark of the ``/// pydantic`` block against the ``%%% pydantic`` block.
+
+Takes all pydantic invocations of the full configuration reference
+(``docs/user-guide/configuration/config-yaml.md``), writes them once as ``%%%`` and
+once as ``///`` blocks and converts both documents with the Markdown extensions the
+site uses for them. ``tables`` renders only the table part of every invocation, to
+isolate the cost of re-parsing the generated Markdown tables.
+
+Before timing anything it verifies that every ``%%%`` and ``///`` table is identical
+to the table the ``pydantic_table`` macro's Markdown turns into, and that both
+blocks render every invocation the same, and exits non-zero if not.
+
+Needs OctoPrint's sources, see ``--octoprint-src``. The fragment cache is disabled,
+the build-scoped fragment memo is reset before every conversion, and so are the
+per-model caches unless ``--warm`` is given.
+
+    python -m benchmarks.pydantic_blocks --octoprint-src ../OctoPrint/src \\
+        [--duration 2] [--warm]
+"""
+
+import os
+
+os.environ["DOCS_PYDANTIC_CACHE"] = "off"
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import markdown
+
+from benchmarks import sources
+from extensions.schema import fields, prerender, render, typenames
+
+REFERENCE = (
+    Path(__file__).parent.parent / "docs/user-guide/configuration/config-yaml.md"
+)
+
+EXTENSIONS = [
+    "attr_list",
+    "tables",
+    "toc",
+    "pymdownx.highlight",
+    "pymdownx.superfences",
+    "extensions.markdown.pydantic",
+    "extensions.pymdown_blocks.pydantic",
+]
+EXTENSION_CONFIGS = {
+    "toc": {"permalink": "#"},
+    "pymdownx.highlight": {"anchor_linenums": True},
+}
+
+BLOCK_MODES = {
+    "pydantic": "full",
+    "pydantic_table": "table",
+    "pydantic_example": "example",
+}
+
+
+def invocations():
+    return list(prerender.scan_text(REFERENCE.read_text(encoding="utf-8")))
+
+
+def _options(invocation):
+    defaults = dict(prerender.PARAMETERS[invocation.mode])
+    return {
+        name: value
+        for name, value in invocation.options.items()
+        if value != defaults[name]
+    }
+
+
+def percent_block(invocation):
+    mode = invocation.mode.replace("_", "-")
+    lines = [f"%%% {mode} {invocation.identifier}"]
+    lines += [f"    {k}: {json.dumps(v)}" for k, v in _options(invocation).items()]
+    return "\n".join(lines)
+
+
+def slash_block(invocation):
+    lines = [f"/// pydantic | {invocation.identifier}"]
+    lines.append(f"    mode: {BLOCK_MODES[invocation.mode]}")
+    lines += [f"    {k}: {json.dumps(v)}" for k, v in _options(invocation).items()]
+    lines.append("///")
+    return "\n".join(lines)
+
+
+def tables(invocations):
+    return [
+        fragment
+        for invocation in invocations
+        for fragment in invocation.fragments()
+        if fragment.mode == "pydantic_table"
+    ]
+
+
+def documents(invocations):
+    return {
+        name: {
+            syntax: "\n\n".join(block(i) for i in items)
+            for syntax, block in (("%%%", percent_block), ("///", slash_block))
+        }
+        for name, items in (
+            ("reference", invocations),
+            ("tables", tables(invocations)),
+        )
+    }
+
+
+def verify(convert, invocations):
+    failures = []
+    for invocation in tables(invocations):
+        expected = convert(
+            render.pydantic_table(invocation.identifier, **invocation.options)
+        )
+        if convert(percent_block(invocation)) != expected:
+            failures.append(f"%%% {invocation.identifier}")
+        if convert(slash_block(invocation)) != f"<div>\n{expected}\n</div>":
+            failures.append(f"/// {invocation.identifier}")
+    for invocation in invocations:
+        percent = convert(percent_block(invocation))
+        if convert(slash_block(invocation)) != f"<div>\n{percent}\n</div>":
+            failures.append(f"%%% and /// {invocation.identifier}")
+    return failures
+
+
+def converter():
+    md = markdown.Markdown(extensions=EXTENSIONS, extension_configs=EXTENSION_CONFIGS)
+
+    def convert(text):
+        md.reset()
+        return md.convert(text)
+
+    return convert
+
+
+def measure(convert, text, duration, warm):
+    convert(text)  # warm up imports
+
+    count = 0
+    elapsed = 0.0
+    while elapsed < duration or count < 3:
+        prerender.memo.reset()
+        if not warm:
+            fields.clear_cache()
+            typenames.clear_cache()
+        start = time.perf_counter()
+        convert(text)
+        elapsed += time.perf_counter() - start
+        count += 1
+    return elapsed / count * 1000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--duration", type=float, default=2.0)
+    parser.add_argument("--warm", action="store_true", help="keep per-model caches")
+    sources.add_argument(parser)
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, args.octoprint_src)
+
+    convert = converter()
+    found = invocations()
+
+    failures = verify(convert, found)
+    if failures:
+        print(f"Output differs for: {', '.join(failures)}", file=sys.stderr)
+        return 1
+
+    print(f"{'document':<10} {'%%% ms':>9} {'/// ms':>9} {'speedup':>8}")
+    for name, texts in documents(found).items():
+        percent, slash = (
+            measure(convert, texts[syntax], args.duration, args.warm)
+            for syntax in ("%%%", "///")
+        )
+        print(f"{name:<10} {percent:>9.2f} {slash:>9.2f} {percent / slash:>7.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
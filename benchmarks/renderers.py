@@ -0,0 +1,143 @@
+"""Throughput benchmark for the pydantic rendering engine.
+
+Renders each synthetic model from ``benchmarks.models`` with every renderer and
+reports renders per second and peak memory per render:
+
+- ``table``: ``pydantic_table``
+- ``example``: ``pydantic_example``
+- ``full``: ``pydantic``, i.e. example plus table
+- ``block``: a ``%%% pydantic`` block through Python-Markdown, i.e.
+  ``PydanticBlockProcessor.run``, which builds the example and the table (from the
+  ``pydantic_cells`` fragment) as an element tree, plus the conversion to HTML
+
+OctoPrint is not needed. The fragment cache is disabled, the build-scoped fragment
+memo is reset before every render, and so are the per-model caches unless
+``--warm`` is given.
+
+    python -m benchmarks.renderers [--save results.json] [--baseline baseline.json]
+
+With ``--baseline`` the run fails if any renderer got slower or needs more memory
+than the stored results allow for (``--tolerance``, 25% by default).
+"""
+
+import os
+
+os.environ["DOCS_PYDANTIC_CACHE"] = "off"
+
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+
+import markdown
+
+from benchmarks import models
+from extensions.markdown.pydantic import PydanticExtension
+from extensions.schema import fields, prerender, render, typenames
+
+
+def _block(identifier):
+    md = markdown.Markdown(extensions=["tables", PydanticExtension()])
+    return md.convert(f"%%% pydantic {identifier}\n    key: bench\n")
+
+
+RENDERERS = {
+    "table": lambda identifier: render.pydantic_table(identifier),
+    "example": lambda identifier: render.pydantic_example(identifier, key="bench"),
+    "full": lambda identifier: render.pydantic(identifier, key="bench"),
+    "block": _block,
+}
+
+
+def _clear():
+    fields.clear_cache()
+    typenames.clear_cache()
+
+
+def measure(renderer, identifier, duration, warm):
+    renderer(identifier)  # warm up imports
+
+    count = 0
+    elapsed = 0.0
+    while elapsed < duration or count < 3:
+        prerender.memo.reset()
+        if not warm:
+            _clear()
+        start = time.perf_counter()
+        renderer(identifier)
+        elapsed += time.perf_counter() - start
+        count += 1
+
+    prerender.memo.reset()
+    if not warm:
+        _clear()
+    tracemalloc.start()
+    renderer(identifier)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {"renders_per_second": count / elapsed, "peak_memory": peak}
+
+
+def compare(results, baseline, tolerance):
+    failures = []
+    for name, result in results.items():
+        expected = baseline.get(name)
+        if not expected:
+            continue
+
+        speed = result["renders_per_second"] / expected["renders_per_second"]
+        if speed < 1 - tolerance:
+            failures.append(f"{name}: {speed:.0%} of baseline throughput")
+
+        memory = result["peak_memory"] / max(1, expected["peak_memory"])
+        if memory > 1 + tolerance:
+            failures.append(f"{name}: {memory:.0%} of baseline peak memory")
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--models", default=",".join(models.MODELS))
+    parser.add_argument("--renderers", default=",".join(RENDERERS))
+    parser.add_argument("--duration", type=float, default=0.5)
+    parser.add_argument("--warm", action="store_true")
+    parser.add_argument("--save", metavar="PATH")
+    parser.add_argument("--baseline", metavar="PATH")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args(argv)
+
+    models.install()
+
+    results = {}
+    print(f"{'benchmark':<20} {'renders/s':>10} {'peak [KiB]':>11}")
+    for model in args.models.split(","):
+        identifier = f"{models.MODULE}.{model}"
+        for name in args.renderers.split(","):
+            result = measure(RENDERERS[name], identifier, args.duration, args.warm)
+            results[f"{model}/{name}"] = result
+            print(
+                f"{model + '/' + name:<20} {result['renders_per_second']:>10.1f}"
+                f" {result['peak_memory'] / 1024:>11.1f}"
+            )
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+        failures = compare(results, baseline, args.tolerance)
+        if failures:
+            print("Regressions against the baseline:", file=sys.stderr)
+            for failure in failures:
+                print(f"  {failure}", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,14 @@
+"""The ``--octoprint-src`` option of the benchmarks that need OctoPrint."""
+
+import os
+
+DEFAULT = "../OctoPrint/src"
+
+
+def add_argument(parser):
+    parser.add_argument(
+        "--octoprint-src",
+        default=os.environ.get("OCTOPRINT_SRC", DEFAULT),
+        help=f"OctoPrint sources (the src folder), $OCTOPRINT_SRC or {DEFAULT} by "
+        "default",
+    )
@@ -0,0 +1,147 @@
+"""Equivalence check and timing of the static schema backend.
+
+Parses OctoPrint's schema sources with ``extensions.schema.static`` and imports them
+through ``extensions.schema.extract``, and compares the two snapshots:
+
+- the same identifiers have to be present, or have failed, in both
+- every model has to have identical data model rows, for every ``subs`` the docs
+  use, and identical example data and top level fields
+
+Then it renders every pydantic fragment the docs reference once from the static
+snapshot and once from the imported models, and compares the results. It exits
+non-zero on any difference or if any fragment had to fall back to importing.
+
+Only then it times the two extractions: the static one in process, the import-based
+one as the subprocess the build would run, including interpreter startup.
+
+Needs OctoPrint's sources, see ``--octoprint-src``. The fragment cache is disabled.
+
+    python -m benchmarks.static_schema --octoprint-src ../OctoPrint/src [--repeat 5]
+"""
+
+import os
+
+os.environ["DOCS_PYDANTIC_CACHE"] = "off"
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks import sources
+from extensions.schema import extract, prerender, render, static
+
+DOCS = Path(__file__).parent.parent / "docs"
+
+
+def snapshot_differences(parsed, imported):
+    differences = []
+
+    for name in ("identifiers", "failed"):
+        if parsed[name] != imported[name]:
+            keys = set(parsed[name]) ^ set(imported[name])
+            differences.append(f"{name}: {', '.join(sorted(keys)) or 'model ids'}")
+
+    for model_id, model in imported["models"].items():
+        other = parsed["models"].get(model_id)
+        if other is None:
+            continue
+        for part in ("kind", "rows", "example", "fields"):
+            if model.get(part) != other.get(part):
+                differences.append(f"{model_id}: {part}")
+
+    return differences
+
+
+def fragment_differences(invocations, src_paths, path):
+    def render_all():
+        prerender.memo.reset()
+        return [
+            render.RENDERERS[i.mode](i.identifier, **i.options) for i in invocations
+        ]
+
+    extract.snapshot.reset()
+    imported = render_all()
+
+    extract.snapshot.path = path
+    extract.snapshot.backend = "static"
+    extract.snapshot.ensure(extract.requests_for(invocations), src_paths)
+    parsed = render_all()
+
+    differences = [
+        f"{i.mode}({i.identifier}, {i.options})"
+        for i, a, b in zip(invocations, imported, parsed)
+        if a != b
+    ]
+    if extract.snapshot.fallbacks:
+        differences.append(f"{extract.snapshot.fallbacks} fallbacks to importing")
+    return differences
+
+
+def measure(function, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    sources.add_argument(parser)
+    args = parser.parse_args(argv)
+
+    src_paths = [args.octoprint_src]
+    sys.path[:0] = src_paths
+
+    invocations = prerender.scan(str(DOCS))
+    requests = sorted(
+        {
+            (identifier, extract._subs_key(subs))
+            for identifier, subs in extract.requests_for(invocations)
+        }
+    )
+
+    parsed = static.extract(requests, src_paths, extract.PACKAGES)
+    imported = extract.extract(requests)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        differences = snapshot_differences(parsed, imported)
+        differences += fragment_differences(
+            invocations, src_paths, Path(tmp) / "schema.json"
+        )
+        if differences:
+            print("Static and imported schema differ:", file=sys.stderr)
+            for difference in differences:
+                print(f"  {difference}", file=sys.stderr)
+            return 1
+
+        print(
+            f"{len(parsed['identifiers'])} identifiers, {len(parsed['models'])} "
+            f"models and {len(invocations)} fragments identical"
+        )
+
+        subprocess_snapshot = extract.SchemaSnapshot(
+            Path(tmp) / "import.json", "import"
+        )
+        timings = {
+            "static": measure(
+                lambda: static.extract(requests, src_paths, extract.PACKAGES),
+                args.repeat,
+            ),
+            "import": measure(
+                lambda: subprocess_snapshot._run(requests, src_paths), args.repeat
+            ),
+        }
+
+    print(f"{'backend':<8} {'ms':>9}")
+    for name, timing in timings.items():
+        print(f"{name:<8} {timing:>9.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
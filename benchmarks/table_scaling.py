@@ -0,0 +1,78 @@
+"""Scaling benchmark for the data model table renderer.
+
+Renders synthetic pydantic models with an increasing number of fields and reports
+wall time and peak memory per render. Both should grow linearly with the field
+count, i.e. the per-field columns should stay roughly constant.
+
+    python -m benchmarks.table_scaling [--sizes 1000,5000,10000,20000] [--check]
+
+With ``--check`` the run fails if the time per field of the largest model is more
+than ``--tolerance`` times that of the smallest one.
+"""
+
+import argparse
+import gc
+import sys
+import time
+import tracemalloc
+
+from benchmarks.models import grouped_model
+from extensions.schema.render import pydantic_table
+
+
+def measure(fields: int, repeat: int):
+    timings = []
+    peak = 0
+    for r in range(repeat):
+        # a fresh model every round, so the field schema is walked every time
+        model = grouped_model(fields, name=f"Synthetic{fields}x{r}")
+        gc.collect()
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        result = pydantic_table(model.__name__, clz=model)
+        timings.append(time.perf_counter() - start)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+        assert result.count("\n") >= fields
+    return min(timings), peak
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", default="1000,2500,5000,10000,20000")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--check", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=2.0)
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+
+    print(
+        f"{'fields':>8} {'time [ms]':>10} {'µs/field':>9} "
+        f"{'peak [KiB]':>11} {'B/field':>8}"
+    )
+    results = []
+    for size in sizes:
+        duration, peak = measure(size, args.repeat)
+        results.append((size, duration / size, peak / size))
+        print(
+            f"{size:>8} {duration * 1000:>10.1f} {duration / size * 1e6:>9.2f}"
+            f" {peak / 1024:>11.1f} {peak / size:>8.0f}"
+        )
+
+    if args.check:
+        ratio = results[-1][1] / results[0][1]
+        if ratio > args.tolerance:
+            print(
+                f"Time per field grew by a factor of {ratio:.2f}, more than "
+                f"{args.tolerance}",
+                file=sys.stderr,
+            )
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
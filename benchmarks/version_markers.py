@@ -0,0 +1,165 @@
+"""Benchmark and equivalence check for the ``[[ version_added ... ]]`` markers.
+
+Compares the old ``Pattern`` based marker with ``extensions.markdown.version`` on
+three large documents:
+
+- ``prose``: long paragraphs without any marker
+- ``tables``: a large table without any marker
+- ``markers``: paragraphs with one marker each
+
+Before timing anything it converts all three documents with both implementations
+(plus ``attr_list`` and ``tables``) and verifies that the HTML is identical, and
+that two markers on the same line now render as two links. It exits non-zero if
+not.
+
+The timings are per paragraph or table cell and cover what the inline pass does
+for the marker on each text node: the legacy ``match`` of the whole remaining text
+against ``^(.*?)...(.*)$``, versus the pre-checked ``finditer`` of the
+``InlineProcessor``. Timing complete conversions instead would drown the
+difference in the cost of all other markdown processing.
+
+    python -m benchmarks.version_markers [--duration 0.5] [--size 200]
+"""
+
+import argparse
+import sys
+import time
+import xml.etree.ElementTree as etree
+
+import markdown
+from markdown.extensions import Extension
+from markdown.inlinepatterns import Pattern
+
+from extensions.markdown.version import (
+    VERSION_RE,
+    VersionExtension,
+    VersionInlineProcessor,
+)
+
+SENTENCE = (
+    "The printer *reports* its `temperature` every [two seconds](#polling), "
+    "unless **auto reporting** is enabled via `M155`. "
+)
+
+
+class _LegacyVersionPattern(Pattern):
+    # what extensions/markdown/version.py used to be
+    def handleMatch(self, m):
+        version = m.group(3).strip()
+
+        link = etree.Element("a")
+        link.set(
+            "href",
+            f"https://github.com/OctoPrint/OctoPrint/releases/tag/{m.group(3).strip()}",
+        )
+        link.text = version
+
+        em = etree.Element("em")
+        em.text = f"{m.group(2).capitalize()} in version "
+        em.append(link)
+
+        return em
+
+
+class _LegacyVersionExtension(Extension):
+    PATTERN = r"\[{2}\s*version_(added|changed)\s+(.*)\s*\]{2}"
+
+    def extendMarkdown(self, md):
+        pattern = _LegacyVersionPattern(self.PATTERN)
+        md.inlinePatterns.register(pattern, "version", 20)
+
+
+def documents(size):
+    """Returns ``{name: (markdown, text nodes)}``."""
+
+    paragraph = SENTENCE * 8
+    paragraphs = [paragraph] * size
+    cells = [
+        cell
+        for i in range(size * 4)
+        for cell in (f"`key{i}`", "`int`", SENTENCE, f"`{i}`")
+    ]
+    markers = [f"{paragraph}[[ version_added 1.{i % 10}.0 ]]" for i in range(size)]
+
+    table = "\n".join(
+        "| " + " | ".join(cells[i : i + 4]) + " |" for i in range(0, len(cells), 4)
+    )
+    return {
+        "prose": ("\n\n".join(paragraphs), paragraphs),
+        "tables": (
+            "| Name | Type | Description | Default |\n"
+            "| ---- | ---- | ----------- | ------- |\n" + table,
+            cells,
+        ),
+        "markers": ("\n\n".join(markers), markers),
+    }
+
+
+def converter(*extensions):
+    md = markdown.Markdown(extensions=["attr_list", "tables", *extensions])
+
+    def convert(text):
+        md.reset()
+        return md.convert(text)
+
+    return convert
+
+
+def verify(docs, legacy, current):
+    failures = [
+        name for name, (text, _) in docs.items() if legacy(text) != current(text)
+    ]
+
+    html = current("[[ version_added 1.3.0 ]] and [[ version_changed 1.4.0 ]]")
+    if html.count("<em>") != 2:
+        failures.append("two markers on one line")
+
+    return failures
+
+
+def legacy_match():
+    regex = _LegacyVersionPattern(_LegacyVersionExtension.PATTERN).getCompiledRegExp()
+    return regex.match
+
+
+def current_match():
+    regex = VersionInlineProcessor(VERSION_RE).getCompiledRegExp()
+    return lambda data: next(regex.finditer(data), None)
+
+
+def measure(match, nodes, duration):
+    """Returns the time per text node in microseconds."""
+    count = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < duration or count < 3:
+        for node in nodes:
+            match(node)
+        count += 1
+    return (time.perf_counter() - start) / (count * len(nodes)) * 1e6
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--duration", type=float, default=0.5)
+    parser.add_argument("--size", type=int, default=200, help="paragraphs per doc")
+    args = parser.parse_args(argv)
+
+    legacy = converter(_LegacyVersionExtension())
+    current = converter(VersionExtension())
+
+    docs = documents(args.size)
+    failures = verify(docs, legacy, current)
+    if failures:
+        print(f"Output differs for: {', '.join(failures)}", file=sys.stderr)
+        return 1
+
+    matchers = (legacy_match(), current_match())
+    print(f"{'document':<10} {'nodes':>6} {'legacy µs':>10} {'inline µs':>10}")
+    for name, (_, nodes) in docs.items():
+        times = [measure(match, nodes, args.duration) for match in matchers]
+        print(f"{name:<10} {len(nodes):>6} " + " ".join(f"{t:>10.3f}" for t in times))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,195 @@
+"""Benchmark and equivalence check for the YAML example emitter.
+
+Compares three ways of dumping the defaults of the synthetic models, of a large
+nested mapping of plain scalars and of OctoPrint's ``ServerConfig`` (below
+``server``, as on the config page) and whole ``Config``:
+
+- ``fresh``: a newly configured ``YAML`` instance per dump, going through a
+  temporary string (what the renderer used to do)
+- ``reused``: the preconfigured round-trip emitter, streaming into the output buffer
+- ``fast``: the same with the libyaml fast path enabled
+
+OctoPrint's documents contain ``None`` values, lists and multi-line strings, so they
+never take the fast path, which only helps documents like the scalar one.
+
+Before timing anything it verifies that all three produce the same output for every
+document, and that they render the scalar document like
+``benchmarks/golden/yaml_emitter/Scalars.md`` and the OctoPrint documents like the
+golden files of the version in ``benchmarks/golden/yaml_emitter/<version>``, if there
+are any, and exits non-zero if they don't. The golden files were written by the
+``fresh`` emitter, the one the docs used before, with ``--update-golden``.
+
+    python -m benchmarks.yaml_emitter --octoprint-src ../OctoPrint/src [--duration 0.5]
+"""
+
+import argparse
+import re
+import sys
+import time
+from pathlib import Path
+
+from benchmarks import models, sources
+from extensions.schema.emitter import ExampleEmitter, fast_path_safe
+from extensions.schema.render import MyYAML
+
+
+def _fresh(data):
+    yaml = MyYAML()
+    yaml.indent(mapping=2, sequence=4, offset=2)
+    yaml.preserve_quotes = True
+    yaml.default_flow_style = False
+    dumped = yaml.dump(data)
+    return f"```yaml\n{dumped}\n```\n"
+
+
+def scalar_document(sections: int = 50, fields: int = 40):
+    return {
+        f"section{s}": {
+            f"key{f}": (f, f % 2 == 0, f / 4, f"value {f}", {}, [])[f % 6]
+            for f in range(fields)
+        }
+        for s in range(sections)
+    }
+
+
+def documents():
+    module = models.install()
+    docs = {"Scalars": {"bench": scalar_document()}}
+    for name in models.MODELS:
+        docs[name] = {"bench": getattr(module, name).construct().dict(by_alias=True)}
+    return docs
+
+
+GOLDEN = Path(__file__).parent / "golden" / "yaml_emitter"
+
+
+# version written by the build of a release, or by versioneer into source archives
+VERSION_PATTERNS = [
+    ("_static_version.py", r'^version = "([^"]+)"'),
+    ("_version.py", r'^ "version": "([^"]+)"'),
+]
+
+
+def octoprint_version(src):
+    for filename, pattern in VERSION_PATTERNS:
+        path = Path(src) / "octoprint" / filename
+        try:
+            match = re.search(pattern, path.read_text(), re.MULTILINE)
+        except OSError:
+            continue
+        if match:
+            return match.group(1)
+    return None
+
+
+def octoprint_documents(src):
+    sys.path.insert(0, src)
+    from octoprint.schema.config import Config, ServerConfig
+
+    return {
+        "ServerConfig": {"server": ServerConfig.construct().dict(by_alias=True)},
+        "Config": Config.construct().dict(by_alias=True),
+    }
+
+
+def verify_golden(docs, folder, renderers):
+    failures = []
+    for name, data in docs.items():
+        expected = (folder / f"{name}.md").read_text(encoding="utf-8")
+        for label, render in renderers.items():
+            if render(data) != expected:
+                failures.append(f"{name} ({label})")
+    return failures
+
+
+def update_golden(docs, folder):
+    folder.mkdir(parents=True, exist_ok=True)
+    for name, data in docs.items():
+        path = folder / f"{name}.md"
+        path.write_text(_fresh(data), encoding="utf-8")
+        print(f"Wrote {path}")
+
+
+def verify(docs, renderers):
+    failures = []
+    for name, data in docs.items():
+        outputs = {render(data) for render in renderers.values()}
+        if len(outputs) > 1:
+            failures.append(name)
+    return failures
+
+
+def measure(render, data, duration):
+    count = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < duration or count < 3:
+        render(data)
+        count += 1
+    return count / (time.perf_counter() - start)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--duration", type=float, default=0.5)
+    sources.add_argument(parser)
+    parser.add_argument(
+        "--update-golden",
+        action="store_true",
+        help="write the golden files of this OctoPrint version and exit",
+    )
+    args = parser.parse_args(argv)
+
+    version = octoprint_version(args.octoprint_src)
+    if version is None:
+        parser.error(f"no OctoPrint version found in {args.octoprint_src}")
+    octoprint = octoprint_documents(args.octoprint_src)
+    scalars = {"Scalars": documents()["Scalars"]}
+
+    if args.update_golden:
+        update_golden(scalars, GOLDEN)
+        update_golden(octoprint, GOLDEN / version)
+        return 0
+
+    reused = ExampleEmitter()
+    fast = ExampleEmitter(fast=True)
+    if not fast.fast:
+        print("ruamel.yaml.clib is not available, no fast path", file=sys.stderr)
+    renderers = {"fresh": _fresh, "reused": reused.fenced, "fast": fast.fenced}
+
+    failures = verify_golden(scalars, GOLDEN, renderers)
+    if (GOLDEN / version).is_dir():
+        failures += verify_golden(octoprint, GOLDEN / version, renderers)
+    else:
+        print(
+            f"No golden files for OctoPrint {version}, only checking that the "
+            "emitters agree on its documents",
+            file=sys.stderr,
+        )
+    if failures:
+        print(f"Output differs from golden: {', '.join(failures)}", file=sys.stderr)
+        return 1
+
+    docs = {**documents(), **octoprint}
+    failures = verify(docs, renderers)
+    if failures:
+        print(f"Output differs for: {', '.join(failures)}", file=sys.stderr)
+        return 1
+
+    print(
+        f"{'document':<12} {'fast path':>9} {'fresh/s':>9} {'reused/s':>9} "
+        f"{'fast/s':>9}"
+    )
+    for name, data in docs.items():
+        rates = [
+            measure(render, data, args.duration)
+            for render in (_fresh, reused.fenced, fast.fenced)
+        ]
+        print(
+            f"{name:<12} {'yes' if fast_path_safe(data) else 'no':>9} "
+            + " ".join(f"{rate:>9.1f}" for rate in rates)
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,251 @@
+"""Pre-compressed, content-hashed build output, enabled with ``DOCS_COMPRESS``.
+
+``extensions/hooks/compress.py`` renames the stylesheets of ``extra_css`` and the
+assets of the theme's ``custom_dir`` to ``<name>.<hash>.<ext>``, so that they can be
+served with long-lived cache headers, and once the site is built, writes a ``.gz``
+sibling next to every compressible file, and a ``.br`` one if the ``brotli`` package
+is installed. The web server can then send these as they are (``gzip_static``,
+``brotli_static``) instead of compressing every response.
+
+``DOCS_COMPRESS`` is the number of worker processes compressing files, ``on`` uses
+one per CPU. The compressed files are kept in ``$DOCS_SHARED_CACHE_DIR/compress`` under
+the hash of their source, and ``$DOCS_CACHE_DIR/compress/manifest.json`` records the
+size, mtime and hash every file of the site had in the last build. Files that are
+still the same are neither compressed nor even read again.
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import posixpath
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, NamedTuple, Tuple
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from extensions.output import output
+from extensions.schema.cache import cache_root, shared_cache_root
+
+log = logging.getLogger("mkdocs.extensions.compress")
+
+MANIFEST_VERSION = 1
+
+COMPRESSIBLE = (".html", ".css", ".js", ".json", ".xml", ".svg", ".txt", ".map")
+
+# below this, a sibling saves less than the overhead of a request for it
+MIN_SIZE = 1024
+
+HASH_LENGTH = 8
+
+SUFFIXES = {"gzip": ".gz", "br": ".br"}
+
+
+def default_workers() -> int:
+    setting = os.environ.get("DOCS_COMPRESS", "").lower()
+    if setting in ("", "0", "off", "false"):
+        return 0
+    try:
+        return max(1, int(setting))
+    except ValueError:
+        return os.cpu_count() or 1
+
+
+def encodings() -> Tuple[str, ...]:
+    return ("gzip", "br") if brotli is not None else ("gzip",)
+
+
+def hashed_uri(uri: str, content: bytes) -> str:
+    """``uri`` with the hash of ``content`` before its extension."""
+
+    stem, ext = posixpath.splitext(uri)
+    digest = hashlib.sha256(content).hexdigest()[:HASH_LENGTH]
+    return f"{stem}.{digest}{ext}"
+
+
+def compress(encoding: str, data: bytes) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=11)
+    # without a timestamp, so that the same file always compresses the same
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+class Task(NamedTuple):
+    path: str
+    digest: str
+    encodings: Tuple[str, ...]
+
+
+class Compressor:
+    def __init__(self, path: Path, store: Path, workers: int = 1):
+        self.path = path
+        self.store = store
+        self.workers = workers
+
+        self.unchanged = 0
+        self.reused = 0
+        self.compressed = 0
+
+    @classmethod
+    def from_env(cls) -> "Compressor":
+        return cls(
+            cache_root() / "compress",
+            shared_cache_root() / "compress",
+            workers=default_workers(),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.workers > 0
+
+    @property
+    def file(self) -> Path:
+        return self.path / "manifest.json"
+
+    def run(self, site_dir: str) -> Dict[str, int]:
+        """Writes the compressed siblings of all compressible files in ``site_dir``."""
+
+        self.unchanged = self.reused = self.compressed = 0
+        wanted = encodings()
+        previous = self._load()
+        entries = {}
+        pending: List[Task] = []
+        done: List[Tuple[str, str, str]] = []
+
+        for path, rel, stat in _compressible(site_dir):
+            if output.removes(path):
+                # left over from an earlier build in write-if-changed mode
+                continue
+
+            signature = [stat.st_mtime_ns, stat.st_size]
+            entry = previous.get(rel)
+            if (
+                entry is not None
+                and entry["signature"] == signature
+                and entry["checked"] == list(wanted)
+                and all(
+                    os.path.exists(path + SUFFIXES[encoding])
+                    for encoding in entry["encodings"]
+                )
+            ):
+                for encoding in entry["encodings"]:
+                    output.claim(path + SUFFIXES[encoding])
+                entries[rel] = entry
+                self.unchanged += 1
+                continue
+
+            with open(path, "rb") as f:
+                digest = hashlib.sha256(f.read()).hexdigest()
+
+            missing = tuple(
+                encoding
+                for encoding in wanted
+                if not self._blob(digest, encoding).exists()
+            )
+            if missing:
+                pending.append(Task(path, digest, missing))
+            else:
+                self.reused += 1
+            done.append((path, rel, digest))
+            entries[rel] = {"signature": signature, "hash": digest}
+
+        if len(pending) > 1 and self.workers > 1:
+            with ProcessPoolExecutor(
+                max_workers=min(self.workers, len(pending)),
+                mp_context=get_context("spawn"),
+            ) as executor:
+                list(executor.map(_compress_task, pending, [self.store] * len(pending)))
+        else:
+            for task in pending:
+                _compress_task(task, self.store)
+        self.compressed = len(pending)
+
+        for path, rel, digest in done:
+            written = self._place(path, digest, wanted)
+            entries[rel].update(encodings=written, checked=list(wanted))
+
+        self._save(entries)
+        return self.stats()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "unchanged": self.unchanged,
+            "reused": self.reused,
+            "compressed": self.compressed,
+        }
+
+    def purge(self) -> None:
+        shutil.rmtree(self.path, ignore_errors=True)
+        shutil.rmtree(self.store, ignore_errors=True)
+
+    def _place(self, path: str, digest: str, wanted: Tuple[str, ...]) -> List[str]:
+        size = os.path.getsize(path)
+        written = []
+        for encoding in wanted:
+            blob = self._blob(digest, encoding)
+            target = path + SUFFIXES[encoding]
+            # the original is the better choice if compressing doesn't help
+            if blob.stat().st_size < size:
+                shutil.copyfile(blob, target)
+                written.append(encoding)
+            elif os.path.exists(target):
+                os.remove(target)
+        return written
+
+    def _blob(self, digest: str, encoding: str) -> Path:
+        return _blob(self.store, digest, encoding)
+
+    def _load(self) -> Dict[str, Any]:
+        try:
+            with open(self.file, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+        if data.get("version") != MANIFEST_VERSION:
+            return {}
+        return data.get("files", {})
+
+    def _save(self, entries: Dict[str, Any]) -> None:
+        self.path.mkdir(parents=True, exist_ok=True)
+        tmp = self.file.with_name(f"{self.file.name}.{os.getpid()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": MANIFEST_VERSION, "files": entries}, f)
+        os.replace(tmp, self.file)
+
+
+def _compressible(site_dir: str) -> Iterator[Tuple[str, str, os.stat_result]]:
+    for root, _, names in os.walk(site_dir):
+        for name in sorted(names):
+            if not name.endswith(COMPRESSIBLE):
+                continue
+            path = os.path.join(root, name)
+            stat = os.stat(path)
+            if stat.st_size >= MIN_SIZE:
+                yield path, os.path.relpath(path, site_dir).replace(os.sep, "/"), stat
+
+
+def _blob(store: Path, digest: str, encoding: str) -> Path:
+    return store / digest[:2] / f"{digest}{SUFFIXES[encoding]}"
+
+
+def _compress_task(task: Task, store: Path) -> None:
+    with open(task.path, "rb") as f:
+        data = f.read()
+
+    for encoding in task.encodings:
+        blob = _blob(store, task.digest, encoding)
+        blob.parent.mkdir(parents=True, exist_ok=True)
+        tmp = blob.with_name(f"{blob.name}.{os.getpid()}.tmp")
+        tmp.write_bytes(compress(encoding, data))
+        os.replace(tmp, blob)
+
+
+compressor = Compressor.from_env()
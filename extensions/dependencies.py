@@ -0,0 +1,265 @@
+"""Which source files each page of the last build was rendered from.
+
+The extensions record into ``graph`` while the site is built:
+
+- the pydantic renderers the identifiers a page looked up, which are resolved to the
+  source files of the modules the model depended on once the page is done (loaded
+  in this process, recorded by the schema snapshot or by the fragment cache)
+- ``gen_ref_pages.py`` the module behind each reference page
+
+Pages whose dependencies can't be resolved are recorded as depending on anything.
+
+``extensions/hooks/targeted_rebuild.py`` uses the graph to only re-render the pages
+affected by a change when ``mkdocs serve`` rebuilds. The graph of the last build is
+also written to ``$DOCS_CACHE_DIR/dependencies.json``, and
+
+    python -m extensions.dependencies \\
+        path/to/OctoPrint/src/octoprint/schema/config/server.py
+
+lists the pages a change to the given files would re-render.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from extensions.schema.cache import cache_root
+
+GRAPH_VERSION = 1
+
+Signature = Tuple[int, int, str]
+
+
+class PageDependencies:
+    """What a page was rendered from, and the output to reuse if that's unchanged."""
+
+    __slots__ = ("markdown", "files", "output")
+
+    def __init__(
+        self,
+        markdown: Optional[str],
+        files: Optional[Dict[str, Signature]],
+        output: Any = None,
+    ):
+        self.markdown = markdown
+        self.files = files
+        self.output = output
+
+
+class DependencyGraph:
+    def __init__(self, path: Path):
+        self.path = path
+
+        self.reuse = False
+
+        self._lock = threading.Lock()
+        self._shared: Optional[Dict[str, Tuple[int, int]]] = None
+        self._pages: Dict[str, PageDependencies] = {}
+        self._hashes: Dict[str, Tuple[Tuple[int, int], str]] = {}
+
+        self._files: Dict[str, Set[str]] = {}
+        self._identifiers: Dict[str, Set[str]] = {}
+        self._current: Optional[str] = None
+
+    def begin(self) -> None:
+        """Starts recording a new build. The pages of the last one are kept."""
+
+        self._files = {}
+        self._identifiers = {}
+        self._current = None
+
+    def begin_page(self, page: str) -> None:
+        self._current = page
+
+    def record_file(self, path: str, page: Optional[str] = None) -> None:
+        """Records that ``page``, by default the current one, uses the file ``path``."""
+
+        page = page or self._current
+        if page is not None:
+            self._files.setdefault(page, set()).add(os.path.abspath(path))
+
+    def record_identifier(self, identifier: str) -> None:
+        """Records that the current page looked up a pydantic model."""
+
+        if self._current is not None:
+            self._identifiers.setdefault(self._current, set()).add(identifier)
+
+    def end_page(
+        self, page: str, markdown: Optional[str], output: Any = None
+    ) -> PageDependencies:
+        """Resolves what ``page`` was rendered from and keeps it with its output."""
+
+        if self._current == page:
+            self._current = None
+
+        paths = set(self._files.pop(page, ()))
+        for identifier in self._identifiers.pop(page, ()):
+            sources = _sources(identifier)
+            if sources is None:
+                paths = None
+                break
+            paths |= sources
+
+        files = None
+        if paths is not None:
+            files = {}
+            for path in sorted(paths):
+                signature = self._signature(path)
+                if signature is None:
+                    files = None
+                    break
+                files[path] = signature
+
+        dependencies = PageDependencies(markdown, files, output)
+        self._pages[page] = dependencies
+        return dependencies
+
+    def skip_page(self, page: str) -> None:
+        """Keeps the dependencies of a page whose last output was reused."""
+
+        if self._current == page:
+            self._current = None
+        self._files.pop(page, None)
+        self._identifiers.pop(page, None)
+
+    def update_shared(self, files: Dict[str, Tuple[int, int]]) -> bool:
+        """Replaces the signatures of the files all pages depend on.
+
+        Returns whether any of them changed since the last call.
+        """
+
+        changed = files != self._shared
+        self._shared = files
+        return changed
+
+    def get(self, page: str) -> Optional[PageDependencies]:
+        return self._pages.get(page)
+
+    def is_current(self, page: str, markdown: str) -> bool:
+        """Whether ``page`` would render just like last time from ``markdown``."""
+
+        dependencies = self._pages.get(page)
+        if (
+            dependencies is None
+            or dependencies.files is None
+            or dependencies.markdown != markdown
+        ):
+            return False
+        for path, (_, _, digest) in dependencies.files.items():
+            signature = self._signature(path)
+            if signature is None or signature[2] != digest:
+                return False
+        return True
+
+    def affected(self, paths: Iterable[str]) -> List[str]:
+        """The pages a change to ``paths`` would re-render."""
+
+        paths = {os.path.abspath(path) for path in paths}
+        return sorted(
+            page
+            for page, dependencies in self._pages.items()
+            if dependencies.files is None or paths & dependencies.files.keys()
+        )
+
+    def forget(self) -> None:
+        self._pages = {}
+
+    def save(self) -> None:
+        data = {
+            "version": GRAPH_VERSION,
+            "pages": {
+                page: (
+                    None
+                    if dependencies.files is None
+                    else {path: list(sig) for path, sig in dependencies.files.items()}
+                )
+                for page, dependencies in sorted(self._pages.items())
+            },
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=1)
+        os.replace(tmp, self.path)
+
+    def load(self) -> bool:
+        """Loads the dependencies (not the output) of the last build written to disk."""
+
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if data.get("version") != GRAPH_VERSION:
+            return False
+
+        self._pages = {
+            page: PageDependencies(
+                None,
+                (
+                    None
+                    if files is None
+                    else {path: tuple(sig) for path, sig in files.items()}
+                ),
+            )
+            for page, files in data["pages"].items()
+        }
+        return True
+
+    def _signature(self, path: str) -> Optional[Signature]:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        key = (stat.st_mtime_ns, stat.st_size)
+
+        with self._lock:
+            cached = self._hashes.get(path)
+        if cached is not None and cached[0] == key:
+            return key + (cached[1],)
+
+        with open(path, "rb") as f:
+            digest = hashlib.sha256(f.read()).hexdigest()
+        with self._lock:
+            self._hashes[path] = (key, digest)
+        return key + (digest,)
+
+
+def _sources(identifier: str) -> Optional[Set[str]]:
+    from extensions.schema.cache import find_source, fragments
+    from extensions.schema.registry import registry
+
+    modules = registry.dependencies(identifier) or fragments.dependencies(identifier)
+    if not modules:
+        return None
+
+    sources = set()
+    for module in modules:
+        path = find_source(module)
+        if path is None:
+            return None
+        sources.add(os.path.abspath(path))
+    return sources
+
+
+graph = DependencyGraph(cache_root() / "dependencies.json")
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(
+        description="List the pages a change to the given files would re-render"
+    )
+    parser.add_argument("paths", nargs="+")
+    args = parser.parse_args()
+
+    if not graph.load():
+        print(f"No dependency graph in {graph.path}, build the site first")
+        sys.exit(1)
+    for page in graph.affected(args.paths):
+        print(page)
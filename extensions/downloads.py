@@ -0,0 +1,277 @@
+"""Persistent cache of the files the build downloads.
+
+mkdocstrings downloads the ``import:`` inventories on every build, and
+``pymdownx.snippets`` with ``url_download`` the snippets included by URL.
+``extensions/hooks/downloads.py`` routes both through ``downloads``, which keeps
+every response in ``$DOCS_SHARED_CACHE_DIR/downloads`` (or
+``$DOCS_CACHE_DIR/downloads``): the bodies content-addressed in ``blobs/``, and per
+URL and ``Accept-Encoding`` (mkdocstrings asks for gzip, snippets don't) when it was
+fetched, the blob and the headers needed to replay and revalidate it in ``urls/``.
+Responses other than ``200 OK`` aren't cached.
+
+A cached response is used without asking the server for ``DOCS_DOWNLOAD_TTL``
+seconds (a day by default). After that it is revalidated with ``If-None-Match`` /
+``If-Modified-Since``, and still used if the server can't be reached. With
+``DOCS_OFFLINE=1`` the network isn't touched at all: cached responses are used no
+matter their age, and anything else fails like an unreachable server would.
+
+Set ``DOCS_DOWNLOAD_CACHE=off`` to bypass the cache, or ``DOCS_DOWNLOAD_CACHE=purge``
+to clear it when the build starts.
+"""
+
+import email.message
+import hashlib
+import io
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from extensions.schema.cache import shared_cache_root
+
+log = logging.getLogger("mkdocs.extensions.downloads")
+
+DEFAULT_TTL = 24 * 60 * 60
+
+REPLAYED_HEADERS = ("content-type", "content-encoding")
+VALIDATORS = (("etag", "If-None-Match"), ("last-modified", "If-Modified-Since"))
+
+
+class CachedResponse(io.BytesIO):
+    """A cached body that passes for what ``urllib.request.urlopen`` returns."""
+
+    def __init__(
+        self,
+        url: str,
+        body: bytes,
+        headers: Dict[str, str],
+        status: int = 200,
+        reason: str = "OK",
+    ):
+        super().__init__(body)
+        self.url = url
+        self.status = self.code = status
+        self.reason = reason
+
+        self.headers = email.message.Message()
+        for name, value in headers.items():
+            self.headers[name] = value
+        self.headers["Content-Length"] = str(len(body))
+
+    def geturl(self) -> str:
+        return self.url
+
+    def info(self) -> email.message.Message:
+        return self.headers
+
+    def getcode(self) -> int:
+        return self.code
+
+
+class DownloadCache:
+    def __init__(
+        self,
+        path: Path,
+        enabled: bool = True,
+        ttl: float = DEFAULT_TTL,
+        offline: bool = False,
+    ):
+        self.path = path
+        self.enabled = enabled
+        self.ttl = ttl
+        self.offline = offline
+
+        self.hits = 0
+        self.revalidated = 0
+        self.stale = 0
+        self.downloads = 0
+
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "DownloadCache":
+        setting = os.environ.get("DOCS_DOWNLOAD_CACHE", "on").lower()
+        try:
+            ttl = float(os.environ.get("DOCS_DOWNLOAD_TTL", DEFAULT_TTL))
+        except ValueError:
+            ttl = DEFAULT_TTL
+
+        cache = cls(
+            shared_cache_root() / "downloads",
+            enabled=setting not in ("0", "off", "false"),
+            ttl=ttl,
+            offline=os.environ.get("DOCS_OFFLINE", "").lower() in ("1", "on", "true"),
+        )
+        if setting == "purge":
+            cache.purge()
+        return cache
+
+    def urlopen(self, url: Any, data: Any = None, timeout: Optional[float] = None):
+        """``urllib.request.urlopen`` for GET requests, answered from the cache."""
+
+        request = url
+        if not isinstance(request, urllib.request.Request):
+            request = urllib.request.Request(request)
+
+        if (data is not None or request.data is not None) or not (
+            self.enabled or self.offline
+        ):
+            if self.offline:
+                raise urllib.error.URLError(
+                    f"offline, not downloading {request.full_url}"
+                )
+            return urllib.request.urlopen(request, data=data, timeout=timeout)
+
+        url = request.full_url
+        encoding = request.get_header("Accept-encoding")
+        entry = self._read_json(self._entry_path(url, encoding))
+        if entry is not None:
+            body = self._read_blob(entry["blob"])
+            if body is None:
+                entry = None
+
+        if entry is not None and (
+            self.offline or time.time() - entry["fetched"] < self.ttl
+        ):
+            with self._lock:
+                self.hits += 1
+            return CachedResponse(url, body, entry["headers"])
+
+        if self.offline:
+            raise urllib.error.URLError(f"offline and {url} isn't cached")
+
+        if entry is not None:
+            for header, validator in VALIDATORS:
+                if header in entry["validators"]:
+                    request.add_header(validator, entry["validators"][header])
+
+        try:
+            response = urllib.request.urlopen(request, timeout=timeout)
+        except urllib.error.HTTPError as error:
+            if error.code == 304 and entry is not None:
+                entry["fetched"] = time.time()
+                self._write_json(self._entry_path(url, encoding), entry)
+                with self._lock:
+                    self.revalidated += 1
+                return CachedResponse(url, body, entry["headers"])
+            raise
+        except OSError as error:
+            if entry is None:
+                raise
+            log.warning(f"Could not revalidate {url}, using the cached copy: {error}")
+            with self._lock:
+                self.stale += 1
+            return CachedResponse(url, body, entry["headers"])
+
+        with response:
+            status = getattr(response, "status", None) or response.getcode()
+            body = response.read()
+            headers = response.headers
+
+        if status != 200:
+            # e.g. 203 or 206, read before the response is closed, but not cached
+            return CachedResponse(
+                url,
+                body,
+                dict(headers.items()),
+                status=status,
+                reason=getattr(response, "reason", ""),
+            )
+
+        entry = {
+            "url": url,
+            "accept_encoding": encoding,
+            "fetched": time.time(),
+            "blob": self._write_blob(body),
+            "headers": {
+                name: headers[name] for name in REPLAYED_HEADERS if name in headers
+            },
+            "validators": {
+                header: headers[header] for header, _ in VALIDATORS if header in headers
+            },
+        }
+        self._write_json(self._entry_path(url, encoding), entry)
+        with self._lock:
+            self.downloads += 1
+        return CachedResponse(url, body, entry["headers"])
+
+    def reset(self) -> None:
+        """Resets the statistics, as a new build starts."""
+        self.hits = self.revalidated = self.stale = self.downloads = 0
+
+    def purge(self) -> None:
+        shutil.rmtree(self.path, ignore_errors=True)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "revalidated": self.revalidated,
+            "stale": self.stale,
+            "downloads": self.downloads,
+        }
+
+    def _entry_path(self, url: str, encoding: Optional[str]) -> Path:
+        key = hashlib.sha256(json.dumps([url, encoding]).encode("utf-8")).hexdigest()
+        return self.path / "urls" / f"{key}.json"
+
+    def _blob_path(self, digest: str) -> Path:
+        return self.path / "blobs" / digest[:2] / digest
+
+    def _read_blob(self, digest: str) -> Optional[bytes]:
+        try:
+            return self._blob_path(digest).read_bytes()
+        except OSError:
+            return None
+
+    def _write_blob(self, body: bytes) -> str:
+        digest = hashlib.sha256(body).hexdigest()
+        path = self._blob_path(digest)
+        if not path.exists():
+            self._write(path, body)
+        return digest
+
+    def _read_json(self, path: Path) -> Any:
+        try:
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_json(self, path: Path, data: Any) -> None:
+        self._write(path, json.dumps(data).encode("utf-8"))
+
+    def _write(self, path: Path, content: bytes) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # downloads run in threads, so the pid alone doesn't make it unique
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(content)
+        os.replace(tmp, path)
+
+
+downloads = DownloadCache.from_env()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Manage the cache of downloaded files")
+    parser.add_argument("command", choices=["purge", "info"])
+    args = parser.parse_args()
+
+    if args.command == "purge":
+        downloads.purge()
+        print(f"Purged {downloads.path}")
+    else:
+        for path in sorted(downloads.path.glob("urls/*.json")):
+            entry = downloads._read_json(path)
+            if entry is not None:
+                age = (time.time() - entry["fetched"]) / 3600
+                encoding = entry.get("accept_encoding")
+                encoding = f", {encoding}" if encoding else ""
+                print(f"{entry['url']} ({age:.1f}h old{encoding})")
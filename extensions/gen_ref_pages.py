@@ -2,10 +2,15 @@
 
 from pathlib import Path
 import os
-import yaml
+import time
 
 import mkdocs_gen_files
-from mergedeep import merge
+
+from extensions.dependencies import graph
+from extensions.profiling import profiler
+from extensions.reference import OptionBlocks, PrefixTrie, iter_modules, manifest
+
+start = time.perf_counter()
 
 SOURCE = os.environ.get("OCTOPRINT_SRC", "../OctoPrint/src")
 
@@ -47,47 +52,26 @@ ADDITIONAL_OPTIONS = {
 }
 
 nav = mkdocs_gen_files.Nav()
+blocks = OptionBlocks(OPTIONS, ADDITIONAL_OPTIONS)
 
-for path in sorted(Path(SOURCE).rglob("*.py")):
-    module_path = path.relative_to(SOURCE).with_suffix("")
-    doc_path = path.relative_to(SOURCE).with_suffix(".md")
-    full_doc_path = Path("reference", doc_path)
-
-    parts = tuple(module_path.parts)
-
-    if parts[-1] == "__init__":
-        parts = parts[:-1]
-        doc_path = doc_path.with_name("index.md")
-        full_doc_path = full_doc_path.with_name("index.md")
-    elif parts[-1] == "__main__":
-        continue
+manifest.begin()
+for module in iter_modules(SOURCE, PrefixTrie(IGNORE)):
+    entry = manifest.entry(module, blocks)
+    full_doc_path = Path("reference", entry.doc_path)
 
-    nav[parts] = doc_path.as_posix()
+    nav[tuple(entry.nav)] = entry.doc_path
 
     with mkdocs_gen_files.open(full_doc_path, "w") as fd:
-        ident = ".".join(parts)
-        if any(map(lambda i: ident.startswith(i), IGNORE)):
-            continue
-        fd.write(f"# {ident}\n")
-        fd.write(f"::: {ident}\n")
+        fd.write(entry.stub)
 
-        options = merge({}, OPTIONS)
-        if ident in ADDITIONAL_OPTIONS:
-            merge(options, ADDITIONAL_OPTIONS[ident])
-
-        fd.write(
-            "\n".join(
-                map(
-                    lambda x: "    " + x,
-                    yaml.dump({"options": options}).split("\n"),
-                )
-            )
-        )
-
-    mkdocs_gen_files.set_edit_path(full_doc_path, path)
+    mkdocs_gen_files.set_edit_path(full_doc_path, Path(entry.path))
+    graph.record_file(entry.path, page=full_doc_path.as_posix())
+manifest.save()
 
 with mkdocs_gen_files.open("reference/SUMMARY.md", "w") as nav_file:
     nav_file.writelines(nav.build_literate_nav())
 
 with mkdocs_gen_files.open("reference/index.md", "w") as index_file:
     index_file.writelines("# Code Reference\n")
+
+profiler.record("gen_ref_pages", time.perf_counter() - start)
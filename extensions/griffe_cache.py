@@ -0,0 +1,239 @@
+"""Persistent cache of the modules griffe collects for mkdocstrings.
+
+To render a ``:::`` stub, the python handler of mkdocstrings has griffe load the
+whole package it belongs to, parsing and visiting every module of ``OCTOPRINT_SRC``
+again on every build, even if only one of them changed. With this cache, installed
+by ``extensions/hooks/griffe_cache.py``, every module griffe visits is stored in
+``$DOCS_SHARED_CACHE_DIR/griffe`` under the hash of its source and dotted path (plus
+the griffe and Python versions and the docstring parser and its options), and later
+loads of an unchanged module unpickle it from there instead.
+
+Modules are pickled as griffe visited them, before their submodules are attached,
+and without their parent package and collections, which are attached again when
+loaded. griffe's own JSON format can't be used for this, as it leaves out the
+imports and exports of modules and the lazily resolved names of annotations.
+
+As griffe extensions hook into the visit, which a cached module skips, loaders with
+extensions (the ``extensions`` option of the python handler) bypass the cache. The
+cache also depends on internals of griffe, and is only installed for the versions
+of ``SUPPORTED``, with any other version of griffe every module is visited again.
+
+Set ``DOCS_GRIFFE_CACHE=off`` to bypass it, or ``DOCS_GRIFFE_CACHE=purge`` to start
+from scratch.
+"""
+
+import functools
+import hashlib
+import io
+import json
+import logging
+import os
+import pickle
+import shutil
+import sys
+from importlib import metadata
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from extensions.schema.cache import shared_cache_root
+
+log = logging.getLogger("mkdocs.extensions.griffe_cache")
+
+CACHE_VERSION = 2
+
+# minimum and first unsupported version of griffe
+SUPPORTED = ((0, 32), (0, 33))
+
+
+def _name(source: str, full: Any, first_attr_name: bool) -> Any:
+    from griffe.expressions import Name
+
+    return Name(source, full, first_attr_name=first_attr_name)
+
+
+class _AttributeResolver:
+    """Picklable stand-in for the resolver of attribute names, ``left.attr``."""
+
+    def __init__(self, left: Any, attr: str):
+        self.left = left
+        self.attr = attr
+
+    def __call__(self) -> str:
+        return f"{self.left.full}.{self.attr}"
+
+
+class _Pickler(pickle.Pickler):
+    def reducer_override(self, obj):
+        from griffe.expressions import Name
+
+        if type(obj) is not Name:
+            return NotImplemented
+        return _name, (obj.source, obj._full or _resolver(obj), obj.first_attr_name)
+
+
+def _resolver(name: Any) -> Any:
+    # names resolved at visit time have a lambda as resolver, which isn't used
+    # anymore, the others resolve lazily in their scope, with a partial of its
+    # resolve method or, for attributes, a closure over the name left of them (as
+    # of the griffe versions of SUPPORTED)
+    resolver = name._resolver
+    if isinstance(resolver, functools.partial):
+        return resolver
+
+    code = getattr(resolver, "__code__", None)
+    if code is not None and code.co_freevars == ("left", "node"):
+        left, node = (cell.cell_contents for cell in resolver.__closure__)
+        return _AttributeResolver(left, node.attr)
+    raise pickle.PicklingError(f"unknown resolver of name {name.source!r}")
+
+
+class ModuleCache:
+    def __init__(self, path: Path, enabled: bool = True):
+        self.path = path
+        self.enabled = enabled
+
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+
+    @classmethod
+    def from_env(cls) -> "ModuleCache":
+        setting = os.environ.get("DOCS_GRIFFE_CACHE", "on").lower()
+        cache = cls(
+            shared_cache_root() / "griffe",
+            enabled=setting not in ("0", "off", "false"),
+        )
+        if setting == "purge":
+            cache.purge()
+        return cache
+
+    def reset(self) -> None:
+        self.hits = self.misses = self.bypassed = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "bypassed": self.bypassed}
+
+    def purge(self) -> None:
+        shutil.rmtree(self.path, ignore_errors=True)
+
+    def key(self, loader: Any, code: str, dotted: str) -> str:
+        payload = json.dumps(
+            [
+                CACHE_VERSION,
+                metadata.version("griffe"),
+                sys.version_info[:2],
+                dotted,
+                hashlib.sha256(code.encode("utf-8")).hexdigest(),
+                getattr(loader.docstring_parser, "value", loader.docstring_parser),
+                loader.docstring_options,
+            ],
+            sort_keys=True,
+            default=repr,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def load(self, key: str) -> Optional[Any]:
+        try:
+            with open(self._path(key), "rb") as f:
+                return pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            # e.g. written by a griffe whose classes changed since
+            log.debug("Could not load cached module %s", key, exc_info=True)
+            return None
+
+    def store(self, key: str, module: Any) -> None:
+        detached = (module.parent, module._lines_collection, module._modules_collection)
+        module.parent = module._lines_collection = module._modules_collection = None
+        try:
+            buffer = io.BytesIO()
+            _Pickler(buffer, protocol=pickle.HIGHEST_PROTOCOL).dump(module)
+        except Exception:
+            log.debug("Could not pickle module %s", module.name, exc_info=True)
+            return
+        finally:
+            module.parent, module._lines_collection, module._modules_collection = (
+                detached
+            )
+
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp.write_bytes(buffer.getvalue())
+        os.replace(tmp, path)
+
+    def _path(self, key: str) -> Path:
+        return self.path / key[:2] / f"{key}.pickle"
+
+
+module_cache = ModuleCache.from_env()
+
+
+def unsupported() -> Optional[str]:
+    """The installed version of griffe, if the cache isn't made for it."""
+
+    version = metadata.version("griffe")
+    parsed = tuple(int(part) for part in version.split(".")[:2] if part.isdigit())
+    if SUPPORTED[0] <= parsed < SUPPORTED[1]:
+        return None
+    return version
+
+
+def _has_extensions(loader: Any) -> bool:
+    extensions = loader.extensions
+    return bool(
+        extensions._extensions
+        or any(extensions._visitors.values())
+        or any(extensions._inspectors.values())
+    )
+
+
+def install() -> bool:
+    """Makes griffe's loader visit only modules ``module_cache`` doesn't have.
+
+    Returns whether it could, i.e. whether the installed griffe is supported.
+    """
+
+    from griffe.loader import GriffeLoader
+
+    version = unsupported()
+    if version is not None:
+        log.warning("griffe module cache disabled, not made for griffe %s", version)
+        return False
+
+    if getattr(GriffeLoader._visit_module, "_cached", False):
+        return True
+
+    visit_module = GriffeLoader._visit_module
+
+    @functools.wraps(visit_module)
+    def cached_visit_module(self, code, module_name, module_path, parent=None):
+        if not module_cache.enabled:
+            return visit_module(self, code, module_name, module_path, parent)
+        if _has_extensions(self):
+            module_cache.bypassed += 1
+            return visit_module(self, code, module_name, module_path, parent)
+
+        dotted = f"{parent.path}.{module_name}" if parent is not None else module_name
+        key = module_cache.key(self, code, dotted)
+        module = module_cache.load(key)
+        if module is None:
+            module_cache.misses += 1
+            module = visit_module(self, code, module_name, module_path, parent)
+            module_cache.store(key, module)
+            return module
+
+        module_cache.hits += 1
+        if self.store_source:
+            self.lines_collection[module_path] = code.splitlines(keepends=False)
+        module.parent = parent
+        module._lines_collection = self.lines_collection
+        module._modules_collection = self.modules_collection
+        # the same sources may be at another path in another version's build
+        module._filepath = module_path
+        return module
+
+    cached_visit_module._cached = True
+    GriffeLoader._visit_module = cached_visit_module
+    return True
@@ -0,0 +1,72 @@
+"""Content-hashes the custom assets and pre-compresses the built site.
+
+Enabled with ``DOCS_COMPRESS``, but never while serving, see ``extensions.compress``.
+Must be the last hook, so that it compresses what the others wrote after the build.
+"""
+
+import logging
+import os
+
+from mkdocs.plugins import event_priority
+
+from extensions.compress import compressor, hashed_uri
+
+log = logging.getLogger("mkdocs.extensions.hooks.compress")
+
+_state = {"serve": False}
+
+
+def on_startup(command, dirty):
+    _state["serve"] = command == "serve"
+
+
+def _enabled():
+    return compressor.enabled and not _state["serve"]
+
+
+@event_priority(-100)
+def on_files(files, config):
+    if not _enabled():
+        return files
+
+    custom_dir = config.theme.custom_dir
+    if custom_dir:
+        custom_dir = os.path.join(os.path.abspath(custom_dir), "")
+
+    extra_css = list(config.extra_css)
+    hashed = {}
+    for file in files:
+        if file.is_documentation_page():
+            continue
+        if file.src_uri not in extra_css and not (
+            custom_dir and file.abs_src_path.startswith(custom_dir)
+        ):
+            continue
+
+        with open(file.abs_src_path, "rb") as f:
+            dest_uri = hashed_uri(file.dest_uri, f.read())
+        hashed[file.src_uri] = dest_uri
+
+        file.dest_uri = dest_uri
+        file.url = file._get_url(config.use_directory_urls)
+        file.abs_dest_path = os.path.normpath(
+            os.path.join(config.site_dir, file.dest_uri)
+        )
+
+    config.extra_css = [hashed.get(path, path) for path in extra_css]
+    # for templates that refer to custom assets, see overrides/main.html
+    config.extra["hashed_assets"] = hashed
+    return files
+
+
+@event_priority(-100)
+def on_post_build(config):
+    if not _enabled():
+        return
+
+    stats = compressor.run(config.site_dir)
+    log.info(
+        "Compressed output: %(compressed)d files compressed, %(reused)d from the "
+        "cache, %(unchanged)d unchanged",
+        stats,
+    )
@@ -0,0 +1,52 @@
+"""Writes the config key index of ``extensions.schema.keys`` to the built site.
+
+Only the keys documented on the pages of ``PAGES`` are indexed, not those of pages
+that show some of the same models again. Must come before the hooks that process the
+built site.
+"""
+
+import json
+import logging
+import os
+
+from mkdocs import utils
+from mkdocs.plugins import event_priority
+
+from extensions.schema.keys import index
+
+log = logging.getLogger("mkdocs.extensions.hooks.config_keys")
+
+PATH = "search/config_keys.json"
+
+PAGES = ("user-guide/configuration/config-yaml.md",)
+
+
+@event_priority(100)
+def on_pre_build(config):
+    index.begin()
+
+
+@event_priority(100)
+def on_page_markdown(markdown, page, config, files):
+    index.start_page()
+    return markdown
+
+
+@event_priority(-100)
+def on_page_content(html, page, config, files):
+    if page.file.src_uri in PAGES:
+        index.end_page(page.file.src_uri, page.url, html)
+    return html
+
+
+@event_priority(-100)
+def on_post_build(config):
+    data = index.data()
+    if data is None:
+        return
+
+    content = json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+    utils.write_file(content.encode("utf-8"), os.path.join(config.site_dir, PATH))
+    log.info(
+        "Config key index: %d keys on %d pages", len(data["keys"]), len(data["pages"])
+    )
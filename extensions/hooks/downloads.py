@@ -0,0 +1,50 @@
+"""Routes the downloads of mkdocstrings and ``pymdownx.snippets`` through a cache.
+
+See ``extensions.downloads`` for details.
+"""
+
+import logging
+import types
+import urllib.request
+
+from mkdocs.plugins import event_priority
+
+from extensions.downloads import downloads
+
+log = logging.getLogger("mkdocs.extensions.hooks.downloads")
+
+# stands in for ``urllib.request`` in the modules that download something
+request = types.SimpleNamespace(
+    Request=urllib.request.Request, urlopen=downloads.urlopen
+)
+
+
+@event_priority(100)
+def on_config(config):
+    downloads.reset()
+
+    # before mkdocstrings' on_config, which starts downloading the inventories
+    try:
+        import mkdocstrings.plugin
+    except ImportError:
+        pass
+    else:
+        mkdocstrings.plugin.request = request
+
+    try:
+        import pymdownx.snippets
+    except ImportError:
+        pass
+    else:
+        pymdownx.snippets.urllib = types.SimpleNamespace(request=request)
+
+
+@event_priority(-100)
+def on_post_build(config):
+    stats = downloads.stats()
+    if any(stats.values()):
+        log.info(
+            "Downloads: %(hits)d cached, %(revalidated)d revalidated, "
+            "%(stale)d stale, %(downloads)d downloaded",
+            stats,
+        )
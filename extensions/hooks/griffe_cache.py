@@ -0,0 +1,30 @@
+"""Loads the modules mkdocstrings collects with griffe from a cache.
+
+See ``extensions.griffe_cache`` for details.
+"""
+
+import logging
+
+from mkdocs.plugins import event_priority
+
+from extensions.griffe_cache import install, module_cache
+
+log = logging.getLogger("mkdocs.extensions.hooks.griffe_cache")
+
+
+@event_priority(100)
+def on_config(config):
+    module_cache.reset()
+    if module_cache.enabled and not install():
+        module_cache.enabled = False
+
+
+@event_priority(-100)
+def on_post_build(config):
+    stats = module_cache.stats()
+    if any(stats.values()):
+        log.info(
+            "griffe module cache: %(hits)d hits, %(misses)d misses, %(bypassed)d "
+            "bypassed for griffe extensions",
+            stats,
+        )
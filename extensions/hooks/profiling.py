@@ -0,0 +1,81 @@
+"""Per-page and per-stage build profiling, enabled with ``DOCS_PROFILE=1``.
+
+See ``extensions.profiling`` for details.
+"""
+
+import time
+
+from mkdocs.plugins import event_priority
+
+from extensions.profiling import profiler
+
+_pages = {}
+
+
+@event_priority(100)
+def on_config(config):
+    if not profiler.enabled:
+        return
+
+    profiler.reset()
+    _instrument_mkdocstrings()
+
+
+@event_priority(100)
+def on_pre_page(page, config, files):
+    if profiler.enabled:
+        _pages[page.file.src_uri] = (
+            profiler.enter_page(page.file.src_uri),
+            time.perf_counter(),
+        )
+
+
+@event_priority(-100)
+def on_page_content(html, page, config, files):
+    _leave(page, "page")
+
+
+@event_priority(100)
+def on_page_context(context, page, config, nav):
+    if profiler.enabled:
+        _pages[page.file.src_uri] = (
+            profiler.enter_page(page.file.src_uri),
+            time.perf_counter(),
+        )
+
+
+@event_priority(-100)
+def on_post_page(output, page, config):
+    _leave(page, "template")
+
+
+@event_priority(-100)
+def on_post_build(config):
+    if profiler.enabled:
+        profiler.write_report()
+
+
+def _leave(page, stage):
+    try:
+        token, start = _pages.pop(page.file.src_uri)
+    except KeyError:
+        return
+
+    profiler.record(stage, time.perf_counter() - start)
+    profiler.leave_page(token)
+
+
+def _instrument_mkdocstrings():
+    try:
+        from mkdocstrings_handlers.python.handler import PythonHandler
+    except ImportError:
+        return
+
+    if getattr(PythonHandler, "_profiled", False):
+        return
+
+    PythonHandler.collect = profiler.timed("mkdocstrings.collect")(
+        PythonHandler.collect
+    )
+    PythonHandler.render = profiler.timed("mkdocstrings.render")(PythonHandler.render)
+    PythonHandler._profiled = True
@@ -0,0 +1,42 @@
+"""Pre-renders all pydantic invocations of the docs before the page loop.
+
+``DOCS_PRERENDER`` sets the number of worker processes; ``0`` or ``off`` disables
+the stage and leaves all rendering to the page pass. Either way, every build starts
+with an empty fragment memo. ``DOCS_PYDANTIC_CACHE=purge`` clears the fragment cache
+here, once per process.
+
+With ``DOCS_SCHEMA_EXTRACT=1`` the schema snapshot is brought up to date first. The
+page pass then renders from it without importing anything, so there is nothing left
+for the worker processes to do.
+"""
+
+from extensions.profiling import profiler
+from extensions.schema import extract, prerender
+from extensions.schema.cache import fragments
+from extensions.schema.registry import registry
+
+
+def on_pre_build(config):
+    # only here, as the worker processes import the cache as well
+    if fragments.purge_pending:
+        fragments.purge()
+        fragments.purge_pending = False
+
+    # once per build instead of on every lookup, see extensions.schema.registry
+    registry.check()
+
+    src_paths = config.extra.get("macros_src_paths", [])
+
+    if extract.snapshot.enabled:
+        with profiler.measure("extract"):
+            extract.snapshot.ensure(
+                extract.requests_for(prerender.scan(config.docs_dir)), src_paths
+            )
+
+    workers = prerender.default_workers()
+    if not workers or extract.snapshot.active:
+        prerender.memo.reset()
+        return
+
+    with profiler.measure("prerender"):
+        prerender.prerender(config.docs_dir, src_paths, workers)
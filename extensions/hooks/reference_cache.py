@@ -0,0 +1,455 @@
+"""Reuses the rendered HTML of reference pages whose module didn't change.
+
+``gen_ref_pages.py`` records the source hash and stub of every reference page in
+the manifest of ``extensions.reference``. If a page's entry and the rendering setup
+(versions of the involved packages, markdown extensions, mkdocstrings options) are
+unchanged since the page was last rendered, its markdown is swapped for its title
+only and the stored HTML and table of contents are put back in place. The anchors
+and inventory entries mkdocstrings registered while rendering it are replayed, so
+cross-references and ``objects.inv`` stay complete. Since a reused page doesn't load
+its module, cross-references through aliases (``octoprint.plugin.AssetPlugin``)
+fall back to the anchors they resolved to in earlier builds.
+
+Besides the module's own source, a cached page records the source hashes of all
+modules it rendered something from: the targets of exported aliases and the base
+classes of its classes (for inherited ``__init__`` methods and members). It is only
+reused if none of those changed either, in this build's sources. Modules outside of
+the mkdocstrings handler's ``paths`` (e.g. ``click``) aren't tracked.
+
+The hook replays and records through private parts of mkdocs, mkdocs-autorefs and
+mkdocstrings. With versions it wasn't made for (see ``SUPPORTED``), it stays out
+of the way and all reference pages are rendered as usual.
+
+``DOCS_LAZY_REFERENCE=1 mkdocs serve`` goes one step further: reference pages that
+aren't cached are registered in the nav, but only rendered (and cached) when the
+dev server is first asked for them. Until then, cross-references to them stay
+unresolved and the search index only knows their title.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import posixpath
+from importlib import metadata
+
+from mkdocs.plugins import event_priority
+from mkdocs.structure.toc import AnchorLink, TableOfContents
+
+from extensions.reference import lazy, manifest, setup_version
+
+try:
+    from mkdocs.commands.build import _build_page
+except ImportError:  # pragma: no cover
+    _build_page = None
+
+log = logging.getLogger("mkdocs.extensions.hooks.reference_cache")
+
+PREFIX = "reference/"
+
+# minimum and first unsupported version of everything the hook reaches into
+SUPPORTED = {
+    "mkdocs": ((1, 5), (1, 6)),
+    "mkdocs-autorefs": ((0, 4), (0, 5)),
+    "mkdocstrings": ((0, 22), (0, 23)),
+    "mkdocstrings-python": ((1, 2), (1, 3)),
+}
+
+PLACEHOLDER = """# {ident}
+
+!!! info "Not rendered yet"
+
+    This page is rendered when it is first requested. Reload to see it.
+"""
+
+
+_state = {
+    "version": None,
+    "recording": None,
+    "hits": {},
+    "fallbacks": {},
+    "roots": [],
+    "hashes": {},
+    "reused": 0,
+    "stale": 0,
+    "rendered": 0,
+}
+
+
+def on_startup(command, dirty):
+    lazy.enabled = command == "serve" and os.environ.get(
+        "DOCS_LAZY_REFERENCE", ""
+    ).lower() in ("1", "on", "true")
+
+
+@event_priority(-100)
+def on_config(config):
+    lazy.reset()
+    _state.update(
+        version=None,
+        recording=None,
+        hits={},
+        fallbacks={},
+        roots=[],
+        hashes={},
+        reused=0,
+        stale=0,
+        rendered=0,
+    )
+    if not manifest.enabled or "mkdocstrings" not in config.plugins:
+        lazy.enabled = False
+        return
+
+    unsupported = _unsupported()
+    if unsupported:
+        log.warning("Reference cache disabled, not made for %s", ", ".join(unsupported))
+        lazy.enabled = False
+        return
+
+    _state["version"] = setup_version(config)
+    _state["fallbacks"] = _read_json(_fallbacks_path()) or {}
+    _state["roots"] = _source_roots(config)
+    _instrument(config)
+
+
+@event_priority(-100)
+def on_page_markdown(markdown, page, config, files):
+    entry = _entry(page)
+    if entry is None:
+        return markdown
+
+    key = _page_key(entry)
+    cached = _read_json(_page_path(key))
+    if cached is not None and cached.get("key") == key:
+        if _is_current(cached.get("dependencies")):
+            _state["hits"][page.file.src_uri] = cached
+            return f"# {entry.ident}\n"
+        _state["stale"] += 1
+
+    if lazy.enabled and entry.ident not in lazy.requested:
+        lazy.stage(page.url, entry.ident, page, markdown)
+        return PLACEHOLDER.format(ident=entry.ident)
+
+    _state["recording"] = {
+        "page": page.file.src_uri,
+        "ident": entry.ident,
+        "key": key,
+        "anchors": [],
+        "inventory": [],
+        "modules": set(),
+    }
+    return markdown
+
+
+@event_priority(100)
+def on_page_content(html, page, config, files):
+    cached = _state["hits"].pop(page.file.src_uri, None)
+    if cached is not None:
+        page.toc = _load_toc(cached["toc"])
+        _replay(config, page, cached)
+        _state["reused"] += 1
+        return cached["html"]
+
+    recording = _state["recording"]
+    if recording is not None and recording["page"] == page.file.src_uri:
+        _state["recording"] = None
+        _write_json(
+            _page_path(recording["key"]),
+            {
+                "key": recording["key"],
+                "html": html,
+                "toc": _dump_toc(page.toc.items),
+                "anchors": recording["anchors"],
+                "inventory": recording["inventory"],
+                "dependencies": {
+                    module: digest
+                    for module, digest in (
+                        (module, _module_hash(module))
+                        for module in sorted(recording["modules"])
+                    )
+                    if digest is not None
+                },
+            },
+        )
+        _state["rendered"] += 1
+
+    return html
+
+
+def on_nav(nav, config, files):
+    _state["nav"] = nav
+
+
+def on_env(env, config, files):
+    _state.update(env=env, files=files)
+
+
+def on_serve(server, config, builder):
+    if not lazy.enabled:
+        return server
+
+    serve_request = server.serve_request
+
+    def lazy_serve_request(environ, start_response):
+        path = environ["PATH_INFO"].encode("latin-1").decode("utf-8", "ignore")
+        if path.startswith(server.mount_path):
+            _render_on_demand(path[len(server.mount_path) :])
+        return serve_request(environ, start_response)
+
+    server.set_app(lazy_serve_request)
+    return server
+
+
+def on_post_build(config):
+    if _state["version"] is None:
+        return
+
+    _write_json(_fallbacks_path(), _state["fallbacks"])
+    if lazy.enabled:
+        lazy.publish((config, _state["files"], _state["nav"], _state["env"]))
+        log.info("Reference pages: %d left for on-demand rendering", len(lazy))
+
+    log.info(
+        "Reference pages: %d reused, %d rendered (%d of %d stubs changed, "
+        "%d pages with changed dependencies)",
+        _state["reused"],
+        _state["rendered"],
+        manifest.generated,
+        manifest.generated + manifest.reused,
+        _state["stale"],
+    )
+
+
+def _entry(page):
+    if _state["version"] is None:
+        return None
+
+    src_uri = page.file.src_uri
+    if not src_uri.startswith(PREFIX):
+        return None
+    return manifest.for_doc_path(src_uri[len(PREFIX) :])
+
+
+def _page_key(entry):
+    payload = json.dumps([_state["version"], entry.key])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _page_path(key):
+    return manifest.pages / key[:2] / f"{key}.json"
+
+
+def _render_on_demand(url):
+    if url.endswith("index.html"):
+        url = url[: -len("index.html")]
+    url = posixpath.normpath("/" + url).lstrip("/")
+    if url and not url.endswith(".html"):
+        url += "/"
+
+    with lazy.lock:
+        claimed = lazy.claim(url)
+        if claimed is None:
+            return
+
+        ident, page, markdown, (config, files, nav, env) = claimed
+        try:
+            _populate_page(page, markdown, config, files)
+            _build_page(page, config, files.documentation_pages(), nav, env)
+        except Exception:
+            log.exception("Could not render %s on demand", ident)
+        else:
+            log.info("Rendered %s on demand", ident)
+
+
+def _populate_page(page, markdown, config, files):
+    # mkdocs.commands.build._populate_page, but from the staged markdown, as the
+    # generated stubs are gone once the build is done
+    config._current_page = page
+    try:
+        page = config.plugins.on_pre_page(page, config=config, files=files)
+        page.markdown = config.plugins.on_page_markdown(
+            markdown, page=page, config=config, files=files
+        )
+        page.render(config, files)
+        page.content = config.plugins.on_page_content(
+            page.content, page=page, config=config, files=files
+        )
+    finally:
+        config._current_page = None
+
+
+def _fallbacks_path():
+    return manifest.path / "fallbacks.json"
+
+
+def _unsupported():
+    unsupported = []
+    for dist, (minimum, maximum) in SUPPORTED.items():
+        try:
+            version = metadata.version(dist)
+        except metadata.PackageNotFoundError:
+            continue
+        parsed = tuple(int(part) for part in version.split(".")[:2] if part.isdigit())
+        if not minimum <= parsed < maximum:
+            unsupported.append(f"{dist} {version}")
+    return unsupported
+
+
+def _source_roots(config):
+    handler = (config.plugins["mkdocstrings"].config.get("handlers") or {}).get(
+        "python", {}
+    )
+    base = os.path.dirname(config.config_file_path or "")
+    return [os.path.join(base, path) for path in handler.get("paths") or []]
+
+
+def _module_hash(module):
+    """Hash of the source of ``module`` in this build's sources, if it is there."""
+
+    if module in _state["hashes"]:
+        return _state["hashes"][module]
+
+    digest = None
+    parts = module.split(".")
+    for root in _state["roots"]:
+        base = os.path.join(root, *parts)
+        for path in (base + ".py", os.path.join(base, "__init__.py")):
+            try:
+                with open(path, "rb") as f:
+                    digest = hashlib.sha256(f.read()).hexdigest()
+            except OSError:
+                continue
+            break
+        if digest is not None:
+            break
+
+    _state["hashes"][module] = digest
+    return digest
+
+
+def _is_current(dependencies):
+    # pages cached before dependencies were recorded are rendered again
+    if dependencies is None:
+        return False
+    return all(
+        _module_hash(module) == digest for module, digest in dependencies.items()
+    )
+
+
+def _rendered_modules(data):
+    """Modules the python handler renders something from when rendering ``data``."""
+
+    modules = set()
+    seen = set()
+    stack = [data]
+    while stack:
+        obj = stack.pop()
+        if obj.is_alias:
+            if not (obj is data or obj.is_explicitely_exported or obj.inherited):
+                continue
+            try:
+                obj = obj.final_target
+            except Exception:
+                continue
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+
+        modules.add(obj.module.path)
+        if obj.is_class:
+            try:
+                stack.extend(obj.mro())
+            except Exception:
+                pass
+        stack.extend(obj.members.values())
+    return modules
+
+
+def _instrument(config):
+    autorefs = config.plugins["autorefs"]
+    inventory = config.plugins["mkdocstrings"].handlers.inventory
+    handler = config.plugins["mkdocstrings"].handlers.get_handler("python")
+
+    register_anchor = autorefs.register_anchor
+    register = inventory.register
+    get_fallback_anchor = autorefs.get_fallback_anchor
+
+    def recording_register_anchor(page, identifier):
+        if _state["recording"] is not None:
+            _state["recording"]["anchors"].append(identifier)
+        register_anchor(page, identifier)
+
+    def recording_register(*args, **kwargs):
+        if _state["recording"] is not None:
+            _state["recording"]["inventory"].append([args, kwargs])
+        register(*args, **kwargs)
+
+    def remembering_fallback_anchor(identifier):
+        anchors = get_fallback_anchor(identifier) if get_fallback_anchor else ()
+        if anchors:
+            _state["fallbacks"][identifier] = sorted(anchors)
+            return anchors
+        return tuple(_state["fallbacks"].get(identifier, ()))
+
+    render = handler.render
+
+    def recording_render(data, config):
+        if _state["recording"] is not None:
+            _state["recording"]["modules"] |= _rendered_modules(data)
+        return render(data, config)
+
+    autorefs.register_anchor = recording_register_anchor
+    autorefs.get_fallback_anchor = remembering_fallback_anchor
+    inventory.register = recording_register
+    handler.render = recording_render
+
+
+def _replay(config, page, cached):
+    autorefs = config.plugins["autorefs"]
+    for identifier in cached["anchors"]:
+        autorefs.register_anchor(page.url, identifier)
+
+    inventory = config.plugins["mkdocstrings"].handlers.inventory
+    for args, kwargs in cached["inventory"]:
+        inventory.register(*args, **kwargs)
+
+
+def _dump_toc(items):
+    return [
+        {
+            "title": item.title,
+            "id": item.id,
+            "level": item.level,
+            "children": _dump_toc(item.children),
+        }
+        for item in items
+    ]
+
+
+def _load_toc(data):
+    def load(entry):
+        item = AnchorLink(entry["title"], entry["id"], entry["level"])
+        item.children = [load(child) for child in entry["children"]]
+        return item
+
+    items = [load(entry) for entry in data]
+    if items:
+        # as in mkdocs.structure.toc.get_toc
+        items[0].active = True
+    return TableOfContents(items)
+
+
+def _read_json(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_json(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
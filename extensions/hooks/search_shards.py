@@ -0,0 +1,230 @@
+"""Splits the code reference off the search index, with ``DOCS_SEARCH_SHARDS=1``.
+
+``search/search_index.json`` then only contains the guides (and with them the config
+keys), plus the list of shards the reference pages were split into, one per
+subpackage of the manifest of ``extensions.reference`` (``octoprint.plugin``,
+``octoprint.util``, ...) and one for the top-level modules. The search worker is
+replaced by ``overrides/assets/javascripts/workers/search_shards.js``, which sets up
+Material's worker with the guides right away, and once that's done, fetches the
+shards in the background and sets up Material's worker again with all documents.
+
+So the guides are searchable as soon as their index is built, and the whole index
+usually is by the time the first query comes in, instead of that query waiting for
+it. Still, all shards are fetched and the guides are indexed twice, whichever the
+query matches. Knowing which shards a query needs would take the tokenizer, stemmer
+and stop words of lunr's pipeline at build time. As the worker takes over the message listener of Material's, it is only
+enabled with the versions of Material it was tested with (see ``MATERIAL``).
+
+The search entries of every shard are kept in ``$DOCS_CACHE_DIR/search``. As long as
+none of its modules changed (see ``ManifestEntry.key``), nor the rendering setup,
+its pages aren't indexed again.
+"""
+
+import hashlib
+import json
+import logging
+import os
+from importlib import metadata
+
+from mkdocs.plugins import event_priority
+
+from extensions.reference import manifest, setup_version, stable
+from extensions.schema.cache import cache_root
+
+log = logging.getLogger("mkdocs.extensions.hooks.search_shards")
+
+PREFIX = "reference/"
+
+SHARDS_DIR = "reference"
+
+SHARDS_VERSION = 1
+
+# minimum and first untested version of Material
+MATERIAL = ((9, 1), (9, 2))
+
+_state = {
+    "enabled": False,
+    "plugin": None,
+    "version": None,
+    "shards": {},
+    "pages": {},
+    "reused": 0,
+}
+
+
+@event_priority(-100)
+def on_config(config):
+    _state.update(
+        enabled=False, plugin=None, version=None, shards={}, pages={}, reused=0
+    )
+    if os.environ.get("DOCS_SEARCH_SHARDS", "").lower() not in ("1", "on", "true"):
+        return
+
+    plugin = config.plugins.get("material/search") or config.plugins.get("search")
+    if plugin is None or "mkdocstrings" not in config.plugins:
+        return
+
+    material = _material_version()
+    if material is None or not (MATERIAL[0] <= _parse_version(material) < MATERIAL[1]):
+        log.warning(
+            "Search index not split, the search worker isn't made for Material %s",
+            material,
+        )
+        return
+
+    _state.update(enabled=True, plugin=plugin)
+    config.extra["search_shards"] = True
+
+    # the search index is created anew by the plugin's on_config
+    index = plugin.search_index
+    add_entry_from_context = index.add_entry_from_context
+
+    def sharding_add_entry_from_context(page):
+        shard = _shard_of(page)
+        if shard is None:
+            return add_entry_from_context(page)
+
+        if shard["current"]:
+            return
+
+        start = len(index.entries)
+        add_entry_from_context(page)
+        shard["docs"].extend(index.entries[start:])
+        shard["indexed"].add(page.file.src_uri)
+        del index.entries[start:]
+
+    index.add_entry_from_context = sharding_add_entry_from_context
+
+
+@event_priority(-100)
+def on_files(files, config):
+    if not _state["enabled"]:
+        return files
+
+    # gen_ref_pages.py has filled the manifest by now
+    _state["version"] = _version(config)
+    for entry in manifest.entries():
+        name = _shard_name(entry)
+        shard = _state["shards"].get(name)
+        if shard is None:
+            shard = _state["shards"][name] = {"entries": [], "pages": set()}
+        shard["entries"].append(entry)
+        shard["pages"].add(PREFIX + entry.doc_path)
+
+    for name, shard in _state["shards"].items():
+        shard["key"] = _shard_key(shard["entries"])
+        cached = _read_json(_cache_path(name))
+        shard["current"] = cached is not None and cached.get("key") == shard["key"]
+        shard["docs"] = cached["docs"] if shard["current"] else []
+        shard["indexed"] = set()
+        if shard["current"]:
+            _state["reused"] += 1
+
+    for entry in manifest.entries():
+        _state["pages"][entry.doc_path] = _state["shards"][_shard_name(entry)]
+    return files
+
+
+@event_priority(-100)
+def on_post_build(config):
+    if not _state["enabled"]:
+        return
+
+    base = os.path.join(config.site_dir, "search")
+    path = os.path.join(base, "search_index.json")
+    data = _read_json(path)
+    if data is None:
+        return
+
+    names = []
+    for name, shard in sorted(_state["shards"].items()):
+        if not shard["current"] and shard["indexed"] == shard["pages"]:
+            # only complete shards, not ones missing pages the dev server hasn't
+            # rendered yet
+            _write_json(_cache_path(name), {"key": shard["key"], "docs": shard["docs"]})
+
+        filename = f"{SHARDS_DIR}/{name}.json"
+        _write_json(
+            os.path.join(base, filename),
+            {"docs": shard["docs"]},
+            separators=(",", ":"),
+        )
+        names.append(filename)
+
+    data["config"]["shards"] = names
+    _write_json(path, data, separators=(",", ":"))
+
+    log.info(
+        "Search index: %d guide entries, %d reference shards (%d reused)",
+        len(data["docs"]),
+        len(names),
+        _state["reused"],
+    )
+
+
+def _shard_of(page):
+    src_uri = page.file.src_uri
+    if not src_uri.startswith(PREFIX):
+        return None
+    return _state["pages"].get(src_uri[len(PREFIX) :])
+
+
+def _shard_name(entry):
+    # modules of subpackages by subpackage, everything else by top-level package
+    parts = entry.doc_path.split("/")
+    if len(parts) > 2:
+        return ".".join(parts[:2])
+    return parts[0]
+
+
+def _material_version():
+    try:
+        return metadata.version("mkdocs-material")
+    except metadata.PackageNotFoundError:
+        return None
+
+
+def _parse_version(version):
+    return tuple(int(part) for part in version.split(".")[:2] if part.isdigit())
+
+
+def _version(config):
+    plugin = _state["plugin"]
+    payload = json.dumps(
+        [
+            SHARDS_VERSION,
+            setup_version(config),
+            _material_version(),
+            dict(plugin.config),
+        ],
+        sort_keys=True,
+        default=stable,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _shard_key(entries):
+    payload = json.dumps(
+        [_state["version"], [(entry.doc_path, entry.key) for entry in entries]]
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _cache_path(name):
+    return cache_root() / "search" / f"{name}.json"
+
+
+def _read_json(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_json(path, data, separators=None):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, separators=separators, default=str)
+    os.replace(tmp, path)
@@ -0,0 +1,128 @@
+"""Only re-renders the pages affected by a change when ``mkdocs serve`` rebuilds.
+
+Every build records in ``extensions.dependencies.graph`` which source files each page
+was rendered from. On a rebuild of the dev server, a page whose markdown and
+recorded source files are unchanged gets its HTML, table of contents and title from
+the last build instead of being rendered again, so editing a schema class only
+re-renders the pages that show that model. Reference pages are left to
+``extensions/hooks/reference_cache.py``, which reuses them by the source file
+``gen_ref_pages.py`` recorded for them.
+
+Everything is rendered again if anything else that could change the content of a
+page changed: any watched file outside of ``OCTOPRINT_SRC`` that isn't a page's
+markdown (``mkdocs.yml``, ``extensions/``, snippets, the theme's custom directory).
+Set ``DOCS_TARGETED_REBUILD=off`` to always render everything.
+"""
+
+import logging
+import os
+
+from mkdocs.plugins import event_priority
+
+from extensions.dependencies import graph
+
+log = logging.getLogger("mkdocs.extensions.hooks.targeted_rebuild")
+
+PREFIX = "reference/"
+
+_state = {"markdown": {}, "hits": {}, "reused": 0, "rendered": 0}
+
+
+def on_startup(command, dirty):
+    graph.reuse = command == "serve" and os.environ.get(
+        "DOCS_TARGETED_REBUILD", "on"
+    ).lower() not in ("0", "off", "false")
+
+
+@event_priority(100)
+def on_config(config):
+    _state.update(markdown={}, hits={}, reused=0, rendered=0)
+    graph.begin()
+
+    if graph.reuse and graph.update_shared(_shared_files(config)):
+        graph.forget()
+
+
+@event_priority(100)
+def on_page_markdown(markdown, page, config, files):
+    src_uri = page.file.src_uri
+    graph.begin_page(src_uri)
+    _state["markdown"][src_uri] = markdown
+
+    if (
+        graph.reuse
+        and not src_uri.startswith(PREFIX)
+        and graph.is_current(src_uri, markdown)
+    ):
+        _state["hits"][src_uri] = graph.get(src_uri).output
+        return ""
+    return markdown
+
+
+@event_priority(100)
+def on_page_content(html, page, config, files):
+    src_uri = page.file.src_uri
+    markdown = _state["markdown"].pop(src_uri, None)
+
+    cached = _state["hits"].pop(src_uri, None)
+    if cached is not None:
+        graph.skip_page(src_uri)
+        html, page.toc, title = cached
+        # what Page.render would have taken from the first heading
+        page._title_from_render = title
+        _state["reused"] += 1
+        return html
+
+    if src_uri.startswith(PREFIX):
+        graph.end_page(src_uri, markdown)
+    else:
+        graph.end_page(src_uri, markdown, (html, page.toc, page.title))
+        _state["rendered"] += 1
+    return html
+
+
+def on_post_build(config):
+    graph.save()
+    if graph.reuse:
+        log.info(
+            "Targeted rebuild: %d pages reused, %d rendered (not counting reference "
+            "pages)",
+            _state["reused"],
+            _state["rendered"],
+        )
+
+
+def _shared_files(config):
+    sources = {
+        os.path.abspath(path) for path in config.extra.get("macros_src_paths", [])
+    }
+    roots = [config.docs_dir, *config.watch]
+    if config.theme.custom_dir:
+        roots.append(config.theme.custom_dir)
+    if config.config_file_path:
+        roots.append(config.config_file_path)
+
+    docs_dir = os.path.abspath(config.docs_dir)
+    files = {}
+    for root in {os.path.abspath(root) for root in roots} - sources:
+        for path in _walk(root):
+            if path.endswith(".md") and path.startswith(docs_dir + os.sep):
+                # pages are compared by their markdown
+                continue
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            files[path] = (stat.st_mtime_ns, stat.st_size)
+    return files
+
+
+def _walk(root):
+    if os.path.isfile(root):
+        yield root
+        return
+
+    for directory, dirnames, filenames in os.walk(root):
+        dirnames[:] = [name for name in dirnames if name != "__pycache__"]
+        for name in filenames:
+            yield os.path.join(directory, name)
@@ -0,0 +1,47 @@
+"""Only writes the files of the built site that changed, see ``extensions.output``.
+
+Enabled with ``DOCS_WRITE_IF_CHANGED=1``, but never while serving. Must come after
+all hooks that write to the site directory after the build.
+"""
+
+import logging
+
+from mkdocs.plugins import event_priority
+
+from extensions.output import install, output
+
+log = logging.getLogger("mkdocs.extensions.hooks.write_if_changed")
+
+_state = {"serve": False}
+
+
+def on_startup(command, dirty):
+    _state["serve"] = command == "serve"
+
+
+@event_priority(100)
+def on_config(config):
+    output.end()
+    if not output.enabled or _state["serve"]:
+        return
+
+    install()
+    output.begin(config.site_dir)
+
+
+@event_priority(-100)
+def on_post_build(config):
+    if not output.active:
+        return
+
+    stats = output.finish()
+    output.end()
+    log.info(
+        "Output: %(changed)d files changed, %(added)d added, %(removed)d removed, "
+        "%(unchanged)d unchanged",
+        stats,
+    )
+
+
+def on_build_error(error):
+    output.end()
@@ -1,33 +1,54 @@
-from markdown.inlinepatterns import Pattern
+from markdown.inlinepatterns import InlineProcessor
 from markdown.extensions import Extension
 import xml.etree.ElementTree as etree
 
-VERSION_RE = r"\[{2}\s*version_(added|changed)\s+(.*)\s*\]{2}"
+VERSION_RE = r"\[\[\s*version_(added|changed)\s+([^\]\s]+)\s*\]\]"
 
 
-class VersionPattern(Pattern):
-    def handleMatch(self, m):
-        version = m.group(3).strip()
+class PrecheckedPattern:
+    """Compiled pattern that doesn't even start scanning text without a ``[[``."""
+
+    __slots__ = ("_regex",)
+
+    def __init__(self, regex):
+        self._regex = regex
+
+    def finditer(self, string, pos=0):
+        if string.find("[[", pos) == -1:
+            return iter(())
+        return self._regex.finditer(string, pos)
+
+    def __getattr__(self, name):
+        return getattr(self._regex, name)
+
+
+class VersionInlineProcessor(InlineProcessor):
+    def __init__(self, pattern, md=None):
+        super().__init__(pattern, md)
+        self.compiled_re = PrecheckedPattern(self.compiled_re)
+
+    def handleMatch(self, m, data):
+        version = m.group(2)
 
         link = etree.Element("a")
         link.set(
             "href",
-            f"https://github.com/OctoPrint/OctoPrint/releases/tag/{m.group(3).strip()}",
+            f"https://github.com/OctoPrint/OctoPrint/releases/tag/{version}",
         )
         link.text = version
 
         em = etree.Element("em")
-        em.text = f"{m.group(2).capitalize()} in version "
+        em.text = f"{m.group(1).capitalize()} in version "
         em.append(link)
 
-        return em
+        return em, m.start(0), m.end(0)
 
 
 class VersionExtension(Extension):
     def extendMarkdown(self, md):
-        pattern = VersionPattern(VERSION_RE)
+        processor = VersionInlineProcessor(VERSION_RE, md)
         md.inlinePatterns.register(
-            pattern, "version", 20
+            processor, "version", 20
         )  # 20 is priority, not sure what it should be
 
 
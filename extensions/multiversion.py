@@ -0,0 +1,208 @@
+"""Builds the docs of several OctoPrint versions in parallel.
+
+    python -m extensions.multiversion \\
+        1.10=../OctoPrint-1.10/src 1.9=../OctoPrint-1.9/src
+
+runs one ``mkdocs build`` process per version, with ``OCTOPRINT_SRC`` pointing at the
+version's sources, into ``site/<version>`` (see ``--site-dir``).
+
+Every build gets its own ``$DOCS_CACHE_DIR`` (``.cache/versions/<version>``) for
+what describes its own source tree: the reference manifest, the dependency graph, the
+schema snapshot and the search shards. ``.cache`` itself is the
+``$DOCS_SHARED_CACHE_DIR`` of all of them, which holds what is keyed by content and
+therefore the same for every version whose sources are: the rendered pydantic
+fragments and reference pages, the modules griffe collected and the downloaded
+inventories. Unless there already
+are reference pages in there, the first version is built on its own first, so that
+the others don't all render the same modules at the same time.
+
+The worker processes of the pre-render stage are split between the parallel builds,
+unless ``DOCS_PRERENDER`` is set. Publishing the built versions is still up to
+``mike``.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional
+
+from extensions.schema.cache import FragmentCache, cache_root
+
+
+class Version(NamedTuple):
+    name: str
+    source: str
+
+
+class Result(NamedTuple):
+    version: Version
+    returncode: int
+    duration: float
+    log: Path
+
+
+def parse_version(value: str) -> Version:
+    name, sep, source = value.partition("=")
+    if not sep or not name or not source:
+        raise argparse.ArgumentTypeError(f"expected VERSION=SOURCE, got {value!r}")
+    if name in (".", "..") or "/" in name or os.sep in name:
+        raise argparse.ArgumentTypeError(f"invalid version name {name!r}")
+    if not os.path.isdir(source):
+        raise argparse.ArgumentTypeError(f"{source} is not a directory")
+    return Version(name, os.path.abspath(source))
+
+
+def build_env(version: Version, shared: Path, workers: Optional[int]) -> Dict[str, str]:
+    env = dict(os.environ)
+    env["OCTOPRINT_SRC"] = version.source
+    env["DOCS_CACHE_DIR"] = str(shared / "versions" / version.name)
+    env["DOCS_SHARED_CACHE_DIR"] = str(shared)
+    if workers is not None and "DOCS_PRERENDER" not in os.environ:
+        env["DOCS_PRERENDER"] = str(workers)
+    if env.get("DOCS_PYDANTIC_CACHE", "").lower() == "purge":
+        # purged once by build_all, not by every build while the others use it
+        env["DOCS_PYDANTIC_CACHE"] = "on"
+    return env
+
+
+def build(
+    version: Version,
+    config_file: str,
+    site_dir: Path,
+    shared: Path,
+    workers: Optional[int] = None,
+    args: List[str] = (),
+) -> Result:
+    env = build_env(version, shared, workers)
+    log = Path(env["DOCS_CACHE_DIR"]) / "build.log"
+    log.parent.mkdir(parents=True, exist_ok=True)
+
+    command = [
+        sys.executable,
+        "-m",
+        "mkdocs",
+        "build",
+        "--config-file",
+        config_file,
+        "--site-dir",
+        str(site_dir / version.name),
+        *args,
+    ]
+
+    start = time.perf_counter()
+    with open(log, "w", encoding="utf-8") as f:
+        process = subprocess.run(command, env=env, stdout=f, stderr=subprocess.STDOUT)
+    return Result(version, process.returncode, time.perf_counter() - start, log)
+
+
+def build_all(
+    versions: List[Version],
+    config_file: str = "mkdocs.yml",
+    site_dir: Path = Path("site"),
+    shared: Optional[Path] = None,
+    jobs: Optional[int] = None,
+    args: List[str] = (),
+    report=print,
+) -> List[Result]:
+    """Builds all ``versions``, at most ``jobs`` at a time, in the given order."""
+
+    shared = shared if shared is not None else cache_root()
+    jobs = max(1, min(jobs or os.cpu_count() or 1, len(versions)))
+    workers = max(1, (os.cpu_count() or 1) // jobs)
+
+    def run(version, workers):
+        result = build(version, config_file, site_dir, shared, workers, args)
+        status = "done" if result.returncode == 0 else "FAILED"
+        report(
+            f"{version.name}: {status} in {result.duration:.1f}s, log in {result.log}"
+        )
+        return result
+
+    if os.environ.get("DOCS_PYDANTIC_CACHE", "").lower() == "purge":
+        for version in versions:
+            FragmentCache(shared / "versions" / version.name / "pydantic").purge()
+        FragmentCache(
+            shared / "pydantic", store=shared / "pydantic" / "fragments"
+        ).purge()
+
+    results = []
+    pending = list(versions)
+    if len(pending) > 1 and jobs > 1 and not _has_pages(shared):
+        report(f"{pending[0].name}: building first to fill the shared cache")
+        results.append(run(pending.pop(0), None))
+
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        results.extend(executor.map(lambda version: run(version, workers), pending))
+    return results
+
+
+def _has_pages(shared: Path) -> bool:
+    return any((shared / "reference" / "pages").glob("*/*.json"))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Build the docs of several OctoPrint versions in parallel"
+    )
+    parser.add_argument(
+        "versions",
+        nargs="+",
+        type=parse_version,
+        metavar="VERSION=SOURCE",
+        help="version name and the path of its OctoPrint sources (the src folder)",
+    )
+    parser.add_argument("-f", "--config-file", default="mkdocs.yml")
+    parser.add_argument(
+        "-d",
+        "--site-dir",
+        type=Path,
+        default=Path("site"),
+        help="each version is built into a folder named after it in here",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=None,
+        help="number of parallel builds, by default one per version or CPU",
+    )
+    parser.epilog = "Arguments after -- are passed on to mkdocs build."
+
+    argv = list(sys.argv[1:] if argv is None else argv)
+    mkdocs_args = []
+    if "--" in argv:
+        index = argv.index("--")
+        argv, mkdocs_args = argv[:index], argv[index + 1 :]
+    args = parser.parse_args(argv)
+
+    names = [version.name for version in args.versions]
+    if len(set(names)) != len(names):
+        parser.error("every version may only be given once")
+
+    start = time.perf_counter()
+    results = build_all(
+        args.versions,
+        config_file=args.config_file,
+        site_dir=args.site_dir,
+        jobs=args.jobs,
+        args=mkdocs_args,
+    )
+    failed = [result for result in results if result.returncode != 0]
+    print(
+        f"Built {len(results) - len(failed)} of {len(results)} versions "
+        f"in {time.perf_counter() - start:.1f}s"
+    )
+
+    for result in failed:
+        print(f"\n{result.version.name} failed, end of {result.log}:")
+        with open(result.log, encoding="utf-8", errors="replace") as f:
+            print("".join(f.readlines()[-20:]), end="")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,258 @@
+"""Write-if-changed build output, enabled with ``DOCS_WRITE_IF_CHANGED=1``.
+
+``mkdocs build`` empties the site directory and writes every file again, so to rsync
+or to the ``gh-pages`` branch of ``mike`` everything looks changed. With this mode,
+``extensions/hooks/write_if_changed.py`` keeps the site directory instead, and pages
+and assets whose content is the same as in the existing file aren't written at
+all, leaving their mtimes untouched. Files other code writes directly (the search
+index, ``sitemap.xml.gz``, the compressed siblings of ``extensions.compress``, ...)
+get their old mtime back if their content didn't change, and files the build didn't
+produce are removed, as the clean step would have. Hooks that process the built site
+can skip the latter with ``output.removes()``.
+
+Existing files are compared by hash against ``$DOCS_CACHE_DIR/output``, which records
+the size, mtime and hash of every file of the last build per site directory, and are
+only read if they don't match it. At the end, the number of changed, added, removed
+and unchanged files is logged, and the paths that changed or were removed are listed
+in ``changes.json`` next to the record, e.g. for deploy scripts.
+
+``sitemap.xml.gz`` carries the time of the build, set ``SOURCE_DATE_EPOCH`` to keep
+it from changing every time.
+"""
+
+import functools
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+
+from extensions.schema.cache import cache_root
+
+RECORD_VERSION = 1
+
+
+class OutputTracker:
+    def __init__(self, path: Path, enabled: bool = False):
+        self.path = path
+        self.enabled = enabled
+
+        self.site_dir: Optional[str] = None
+        self.start = 0
+        self.written: Dict[str, str] = {}
+        self.kept: Set[str] = set()
+        self.created: Set[str] = set()
+
+        self._previous: Dict[str, List[Any]] = {}
+
+    @classmethod
+    def from_env(cls) -> "OutputTracker":
+        return cls(
+            cache_root() / "output",
+            enabled=os.environ.get("DOCS_WRITE_IF_CHANGED", "").lower()
+            in ("1", "on", "true"),
+        )
+
+    @property
+    def active(self) -> bool:
+        return self.site_dir is not None
+
+    @property
+    def file(self) -> Path:
+        key = hashlib.sha256(self.site_dir.encode("utf-8")).hexdigest()[:16]
+        return self.path / f"{key}.json"
+
+    def begin(self, site_dir: str) -> None:
+        self.site_dir = os.path.abspath(site_dir)
+        self.start = time.time_ns()
+        self.written = {}
+        self.kept = set()
+        self.created = set()
+        self._previous = self._load()
+
+    def end(self) -> None:
+        self.site_dir = None
+
+    def relative(self, path: str) -> Optional[str]:
+        """``path`` relative to the site directory, or ``None`` if outside of it."""
+
+        if not self.active:
+            return None
+        path = os.path.abspath(path)
+        if not path.startswith(os.path.join(self.site_dir, "")):
+            return None
+        return os.path.relpath(path, self.site_dir).replace(os.sep, "/")
+
+    def unchanged(self, rel: str, path: str, content: bytes) -> bool:
+        """Whether the file at ``path`` already has ``content``.
+
+        Otherwise ``rel`` is recorded as written, with the hash of ``content``.
+        """
+
+        digest = hashlib.sha256(content).hexdigest()
+        existing = self._existing_hash(rel, path)
+        if existing == digest:
+            self.kept.add(rel)
+            return True
+
+        if existing is None and rel not in self.written:
+            self.created.add(rel)
+
+        self.written[rel] = digest
+        self.kept.discard(rel)
+        return False
+
+    def claim(self, path: str) -> None:
+        """Keeps a file that is part of this build, but was left in place unchanged."""
+
+        rel = self.relative(path)
+        if rel is not None:
+            self.kept.add(rel)
+
+    def removes(self, path: str) -> bool:
+        """Whether ``finish`` will remove ``path``, as this build didn't produce it."""
+
+        rel = self.relative(path)
+        if rel is None or rel in self.kept or rel in self.written:
+            return False
+        return os.stat(path).st_mtime_ns < self.start
+
+    def finish(self) -> Dict[str, int]:
+        """Restores, removes and records what the build left in the site directory."""
+
+        files = {}
+        changed, added, removed = [], [], []
+        unchanged = 0
+
+        for root, dirs, names in os.walk(self.site_dir, topdown=False):
+            for name in names:
+                path = os.path.join(root, name)
+                rel = os.path.relpath(path, self.site_dir).replace(os.sep, "/")
+                stat = os.stat(path)
+                previous = self._previous.get(rel)
+
+                if rel in self.kept:
+                    digest = self._existing_hash(rel, path)
+                elif rel in self.written:
+                    digest = self.written[rel]
+                elif stat.st_mtime_ns >= self.start:
+                    # written by something else than mkdocs' own functions
+                    with open(path, "rb") as f:
+                        digest = hashlib.sha256(f.read()).hexdigest()
+                    if previous is not None and previous[2] == digest:
+                        os.utime(path, ns=(stat.st_atime_ns, previous[1]))
+                        stat = os.stat(path)
+                else:
+                    # not produced by this build
+                    os.remove(path)
+                    removed.append(rel)
+                    continue
+
+                if previous is None or rel in self.created:
+                    added.append(rel)
+                elif previous[2] != digest:
+                    changed.append(rel)
+                else:
+                    unchanged += 1
+                files[rel] = [stat.st_size, stat.st_mtime_ns, digest]
+
+            for name in dirs:
+                try:
+                    os.rmdir(os.path.join(root, name))
+                except OSError:
+                    pass
+
+        self._save(files, {"changed": changed, "added": added, "removed": removed})
+        return {
+            "changed": len(changed),
+            "added": len(added),
+            "removed": len(removed),
+            "unchanged": unchanged,
+        }
+
+    def _existing_hash(self, rel: str, path: str) -> Optional[str]:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+
+        previous = self._previous.get(rel)
+        if previous is not None and previous[:2] == [stat.st_size, stat.st_mtime_ns]:
+            return previous[2]
+
+        with open(path, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+
+    def _load(self) -> Dict[str, List[Any]]:
+        try:
+            with open(self.file, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+        if (
+            data.get("version") != RECORD_VERSION
+            or data.get("site_dir") != self.site_dir
+        ):
+            return {}
+        return data.get("files", {})
+
+    def _save(self, files: Dict[str, List[Any]], changes: Dict[str, List[str]]) -> None:
+        record = {"version": RECORD_VERSION, "site_dir": self.site_dir, "files": files}
+        self._write_json(self.file, record)
+        self._write_json(self.path / "changes.json", changes, indent=1)
+
+    def _write_json(self, path: Path, data: Any, indent: Optional[int] = None) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=indent)
+        os.replace(tmp, path)
+
+
+output = OutputTracker.from_env()
+
+
+def install() -> None:
+    """Makes mkdocs' file writing functions skip files ``output`` finds unchanged."""
+
+    from mkdocs import utils
+
+    if getattr(utils.write_file, "_tracked", False):
+        return
+
+    write_file = utils.write_file
+    copy_file = utils.copy_file
+    clean_directory = utils.clean_directory
+
+    @functools.wraps(write_file)
+    def tracked_write_file(content: bytes, output_path: str) -> None:
+        rel = output.relative(output_path)
+        if rel is not None and output.unchanged(rel, output_path, content):
+            return
+        write_file(content, output_path)
+
+    @functools.wraps(copy_file)
+    def tracked_copy_file(source_path: str, output_path: str) -> None:
+        if os.path.isdir(output_path):
+            output_path = os.path.join(output_path, os.path.basename(source_path))
+
+        rel = output.relative(output_path)
+        if rel is not None:
+            with open(source_path, "rb") as f:
+                if output.unchanged(rel, output_path, f.read()):
+                    return
+        copy_file(source_path, output_path)
+
+    @functools.wraps(clean_directory)
+    def tracked_clean_directory(directory: str) -> None:
+        # the site directory is kept, what the build doesn't write is removed later
+        if output.active and os.path.abspath(directory) == output.site_dir:
+            return
+        clean_directory(directory)
+
+    tracked_write_file._tracked = True
+    utils.write_file = tracked_write_file
+    utils.copy_file = tracked_copy_file
+    utils.clean_directory = tracked_clean_directory
@@ -0,0 +1,191 @@
+"""Opt-in build profiling.
+
+Set ``DOCS_PROFILE=1`` to record wall time and call counts of the expensive build
+stages (module imports, ``get_type_hints``, YAML dumping, pydantic rendering,
+``gen_ref_pages.py``, mkdocstrings collection and rendering, ...), broken down per
+page and per pydantic identifier, plus counters such as cache hits. At the end of
+the build a JSON report is written to ``$DOCS_PROFILE_REPORT``
+(``$DOCS_CACHE_DIR/profile.json`` by default) and a short top-N summary is printed
+to stderr.
+
+Without ``DOCS_PROFILE`` all of this is a no-op.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from pathlib import Path
+from typing import Dict, Optional
+
+TOP_N = 10
+
+_page: ContextVar[Optional[str]] = ContextVar("page", default=None)
+_identifier: ContextVar[Optional[str]] = ContextVar("identifier", default=None)
+
+
+def enabled() -> bool:
+    return os.environ.get("DOCS_PROFILE", "").lower() not in ("", "0", "off", "false")
+
+
+class Timing:
+    __slots__ = ("count", "total")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+
+    def as_dict(self) -> Dict:
+        return {"count": self.count, "total": round(self.total, 6)}
+
+
+def _timings():
+    return defaultdict(Timing)
+
+
+class Profiler:
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.started = time.perf_counter()
+            self.stages = _timings()
+            self.pages = defaultdict(_timings)
+            self.identifiers = defaultdict(_timings)
+            self.counters = defaultdict(int)
+
+    @contextmanager
+    def measure(self, stage: str, identifier: Optional[str] = None):
+        if not self.enabled:
+            yield
+            return
+
+        token = _identifier.set(identifier) if identifier else None
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start)
+            if token is not None:
+                _identifier.reset(token)
+
+    def timed(self, stage: str):
+        """Decorator variant of ``measure``."""
+
+        def decorator(f):
+            @wraps(f)
+            def wrapper(*args, **kwargs):
+                with self.measure(stage):
+                    return f(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def record(self, stage: str, duration: float, count: int = 1):
+        if not self.enabled:
+            return
+
+        page = _page.get()
+        identifier = _identifier.get()
+        with self._lock:
+            targets = [self.stages[stage]]
+            if page:
+                targets.append(self.pages[page][stage])
+            if identifier:
+                targets.append(self.identifiers[identifier][stage])
+            for timing in targets:
+                timing.count += count
+                timing.total += duration
+
+    def count(self, counter: str, value: int = 1):
+        if not self.enabled:
+            return
+
+        with self._lock:
+            self.counters[counter] += value
+
+    def enter_page(self, name: str):
+        return _page.set(name)
+
+    def leave_page(self, token):
+        _page.reset(token)
+
+    def report(self) -> Dict:
+        def dump(timings):
+            return {stage: timing.as_dict() for stage, timing in timings.items()}
+
+        with self._lock:
+            return {
+                "duration": round(time.perf_counter() - self.started, 6),
+                "stages": dump(self.stages),
+                "pages": {page: dump(t) for page, t in self.pages.items()},
+                "identifiers": {i: dump(t) for i, t in self.identifiers.items()},
+                "counters": dict(self.counters),
+            }
+
+    def write_report(self, path: Optional[str] = None, top: int = TOP_N) -> Dict:
+        # the cache module imports the registry, which is profiled itself
+        from extensions.schema.cache import cache_root
+
+        report = self.report()
+
+        if path is None:
+            path = os.environ.get(
+                "DOCS_PROFILE_REPORT", str(cache_root() / "profile.json")
+            )
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+
+        print(self.summary(report, top=top), file=sys.stderr)
+        print(f"Profile written to {path}", file=sys.stderr)
+        return report
+
+    @staticmethod
+    def summary(report: Dict, top: int = TOP_N) -> str:
+        def totals(entries, stage):
+            return sorted(
+                (
+                    (stages[stage]["total"], name)
+                    for name, stages in entries.items()
+                    if stage in stages
+                ),
+                reverse=True,
+            )[:top]
+
+        lines = [f"Build profile ({report['duration']:.2f}s total)", "", "Stages:"]
+        for stage, timing in sorted(
+            report["stages"].items(), key=lambda x: x[1]["total"], reverse=True
+        )[:top]:
+            lines.append(f"  {timing['total']:8.3f}s {timing['count']:6d}x  {stage}")
+
+        for title, key, stage in (
+            ("Pages", "pages", "page"),
+            ("Pydantic identifiers", "identifiers", "pydantic"),
+        ):
+            entries = totals(report[key], stage)
+            if entries:
+                lines += ["", f"{title}:"]
+                lines += [f"  {total:8.3f}s  {name}" for total, name in entries]
+
+        counters = report.get("counters")
+        if counters:
+            lines += ["", "Counters:"]
+            lines += [
+                f"  {value:8d}  {counter}"
+                for counter, value in sorted(counters.items())
+            ]
+
+        return "\n".join(lines)
+
+
+profiler = Profiler(enabled=enabled())
@@ -1,14 +1,25 @@
 from pymdownx.blocks import BlocksExtension
 from pymdownx.blocks.block import (
     Block,
+    type_any,
+    type_boolean,
     type_string_in,
     type_string,
     type_string_insensitive,
 )
 import xml.etree.ElementTree as etree
 
+from extensions.schema import elements
+from extensions.schema.render import pydantic_example
+
 
 class PydanticBlock(Block):
+    """``/// pydantic | identifier`` block.
+
+    Builds its elements through ``extensions.schema.elements``, like the
+    ``%%% pydantic`` block.
+    """
+
     NAME = "pydantic"
     ARGUMENT = True
     OPTIONS = {
@@ -17,13 +28,32 @@ class PydanticBlock(Block):
             type_string_in(["full", "table", "example"], type_string_insensitive),
         ],
         "key": ["", type_string],
+        "subs": [None, type_any],
+        "recursive": [True, type_boolean],
     }
 
     def on_create(self, parent):
         return etree.SubElement(parent, "div")
 
-    def on_add(self, block):
-        return "Just **a test** with *markdown*."
+    def on_end(self, block):
+        identifier = self.argument
+        mode = self.options["mode"]
+        key = self.options["key"] or None
+
+        if mode == "full":
+            elements.full(
+                self.md, block, identifier, key=key, subs=self.options["subs"]
+            )
+        elif mode == "table":
+            elements.table(block, identifier, subs=self.options["subs"])
+        elif mode == "example":
+            elements.example(
+                self.md,
+                block,
+                pydantic_example(
+                    identifier, key=key, recursive=self.options["recursive"]
+                ),
+            )
 
 
 class PydanticBlocksExtension(BlocksExtension):
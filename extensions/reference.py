@@ -0,0 +1,411 @@
+"""Engine behind ``gen_ref_pages.py``.
+
+Walks a source tree for documentable modules, pruning ignored packages at the
+directory level before descending into them, and renders the ``:::`` stubs with
+memoized option blocks.
+
+The source hash, stub and nav entry of every module are kept in a manifest in
+``$DOCS_CACHE_DIR/reference``, so that unchanged modules keep their stub and
+``extensions/hooks/reference_cache.py`` can reuse their rendered pages. These are
+kept under their key in ``$DOCS_SHARED_CACHE_DIR/reference/pages`` if that is set,
+so that builds of other versions reuse the pages of identical modules. Set
+``DOCS_REFERENCE_CACHE=off`` to bypass it, or ``DOCS_REFERENCE_CACHE=purge`` to
+start from scratch.
+
+With ``DOCS_LAZY_REFERENCE=1``, ``mkdocs serve`` leaves reference pages that aren't
+cached yet unrendered until they are first requested, see ``LazyPages``.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+from importlib import metadata
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+import yaml
+from mergedeep import merge
+
+from extensions.schema.cache import cache_root, shared_cache_root
+
+
+class PrefixTrie:
+    """Character trie answering "does any of the stored prefixes start this string"."""
+
+    __slots__ = ("_root",)
+
+    _END = ""
+
+    def __init__(self, prefixes: Iterable[str] = ()):
+        self._root = {}
+        for prefix in prefixes:
+            self.add(prefix)
+
+    def add(self, prefix: str) -> None:
+        node = self._root
+        for char in prefix:
+            node = node.setdefault(char, {})
+        node[self._END] = True
+
+    def matches(self, value: str) -> bool:
+        node = self._root
+        if self._END in node:
+            return True
+        for char in value:
+            node = node.get(char)
+            if node is None:
+                return False
+            if self._END in node:
+                return True
+        return False
+
+
+class Module(NamedTuple):
+    path: str
+    parts: Tuple[str, ...]
+    doc_path: str
+
+    @property
+    def ident(self) -> str:
+        return ".".join(self.parts)
+
+
+def iter_modules(source: str, ignore: PrefixTrie) -> Iterator[Module]:
+    """Yields all documentable modules below ``source``, in sorted path order.
+
+    Ignored modules are skipped, and so are whole packages whose submodules would
+    all be ignored.
+    """
+
+    yield from _walk(source, (), ignore)
+
+
+def _walk(directory: str, parents: Tuple[str, ...], ignore: PrefixTrie):
+    try:
+        with os.scandir(directory) as it:
+            entries = sorted(it, key=lambda entry: entry.name)
+    except OSError:
+        return
+
+    for entry in entries:
+        name = entry.name
+        if entry.is_dir():
+            if name == "__pycache__" or name.startswith("."):
+                continue
+
+            parts = parents + (name,)
+            if ignore.matches(".".join(parts) + "."):
+                # all submodules are ignored, only the package itself might not be
+                init = os.path.join(entry.path, "__init__.py")
+                if os.path.isfile(init) and not ignore.matches(".".join(parts)):
+                    yield Module(init, parts, "/".join(parts) + "/index.md")
+                continue
+
+            yield from _walk(entry.path, parts, ignore)
+
+        elif name.endswith(".py") and entry.is_file():
+            stem = name[:-3]
+            if stem == "__main__":
+                continue
+
+            if stem == "__init__":
+                parts = parents
+                doc_path = "/".join(parents + ("index.md",))
+            else:
+                parts = parents + (stem,)
+                doc_path = "/".join(parents + (stem + ".md",))
+
+            if not parts or ignore.matches(".".join(parts)):
+                continue
+            yield Module(entry.path, parts, doc_path)
+
+
+class OptionBlocks:
+    """Memoized, serialized ``options:`` blocks of the ``:::`` stubs."""
+
+    def __init__(self, options: Dict, additional: Optional[Dict[str, Dict]] = None):
+        self._options = options
+        self._additional = additional or {}
+        self._blocks: Dict[Optional[str], str] = {}
+
+    def block(self, ident: str) -> str:
+        key = ident if ident in self._additional else None
+        try:
+            return self._blocks[key]
+        except KeyError:
+            pass
+
+        options = merge({}, self._options)
+        if key is not None:
+            merge(options, self._additional[key])
+
+        block = "\n".join(
+            "    " + line for line in yaml.dump({"options": options}).split("\n")
+        )
+        self._blocks[key] = block
+        return block
+
+    def stub(self, ident: str) -> str:
+        return f"# {ident}\n::: {ident}\n{self.block(ident)}"
+
+
+MANIFEST_VERSION = 1
+
+DISTRIBUTIONS = (
+    "mkdocs",
+    "markdown",
+    "pymdown-extensions",
+    "mkdocstrings",
+    "mkdocstrings-python",
+    "mkdocs-autorefs",
+    "griffe",
+)
+
+
+class ManifestEntry(NamedTuple):
+    ident: str
+    path: str
+    doc_path: str
+    nav: List[str]
+    hash: str
+    stub: str
+    signature: Tuple[int, int]
+
+    @property
+    def key(self) -> str:
+        """Hash of everything the rendered page depends on from this side."""
+        payload = json.dumps([MANIFEST_VERSION, self.hash, self.stub])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class Manifest:
+    """Source hash, stub and nav entry of every reference page of the last build."""
+
+    def __init__(self, path: Path, pages: Optional[Path] = None, enabled: bool = True):
+        self.path = path
+        self.pages = pages if pages is not None else path / "pages"
+        self.enabled = enabled
+
+        self.reused = 0
+        self.generated = 0
+
+        self._previous: Dict[str, ManifestEntry] = {}
+        self._entries: Dict[str, ManifestEntry] = {}
+        self._by_doc_path: Dict[str, ManifestEntry] = {}
+
+    @classmethod
+    def from_env(cls) -> "Manifest":
+        setting = os.environ.get("DOCS_REFERENCE_CACHE", "on").lower()
+        manifest = cls(
+            cache_root() / "reference",
+            pages=shared_cache_root() / "reference" / "pages",
+            enabled=setting not in ("0", "off", "false"),
+        )
+        if setting == "purge":
+            manifest.purge()
+        return manifest
+
+    @property
+    def file(self) -> Path:
+        return self.path / "manifest.json"
+
+    def begin(self) -> None:
+        """Starts a new generation run, based on the last stored or generated one."""
+
+        if self._entries:
+            self._previous = self._entries
+        elif self.enabled:
+            self._previous = self._load()
+        self._entries = {}
+        self._by_doc_path = {}
+        self.reused = self.generated = 0
+
+    def entry(self, module: Module, blocks: OptionBlocks) -> ManifestEntry:
+        """Returns the entry of ``module``, reusing the previous stub if unchanged."""
+
+        ident = module.ident
+        previous = self._previous.get(ident)
+
+        stat = os.stat(module.path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if previous is not None and tuple(previous.signature) == signature:
+            digest = previous.hash
+        else:
+            with open(module.path, "rb") as f:
+                digest = hashlib.sha256(f.read()).hexdigest()
+
+        stub = blocks.stub(ident)
+        if (
+            previous is not None
+            and previous.hash == digest
+            and previous.stub == stub
+            and previous.doc_path == module.doc_path
+        ):
+            entry = previous._replace(path=module.path, signature=signature)
+            self.reused += 1
+        else:
+            entry = ManifestEntry(
+                ident=ident,
+                path=module.path,
+                doc_path=module.doc_path,
+                nav=list(module.parts),
+                hash=digest,
+                stub=stub,
+                signature=signature,
+            )
+            self.generated += 1
+
+        self._entries[ident] = entry
+        self._by_doc_path[entry.doc_path] = entry
+        return entry
+
+    def for_doc_path(self, doc_path: str) -> Optional[ManifestEntry]:
+        """The entry of the page at ``doc_path`` (relative to ``reference/``)."""
+        return self._by_doc_path.get(doc_path)
+
+    def entries(self) -> List[ManifestEntry]:
+        """The entries of the current generation run, in module order."""
+        return list(self._entries.values())
+
+    def save(self) -> None:
+        if not self.enabled:
+            return
+
+        data = {
+            "version": MANIFEST_VERSION,
+            "modules": {
+                ident: entry._asdict() for ident, entry in sorted(self._entries.items())
+            },
+        }
+        self.path.mkdir(parents=True, exist_ok=True)
+        tmp = self.file.with_name(f"{self.file.name}.{os.getpid()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=1)
+        os.replace(tmp, self.file)
+
+    def purge(self) -> None:
+        shutil.rmtree(self.path, ignore_errors=True)
+        shutil.rmtree(self.pages, ignore_errors=True)
+        self._previous = {}
+        self._entries = {}
+        self._by_doc_path = {}
+
+    def _load(self) -> Dict[str, ManifestEntry]:
+        try:
+            with open(self.file, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+        if data.get("version") != MANIFEST_VERSION:
+            return {}
+
+        try:
+            return {
+                ident: ManifestEntry(**entry)
+                for ident, entry in data.get("modules", {}).items()
+            }
+        except TypeError:
+            return {}
+
+
+manifest = Manifest.from_env()
+
+
+def setup_version(config: Any) -> str:
+    """Hash of the rendering setup of the reference pages, besides their entries."""
+
+    versions = []
+    for dist in DISTRIBUTIONS:
+        try:
+            versions.append(metadata.version(dist))
+        except metadata.PackageNotFoundError:
+            versions.append(None)
+
+    # without the source paths, as the sources are tracked per module, so that
+    # builds of other versions share the pages of identical modules
+    mkdocstrings = dict(config.plugins["mkdocstrings"].config)
+    mkdocstrings["handlers"] = {
+        name: {key: value for key, value in handler.items() if key != "paths"}
+        for name, handler in (mkdocstrings.get("handlers") or {}).items()
+    }
+
+    payload = json.dumps(
+        [
+            versions,
+            config["theme"].name,
+            config["use_directory_urls"],
+            config["markdown_extensions"],
+            config["mdx_configs"],
+            mkdocstrings,
+        ],
+        sort_keys=True,
+        default=stable,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def stable(obj: Any) -> str:
+    """JSON fallback for configuration values that is the same in every process."""
+
+    # callables (e.g. emoji generators) by name, anything else by type, as their
+    # reprs usually contain addresses that change with every process
+    name = getattr(obj, "__qualname__", None)
+    if name is not None:
+        return f"{getattr(obj, '__module__', '')}.{name}"
+    return type(obj).__qualname__
+
+
+class LazyPages:
+    """Reference pages the dev server only renders when they are first requested.
+
+    A build stages the pages it left unrendered together with everything needed to
+    render them later, and publishes them once it is done. Requested pages are
+    rendered normally by all following builds, and through the page cache of
+    ``extensions/hooks/reference_cache.py`` only again once their module changed.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.requested = set()
+        self.lock = threading.RLock()
+
+        self._staged: Dict[str, Any] = {}
+        self._pending: Dict[str, Any] = {}
+        self._context = None
+
+    def reset(self) -> None:
+        """Forgets the pending pages of the last build, as a new one starts."""
+        with self.lock:
+            self._staged = {}
+            self._pending = {}
+            self._context = None
+
+    def stage(self, url: str, ident: str, page: Any, markdown: str) -> None:
+        self._staged[url] = (ident, page, markdown)
+
+    def publish(self, context: Any) -> None:
+        with self.lock:
+            self._pending = self._staged
+            self._staged = {}
+            self._context = context
+
+    def claim(self, url: str):
+        """Returns ``(ident, page, markdown, context)`` for a pending ``url``, once.
+
+        Must be called with ``lock`` held.
+        """
+        try:
+            ident, page, markdown = self._pending.pop(url)
+        except KeyError:
+            return None
+        self.requested.add(ident)
+        return ident, page, markdown, self._context
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+
+lazy = LazyPages()
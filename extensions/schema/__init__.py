@@ -0,0 +1 @@
+"""Shared machinery for rendering OctoPrint's pydantic schema in the docs."""
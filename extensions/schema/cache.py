@@ -0,0 +1,220 @@
+"""Persistent, content-addressed cache of rendered pydantic fragments.
+
+A fragment is stored under a key made up of the render mode, the identifier, the
+call options, the content hashes of all source modules the rendered model depended
+on when it was last rendered, and a hash of the renderer itself. If none of these
+changed, the model doesn't even have to be imported on the next build.
+
+The cache lives in ``$DOCS_CACHE_DIR/pydantic`` (``.cache/pydantic`` by default),
+except for the fragments themselves, which are kept in
+``$DOCS_SHARED_CACHE_DIR/pydantic`` if that is set, as builds of other OctoPrint
+versions can use them too (see ``extensions.multiversion``). Set
+``DOCS_PYDANTIC_CACHE=off`` to bypass it, or ``DOCS_PYDANTIC_CACHE=purge`` to clear
+it when the build starts. ``python -m extensions.schema.cache purge`` does the latter
+from the command line.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import sys
+import threading
+from importlib import metadata
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from extensions.schema.registry import registry
+
+CACHE_VERSION = 1
+
+
+def cache_root() -> Path:
+    return Path(os.environ.get("DOCS_CACHE_DIR", ".cache"))
+
+
+def shared_cache_root() -> Path:
+    """Where content-addressed caches live, which builds of several versions share."""
+    return Path(os.environ.get("DOCS_SHARED_CACHE_DIR") or cache_root())
+
+
+def find_source(module_name: str) -> Optional[str]:
+    parts = module_name.split(".")
+    for entry in sys.path:
+        base = os.path.join(entry or ".", *parts)
+        for candidate in (base + ".py", os.path.join(base, "__init__.py")):
+            if os.path.isfile(candidate):
+                return candidate
+    return None
+
+
+class FragmentCache:
+    def __init__(self, path: Path, store: Optional[Path] = None, enabled: bool = True):
+        self.path = path
+        self.store = store if store is not None else path / "fragments"
+        self.enabled = enabled
+
+        self.hits = 0
+        self.misses = 0
+        # done by the build process, see extensions/hooks/pydantic_prerender.py
+        self.purge_pending = False
+
+        self._lock = threading.Lock()
+        self._file_hashes: Dict[str, Any] = {}
+        self._version = None
+
+    @classmethod
+    def from_env(cls) -> "FragmentCache":
+        setting = os.environ.get("DOCS_PYDANTIC_CACHE", "on").lower()
+        cache = cls(
+            cache_root() / "pydantic",
+            store=shared_cache_root() / "pydantic" / "fragments",
+            enabled=setting not in ("0", "off", "false"),
+        )
+        cache.purge_pending = setting == "purge"
+        return cache
+
+    def get_or_render(
+        self, mode: str, identifier: str, options: Dict, render: Callable[[], Any]
+    ) -> Any:
+        if not self.enabled:
+            return render()
+
+        fragment = self.lookup(mode, identifier, options)
+        if fragment is not None:
+            return fragment
+
+        self.misses += 1
+        result = render()
+
+        dependencies = registry.dependencies(identifier)
+        if not dependencies:
+            # not loaded by the registry, nothing to tell when it changes
+            return result
+        self._write_json(self._dependency_path(identifier), dependencies)
+        key = self._key(mode, identifier, options, dependencies)
+        if key is not None:
+            self._write_json(self._fragment_path(key), {"content": result})
+
+        return result
+
+    def lookup(self, mode: str, identifier: str, options: Dict) -> Any:
+        """Returns the cached fragment, or ``None`` without rendering anything."""
+
+        if not self.enabled:
+            return None
+
+        dependencies = self._read_json(self._dependency_path(identifier))
+        if dependencies is None:
+            return None
+
+        key = self._key(mode, identifier, options, dependencies)
+        if key is None:
+            return None
+
+        fragment = self._read_json(self._fragment_path(key))
+        if fragment is None:
+            return None
+
+        self.hits += 1
+        return fragment["content"]
+
+    def dependencies(self, identifier: str) -> Optional[List[str]]:
+        """The source modules ``identifier`` depended on when it was last rendered."""
+
+        if not self.enabled:
+            return None
+        return self._read_json(self._dependency_path(identifier))
+
+    def purge(self) -> None:
+        shutil.rmtree(self.path, ignore_errors=True)
+        shutil.rmtree(self.store, ignore_errors=True)
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
+
+    def _key(
+        self, mode: str, identifier: str, options: Dict, dependencies: List[str]
+    ) -> Optional[str]:
+        sources = []
+        for module_name in dependencies:
+            path = find_source(module_name)
+            if path is None:
+                return None
+            sources.append((module_name, self._hash_file(path)))
+
+        payload = json.dumps(
+            [self._renderer_version(), mode, identifier, options, sources],
+            sort_keys=True,
+            default=repr,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _renderer_version(self) -> str:
+        if self._version is None:
+            digest = hashlib.sha256(str(CACHE_VERSION).encode("utf-8"))
+            for path in sorted(Path(__file__).parent.glob("*.py")):
+                digest.update(path.read_bytes())
+            for dist in ("pydantic", "ruamel.yaml"):
+                try:
+                    digest.update(metadata.version(dist).encode("utf-8"))
+                except metadata.PackageNotFoundError:
+                    pass
+            self._version = digest.hexdigest()
+        return self._version
+
+    def _hash_file(self, path: str) -> str:
+        stat = os.stat(path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+
+        with self._lock:
+            cached = self._file_hashes.get(path)
+        if cached and cached[0] == signature:
+            return cached[1]
+
+        with open(path, "rb") as f:
+            digest = hashlib.sha256(f.read()).hexdigest()
+
+        with self._lock:
+            self._file_hashes[path] = (signature, digest)
+        return digest
+
+    def _dependency_path(self, identifier: str) -> Path:
+        return self.path / "deps" / f"{identifier}.json"
+
+    def _fragment_path(self, key: str) -> Path:
+        return self.store / key[:2] / f"{key}.json"
+
+    def _read_json(self, path: Path) -> Any:
+        try:
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_json(self, path: Path, data: Any) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp, path)
+
+
+fragments = FragmentCache.from_env()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Manage the on-disk cache of rendered pydantic fragments"
+    )
+    parser.add_argument("command", choices=["purge", "info"])
+    args = parser.parse_args()
+
+    if args.command == "purge":
+        fragments.purge()
+        print(f"Purged {fragments.path}")
+    else:
+        count = sum(1 for _ in fragments.store.glob("*/*.json"))
+        print(f"{count} cached fragments in {fragments.store}")
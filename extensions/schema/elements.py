@@ -0,0 +1,89 @@
+"""Element tree output of the ``pydantic`` renderers, for the Markdown block syntaxes.
+
+Both the ``%%% pydantic`` and the ``/// pydantic`` block build the table and the
+highlighted example as elements directly, instead of generating Markdown to be
+parsed again. The table is built from the ``pydantic_cells`` fragment, which is
+memoized, cached and pre-rendered like the others, and only cells with more than a
+single code span still go through inline processing. The result is identical to
+what the pydantic macros produce.
+"""
+
+import xml.etree.ElementTree as etree
+
+from markdown.util import AtomicString, code_escape
+
+from extensions.schema.keys import index
+from extensions.schema.render import (
+    TABLE_HEADER,
+    pydantic_cells,
+    pydantic_example,
+    pydantic_keys,
+)
+
+FENCE_START = "```yaml\n"
+FENCE_END = "\n```\n"
+
+
+def full(md, parent, identifier, key=None, subs=None):
+    """Defaults and data model of ``identifier``, like the ``pydantic`` macro."""
+
+    heading(parent, "Defaults")
+    example(md, parent, pydantic_example(identifier, key=key))
+    heading(parent, "Data model")
+    table(parent, identifier, subs=subs)
+    if key is not None:
+        index.record(key, pydantic_keys(identifier, key=key, subs=subs))
+
+
+def heading(parent, text):
+    etree.SubElement(parent, "h3").text = text
+
+
+def table(parent, identifier, subs=None):
+    table = etree.SubElement(parent, "table")
+    tr = etree.SubElement(etree.SubElement(table, "thead"), "tr")
+    for title in TABLE_HEADER:
+        etree.SubElement(tr, "th").text = title
+
+    tbody = etree.SubElement(table, "tbody")
+    for cells in pydantic_cells(identifier, subs=subs):
+        tr = etree.SubElement(tbody, "tr")
+        for cell in cells:
+            _cell(etree.SubElement(tr, "td"), cell)
+
+
+def example(md, parent, fenced):
+    source = fenced[len(FENCE_START) : -len(FENCE_END)]
+
+    fences = None
+    if "fenced_code_block" in md.preprocessors:
+        fences = md.preprocessors["fenced_code_block"]
+    if not hasattr(fences, "highlight"):
+        pre = etree.SubElement(parent, "pre")
+        code = etree.SubElement(pre, "code", {"class": "language-yaml"})
+        code.text = AtomicString(source)
+        return
+
+    # highlighted exactly like a fenced block by SuperFences, whose fences are
+    # already gone by the time blocks are processed
+    fences.get_hl_settings()
+    html = fences.highlight(
+        src=source,
+        language="yaml",
+        options={},
+        md=md,
+        classes=[],
+        id_value="",
+        attrs={},
+    )
+    etree.SubElement(parent, "p").text = md.htmlStash.store(html)
+
+
+def _cell(td, text):
+    if len(text) > 1 and text[0] == text[-1] == "`" and "`" not in text[1:-1]:
+        # what the backtick inline processor would make of it
+        code = etree.SubElement(td, "code")
+        code.text = AtomicString(code_escape(text[1:-1].strip()))
+    else:
+        # left to the inline processors, just like the tables extension does
+        td.text = text
@@ -0,0 +1,143 @@
+"""Reusable, preconfigured emitter for the YAML examples.
+
+The round-trip ``YAML`` instance is configured once and reused for every example,
+and dumps straight into the fragment's output buffer instead of going through a
+temporary string. ``inline`` renders single values the same way, but on one line,
+e.g. the defaults in the config key index.
+
+With ``DOCS_YAML_FAST=1`` documents that libyaml is known to emit byte-identically
+are dumped through ruamel's C emitter instead. That's the case for nested mappings
+of booleans, numbers and single-line strings without quotes, and empty
+collections. Anything else, e.g. ``None`` values (which the round-trip dumper
+renders as empty scalars), non-empty lists (libyaml doesn't support the sequence
+dash offset) or multi-line strings, always takes the pure Python path. That includes
+the defaults of OctoPrint's ``Config`` and ``ServerConfig``, so the fast path
+doesn't speed up the config pages, see ``benchmarks/yaml_emitter.py``.
+"""
+
+import os
+import threading
+from io import StringIO
+from typing import Any, TextIO
+
+from ruamel.yaml import YAML
+from ruamel.yaml.representer import SafeRepresenter
+
+from extensions.profiling import profiler
+
+try:
+    from ruamel.yaml.cyaml import CEmitter
+except ImportError:  # pragma: no cover
+    CEmitter = None
+
+# longer strings might get folded differently by libyaml
+FAST_STRING_LENGTH = 40
+FAST_UNSAFE_CHARACTERS = frozenset("'\"\n\r\t\\")
+
+
+class _UnsortedSafeRepresenter(SafeRepresenter):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.sort_base_mapping_type_on_output = False
+
+
+def fast_path_safe(data: Any) -> bool:
+    """Whether libyaml is certain to emit ``data`` just like the round-trip dumper."""
+
+    stack = [data]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, dict):
+            for key, value in item.items():
+                if not isinstance(key, str) or not _safe_string(key):
+                    return False
+                stack.append(value)
+        elif isinstance(item, (list, tuple)):
+            if item:
+                return False
+        elif isinstance(item, str):
+            if not _safe_string(item):
+                return False
+        elif item is None or not isinstance(item, (bool, int, float)):
+            return False
+    return True
+
+
+def _safe_string(value: str) -> bool:
+    return (
+        len(value) <= FAST_STRING_LENGTH
+        and value.isprintable()
+        and FAST_UNSAFE_CHARACTERS.isdisjoint(value)
+    )
+
+
+def _roundtrip_yaml() -> YAML:
+    yaml = YAML()
+    yaml.indent(mapping=2, sequence=4, offset=2)
+    yaml.preserve_quotes = True
+    yaml.default_flow_style = False
+    return yaml
+
+
+def _inline_yaml() -> YAML:
+    yaml = YAML()
+    yaml.default_flow_style = True
+    yaml.width = 4096
+    return yaml
+
+
+def _fast_yaml() -> YAML:
+    yaml = YAML(typ="safe", pure=False)
+    yaml.Representer = _UnsortedSafeRepresenter
+    yaml.indent(mapping=2, sequence=4, offset=2)
+    yaml.default_flow_style = False
+    return yaml
+
+
+class ExampleEmitter:
+    def __init__(self, fast: bool = False):
+        self.fast = fast and CEmitter is not None
+
+        self._lock = threading.Lock()
+        self._yaml = _roundtrip_yaml()
+        self._fast_yaml = _fast_yaml() if self.fast else None
+        self._inline_yaml = _inline_yaml()
+
+        self.dumps = 0
+        self.fast_dumps = 0
+
+    def dump(self, data: Any, stream: TextIO) -> None:
+        yaml = self._yaml
+        if self._fast_yaml is not None and fast_path_safe(data):
+            yaml = self._fast_yaml
+
+        with self._lock, profiler.measure("yaml_dump"):
+            yaml.dump(data, stream)
+            self.dumps += 1
+            if yaml is self._fast_yaml:
+                self.fast_dumps += 1
+
+    def fenced(self, data: Any) -> str:
+        """Renders ``data`` as a fenced YAML code block."""
+
+        stream = StringIO()
+        stream.write("```yaml\n")
+        self.dump(data, stream)
+        stream.write("\n```\n")
+        return stream.getvalue()
+
+    def inline(self, data: Any) -> str:
+        """Renders ``data`` as a single line of YAML, collections in flow style."""
+
+        stream = StringIO()
+        with self._lock:
+            self._inline_yaml.dump(data, stream)
+        value = stream.getvalue()
+        if value.endswith("\n...\n"):
+            value = value[: -len("\n...\n")]
+        return value.rstrip("\n")
+
+
+emitter = ExampleEmitter(
+    fast=os.environ.get("DOCS_YAML_FAST", "").lower() in ("1", "on", "true")
+)
@@ -0,0 +1,491 @@
+"""Extraction of the pydantic schema into a JSON snapshot the renderers read.
+
+With ``DOCS_SCHEMA_EXTRACT=1`` the build process doesn't import OctoPrint at all.
+Instead, ``python -m extensions.schema.extract`` runs in a subprocess, imports
+``octoprint.schema.config`` once and dumps the data model rows and the defaults of
+every model in it, plus those of any other identifier the docs ask for, to
+``$DOCS_CACHE_DIR/schema/schema.json``. The renderers read rows and defaults from
+that ``snapshot`` and only import a model in process if it's missing from it, e.g.
+for macro calls whose arguments can't be evaluated statically.
+
+With ``DOCS_SCHEMA_EXTRACT=static`` the snapshot is instead filled by
+``extensions.schema.static``, which parses the sources in process without importing
+anything.
+
+The snapshot records the source files the extraction loaded, and is only
+regenerated if one of them changed, the docs ask for something it doesn't contain,
+or the extraction backend or code or pydantic changed.
+"""
+
+import argparse
+import hashlib
+import importlib
+import inspect
+import json
+import logging
+import math
+import os
+import subprocess
+import sys
+import time
+from importlib import metadata
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from extensions.schema.cache import cache_root
+from extensions.schema.fields import REQUIRED, FieldRow
+from extensions.schema.registry import model_modules, package_modules, registry
+
+log = logging.getLogger("mkdocs.extensions.schema.extract")
+
+SNAPSHOT_VERSION = 2
+
+PACKAGES = ("octoprint.schema.config",)
+
+# DOCS_SCHEMA_EXTRACT settings
+BACKENDS = {
+    "1": "import",
+    "on": "import",
+    "true": "import",
+    "import": "import",
+    "static": "static",
+}
+
+# the code that determines what ends up in a snapshot
+SOURCES = ("extract.py", "fields.py", "static.py", "typenames.py")
+
+Request = Tuple[str, Optional[Dict[str, str]]]
+
+
+def _subs_key(subs: Optional[Dict[str, str]]) -> str:
+    return json.dumps(subs or None, sort_keys=True)
+
+
+class Described(NamedTuple):
+    """How a backend renders one snapshot entry."""
+
+    id: str
+    kind: str
+    rows: Optional[Callable[[Optional[Dict[str, str]]], Iterable[FieldRow]]]
+    example: Callable[[], Tuple[Any, Optional[List[str]]]]
+
+
+class SchemaSnapshot:
+    def __init__(self, path: Path, backend: Optional[str] = None):
+        self.path = path
+        self.backend = backend
+        self.enabled = backend is not None
+
+        self.lookups = 0
+        self.fallbacks = 0
+
+        self._data: Optional[Dict[str, Any]] = None
+        self._rows: Dict[Tuple[str, str], Tuple[FieldRow, ...]] = {}
+
+    @classmethod
+    def from_env(cls) -> "SchemaSnapshot":
+        setting = os.environ.get("DOCS_SCHEMA_EXTRACT", "").lower()
+        return cls(cache_root() / "schema" / "schema.json", BACKENDS.get(setting))
+
+    @property
+    def active(self) -> bool:
+        return self._data is not None
+
+    def ensure(self, requests: Iterable[Request], src_paths: List[str]) -> bool:
+        """Loads the snapshot, extracting it first if it's missing or outdated.
+
+        Returns whether a new snapshot was extracted.
+        """
+
+        requests = sorted(
+            {(identifier, _subs_key(subs)) for identifier, subs in requests}
+        )
+        signature = _signature(src_paths, self.backend)
+
+        data = _read_json(self.path)
+        extracted = False
+        if not self._is_current(data, signature, requests):
+            if self.backend == "static":
+                data = self._parse(requests, src_paths)
+            else:
+                data = self._run(requests, src_paths)
+            extracted = True
+
+        self._load(data)
+        return extracted
+
+    def reset(self) -> None:
+        self._data = None
+        self._rows = {}
+        self.lookups = 0
+        self.fallbacks = 0
+
+    def rows(
+        self, identifier: str, subs: Optional[Dict[str, str]] = None
+    ) -> Optional[Tuple[FieldRow, ...]]:
+        """The data model rows of a model, ``None`` if they aren't in the snapshot."""
+
+        model_id, model = self._model(identifier)
+        if model is None:
+            return None
+
+        key = _subs_key(subs)
+        try:
+            return self._rows[(model_id, key)]
+        except KeyError:
+            pass
+
+        rows = model["rows"].get(key)
+        if rows is None:
+            self.fallbacks += 1
+            return None
+
+        result = self._rows[(model_id, key)] = tuple(
+            FieldRow(
+                path,
+                type=type_,
+                description=description,
+                default=REQUIRED if default == REQUIRED else default,
+                choices=tuple(choices),
+                kind=kind,
+            )
+            for path, type_, description, default, choices, kind in rows
+        )
+        return result
+
+    def defaults(self, identifier: str) -> Optional[Tuple[Any, Optional[List[str]]]]:
+        """The example data and, for models, the top level field aliases."""
+
+        _, model = self._model(identifier)
+        if model is None:
+            return None
+        if "example" not in model:
+            self.fallbacks += 1
+            return None
+        return model["example"], model["fields"]
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "models": len(self._data["models"]) if self._data else 0,
+            "lookups": self.lookups,
+            "fallbacks": self.fallbacks,
+        }
+
+    def _model(self, identifier: str) -> Tuple[Optional[str], Optional[Dict]]:
+        if self._data is None:
+            return None, None
+
+        self.lookups += 1
+        model_id = self._data["identifiers"].get(identifier)
+        if model_id is None:
+            self.fallbacks += 1
+            return None, None
+        return model_id, self._data["models"][model_id]
+
+    def _is_current(
+        self, data: Optional[Dict], signature: str, requests: List[Tuple[str, str]]
+    ) -> bool:
+        if not data or data.get("signature") != signature:
+            return False
+
+        identifiers = data["identifiers"]
+        failed = set(data["failed"])
+        for identifier, subs in requests:
+            if identifier in failed:
+                # left to the in-process fallback, which will report the error
+                continue
+            model_id = identifiers.get(identifier)
+            if model_id is None:
+                return False
+            model = data["models"][model_id]
+            if model["kind"] == "model" and subs not in model["rows"]:
+                return False
+
+        for path, (mtime, size, digest) in data["sources"].items():
+            try:
+                stat = os.stat(path)
+            except OSError:
+                return False
+            if (stat.st_mtime_ns, stat.st_size) != (mtime, size) and (
+                _hash_file(path) != digest
+            ):
+                return False
+        return True
+
+    def _run(
+        self, requests: List[Tuple[str, str]], src_paths: List[str]
+    ) -> Optional[Dict]:
+        root = str(Path(__file__).resolve().parents[2])
+        pythonpath = os.environ.get("PYTHONPATH")
+        env = dict(
+            os.environ,
+            PYTHONPATH=os.pathsep.join([root, pythonpath] if pythonpath else [root]),
+        )
+
+        start = time.monotonic()
+        result = subprocess.run(
+            [sys.executable, "-m", "extensions.schema.extract", str(self.path)]
+            + [f"--src={path}" for path in src_paths],
+            input=json.dumps(requests),
+            capture_output=True,
+            text=True,
+            env=env,
+        )
+        if result.returncode != 0:
+            log.warning(
+                "Could not extract the pydantic schema, importing models in process "
+                "instead:\n" + result.stderr.strip()
+            )
+            return None
+
+        data = _read_json(self.path)
+        if data is not None:
+            log.info(
+                f"Extracted the pydantic schema of {len(data['models'])} models in "
+                f"{time.monotonic() - start:.2f}s"
+            )
+        return data
+
+    def _parse(
+        self, requests: List[Tuple[str, str]], src_paths: List[str]
+    ) -> Optional[Dict]:
+        from extensions.schema import static
+
+        start = time.monotonic()
+        try:
+            data = static.extract(requests, src_paths, PACKAGES)
+        except Exception:
+            log.warning(
+                "Could not parse the pydantic schema, importing models in process "
+                "instead",
+                exc_info=True,
+            )
+            return None
+
+        data["signature"] = _signature(src_paths, self.backend)
+        _write_json(self.path, data)
+        log.info(
+            f"Parsed the pydantic schema of {len(data['models'])} models in "
+            f"{time.monotonic() - start:.2f}s"
+            + (f", {len(data['failed'])} left to import" if data["failed"] else "")
+        )
+        return data
+
+    def _load(self, data: Optional[Dict]) -> None:
+        self.reset()
+        if data is None:
+            return
+
+        self._data = data
+        for identifier, modules in data["dependencies"].items():
+            registry.record_dependencies(identifier, modules)
+
+
+snapshot = SchemaSnapshot.from_env()
+
+
+def requests_for(invocations: Iterable[Any]) -> List[Request]:
+    """What a snapshot needs to contain for the given pre-render invocations."""
+
+    return [
+        (invocation.identifier, invocation.options.get("subs"))
+        for invocation in invocations
+    ]
+
+
+def extract(
+    requests: Iterable[Tuple[str, str]], packages: Iterable[str] = PACKAGES
+) -> Dict[str, Any]:
+    """Imports the models and returns the snapshot data. Meant for the subprocess."""
+
+    from pydantic import BaseModel
+
+    from extensions.schema.fields import model_fields
+    from extensions.schema.render import list_example
+
+    candidates = {}
+    for package in packages:
+        importlib.import_module(package)
+        for name, module in list(sys.modules.items()):
+            if module is None or not (
+                name == package or name.startswith(package + ".")
+            ):
+                continue
+            for attribute, value in vars(module).items():
+                if (
+                    inspect.isclass(value)
+                    and issubclass(value, BaseModel)
+                    and value is not BaseModel
+                ):
+                    candidates[f"{name}.{attribute}"] = value
+
+    failed = []
+    for identifier, _ in requests:
+        if identifier not in candidates:
+            try:
+                candidates[identifier] = registry.load(identifier)
+            except Exception:
+                failed.append(identifier)
+
+    def describe(identifier, obj):
+        if inspect.isclass(obj) and issubclass(obj, BaseModel):
+            return Described(
+                f"{obj.__module__}.{obj.__qualname__}",
+                "model",
+                lambda subs: model_fields(obj, subs=subs),
+                lambda: (
+                    obj.construct().dict(by_alias=True),
+                    [field.alias for field in obj.__fields__.values()],
+                ),
+            )
+        elif isinstance(obj, list):
+            return Described(
+                identifier, "list", None, lambda: (list_example(obj), None)
+            )
+        raise ValueError(f"Don't know how to render {obj}")
+
+    data = collect(candidates, requests, failed, describe)
+
+    data["dependencies"] = {
+        identifier: package_modules(identifier, model_modules(candidates[identifier]))
+        for identifier in data["identifiers"]
+    }
+
+    packages = {identifier.split(".", 1)[0] for identifier in data["identifiers"]} | {
+        package.split(".", 1)[0] for package in packages
+    }
+    data["sources"] = file_sources(
+        module.__file__
+        for name, module in list(sys.modules.items())
+        if module is not None
+        and name.split(".", 1)[0] in packages
+        and (getattr(module, "__file__", None) or "").endswith(".py")
+    )
+    return data
+
+
+def collect(
+    candidates: Dict[str, Any],
+    requests: Iterable[Tuple[str, str]],
+    failed: List[str],
+    describe: Callable[[str, Any], Described],
+) -> Dict[str, Any]:
+    """The identifiers, models and failures of a snapshot of ``candidates``."""
+
+    subs = {}
+    for identifier, key in requests:
+        subs.setdefault(identifier, set()).add(key)
+
+    failed = list(failed)
+    identifiers = {}
+    models = {}
+    for identifier, obj in sorted(candidates.items()):
+        try:
+            described = describe(identifier, obj)
+            model = models.get(described.id)
+            if model is None:
+                model = {"kind": described.kind, "rows": {}}
+                example, fields = described.example()
+                if _is_plain(example):
+                    model.update(example=example, fields=fields)
+
+            if described.rows is not None:
+                for key in subs.get(identifier, set()) | {_subs_key(None)}:
+                    if key not in model["rows"]:
+                        model["rows"][key] = [
+                            [
+                                row.path,
+                                row.type,
+                                row.description,
+                                row.default,
+                                list(row.choices),
+                                row.kind,
+                            ]
+                            for row in described.rows(json.loads(key))
+                        ]
+        except Exception:
+            failed.append(identifier)
+            continue
+
+        identifiers[identifier] = described.id
+        models[described.id] = model
+
+    return {"identifiers": identifiers, "models": models, "failed": sorted(set(failed))}
+
+
+def file_sources(paths: Iterable[str]) -> Dict[str, List]:
+    """Modification time, size and hash of each of ``paths``."""
+
+    sources = {}
+    for path in paths:
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        sources[path] = [stat.st_mtime_ns, stat.st_size, _hash_file(path)]
+    return sources
+
+
+def _is_plain(data: Any) -> bool:
+    # only what survives a round trip through JSON unchanged, anything else is left
+    # to the in-process renderer
+    if type(data) is dict:
+        return all(type(k) is str and _is_plain(v) for k, v in data.items())
+    elif type(data) is list:
+        return all(_is_plain(item) for item in data)
+    elif type(data) is float:
+        return math.isfinite(data)
+    return data is None or type(data) in (str, int, bool)
+
+
+def _signature(src_paths: List[str], backend: str) -> str:
+    digest = hashlib.sha256(f"{SNAPSHOT_VERSION}:{backend}".encode("utf-8"))
+    for name in SOURCES:
+        digest.update((Path(__file__).parent / name).read_bytes())
+    try:
+        digest.update(metadata.version("pydantic").encode("utf-8"))
+    except metadata.PackageNotFoundError:
+        pass
+    digest.update(json.dumps([os.path.abspath(p) for p in src_paths]).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _hash_file(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _read_json(path: Path) -> Any:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_json(path: Path, data: Any) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, separators=(",", ":"))
+    os.replace(tmp, path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Extract the pydantic schema the docs render into a JSON file. "
+        "Reads the [identifier, subs] pairs to include from stdin."
+    )
+    parser.add_argument("output", type=Path)
+    parser.add_argument("--src", action="append", default=[])
+    args = parser.parse_args(argv)
+
+    for path in reversed(args.src):
+        sys.path.insert(0, path)
+
+    data = extract(json.load(sys.stdin))
+    data["signature"] = _signature(args.src, "import")
+    _write_json(args.output, data)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,209 @@
+"""Flattened, memoized field schema of pydantic models.
+
+``model_fields`` walks a model once and returns a tuple of ``FieldRow`` records,
+one per row of its data model table, with nested models already flattened into
+dotted paths (``server.commands.*``, ``server.commands.systemShutdownCommand``,
+``plugins[]``, ...). The result is memoized per model class and ``subs``, and
+nested models reuse the rows already computed for them, so a submodel that shows
+up under several parents (or in several tables) is only walked once.
+
+Self-referential models are cut off at the first repetition instead of recursing
+forever.
+"""
+
+import inspect
+import typing
+import weakref
+from enum import Enum
+from typing import Any, Dict, Optional, Set, Tuple
+
+from extensions.profiling import profiler
+from extensions.schema.typenames import (
+    convert_enum,
+    is_literal,
+    subs_key,
+    type_label,
+)
+
+
+class FieldRow:
+    __slots__ = ("path", "type", "description", "default", "choices", "kind")
+
+    FIELD = "field"
+    MODEL = "model"
+    LIST = "list"
+
+    def __init__(
+        self,
+        path: str,
+        type: str = "",
+        description: str = "",
+        default: Optional[str] = None,
+        choices: Tuple[str, ...] = (),
+        kind: str = FIELD,
+    ):
+        self.path = path
+        self.type = type
+        self.description = description
+        self.default = default
+        self.choices = choices
+        self.kind = kind
+
+    @property
+    def is_section(self) -> bool:
+        return self.kind != FieldRow.FIELD
+
+    @property
+    def is_required(self) -> bool:
+        return self.default is REQUIRED
+
+    def with_prefix(self, prefix: str) -> "FieldRow":
+        return FieldRow(
+            prefix + self.path,
+            type=self.type,
+            description=self.description,
+            default=self.default,
+            choices=self.choices,
+            kind=self.kind,
+        )
+
+    def __repr__(self):
+        return f"FieldRow({self.path!r}, {self.type!r})"
+
+
+REQUIRED = "*required*"
+
+_cache: "weakref.WeakKeyDictionary[type, Dict[Any, Tuple[FieldRow, ...]]]" = (
+    weakref.WeakKeyDictionary()
+)
+_stats = {"hits": 0, "misses": 0}
+
+
+def model_fields(
+    model: type, subs: Optional[Dict[str, str]] = None
+) -> Tuple[FieldRow, ...]:
+    rows, _ = _model_fields(model, subs or {}, subs_key(subs), set())
+    return rows
+
+
+def cache_info() -> Dict[str, int]:
+    return dict(_stats)
+
+
+def clear_cache() -> None:
+    _cache.clear()
+
+
+def _model_fields(model, subs, key, active: Set[type]):
+    try:
+        rows = _cache[model][key]
+        _stats["hits"] += 1
+        return rows, set()
+    except KeyError:
+        pass
+
+    if model in active:
+        return (), {model}
+
+    from pydantic import BaseModel
+    from pydantic.fields import ModelField
+
+    _stats["misses"] += 1
+    active.add(model)
+    try:
+        with profiler.measure("get_type_hints"):
+            type_hints = typing.get_type_hints(model)
+
+        rows = []
+        cuts = set()
+        for name, field in model.__fields__.items():
+            type_hint = type_hints.get(name)
+
+            if isinstance(field, ModelField):
+                alias = field.field_info.alias
+                if alias:
+                    name = alias
+
+            if inspect.isclass(field.type_) and issubclass(field.type_, BaseModel):
+                if inspect.isclass(type_hint) and issubclass(type_hint, BaseModel):
+                    kind, marker, separator = FieldRow.MODEL, ".*", "."
+                elif typing.get_origin(type_hint) is list:
+                    kind, marker, separator = FieldRow.LIST, "[]", "[]."
+                else:
+                    continue
+
+                rows.append(
+                    FieldRow(
+                        name + marker,
+                        description=field.field_info.description or "",
+                        kind=kind,
+                    )
+                )
+
+                nested, nested_cuts = _model_fields(field.type_, subs, key, active)
+                cuts |= nested_cuts
+                prefix = name + separator
+                rows.extend(row.with_prefix(prefix) for row in nested)
+            else:
+                rows.append(_field_row(name, field, type_hint, subs))
+    finally:
+        active.discard(model)
+
+    rows = tuple(rows)
+    cuts.discard(model)
+    if not cuts:
+        # only memoize complete results, not ones cut short by a cycle through
+        # one of our parents
+        _cache.setdefault(model, {})[key] = rows
+    return rows, cuts
+
+
+def _field_row(name, field, t, subs) -> FieldRow:
+    from pydantic.fields import UndefinedType
+
+    default = getattr(field.field_info, "default", None)
+    if isinstance(default, UndefinedType):
+        default = REQUIRED
+
+    return field_row(
+        name,
+        t,
+        default,
+        getattr(field.field_info, "description", None) or "",
+        subs,
+    )
+
+
+def field_row(
+    name: str, t: Any, default: Any, description: str, subs: Optional[Dict[str, str]]
+) -> FieldRow:
+    """The row of a field of type ``t``, ``default`` being ``REQUIRED`` if unset."""
+
+    if default is REQUIRED or default is None:
+        pass
+    elif isinstance(default, Enum) and convert_enum(type(default)) is not type(default):
+        default = repr(default.value)
+    else:
+        default = repr(default)
+
+    choices = ()
+    if inspect.isclass(t) and issubclass(t, Enum):
+        members = [
+            getattr(t, e)
+            for e in dir(t)
+            if not e.startswith("_") and hasattr(getattr(t, e), "value")
+        ]
+        if convert_enum(t) is not t:
+            choices = tuple(str(member.value) for member in members)
+        else:
+            choices = tuple(str(member) for member in members)
+    elif is_literal(t):
+        choices = tuple(repr(c) for c in typing.get_args(t))
+
+    return FieldRow(
+        name,
+        type=type_label(t, subs),
+        description=description,
+        default=default,
+        choices=choices,
+    )
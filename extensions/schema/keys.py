@@ -0,0 +1,128 @@
+"""Index of the ``config.yaml`` keys documented by the ``pydantic`` renderers.
+
+Every full ``pydantic`` invocation with a ``key`` (macro, ``%%%`` or ``///`` block)
+records the data model rows of its table here, as rendered by
+``render.pydantic_keys`` through the same fragment memo and cache as the table
+itself: the path of each row below ``key``, including ``[]`` and ``*`` segments, its
+type and its default. Once one of the indexed pages is rendered,
+``extensions/hooks/config_keys.py`` anchors its entries to the heading right above
+their table, and after the build writes all of them, sorted by key, to
+``search/config_keys.json``:
+
+    {"pages": [url, ...], "keys": [[key, type, default, page, anchor], ...]}
+
+``page`` is the index of the page's URL in ``pages``, ``type`` is ``null`` for
+sections, ``default`` is ``null`` if unset and otherwise written in YAML, as in
+``config.yaml``. The lookup widget of ``overrides/assets/javascripts/config_keys.js``
+only fetches it once it is used. The script itself is loaded on every page, as with
+``navigation.instant`` Material doesn't run the scripts of the pages it switches to.
+"""
+
+import hashlib
+import html
+import re
+from typing import Any, Dict, List, NamedTuple, Optional, Set, Tuple
+
+HEADING = re.compile(r"<h[1-6][^>]*\sid=\"([^\"]+)\"")
+
+Entry = List[Any]
+
+
+class PageKeys(NamedTuple):
+    digest: str
+    url: str
+    entries: List[Tuple[str, Entry, Optional[str]]]
+
+
+class KeyIndex:
+    def __init__(self):
+        self._pages: Dict[str, PageKeys] = {}
+        self._pending: List[Tuple[str, List[Entry]]] = []
+        self._seen: Set[str] = set()
+
+    def begin(self) -> None:
+        """Starts a build, pages it doesn't render anymore are dropped at the end."""
+
+        self._pending = []
+        self._seen = set()
+
+    def start_page(self) -> None:
+        self._pending = []
+
+    def record(self, key: str, entries: List[Entry]) -> None:
+        """Records the ``entries`` of a table below ``key`` for the current page."""
+
+        self._pending.append((key, entries))
+
+    def end_page(self, src_uri: str, url: str, content: str) -> None:
+        """Anchors what was recorded for a page in its rendered ``content``."""
+
+        self._seen.add(src_uri)
+        pending, self._pending = self._pending, []
+        digest = hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+        if pending:
+            self._pages[src_uri] = PageKeys(digest, url, _anchored(pending, content))
+            return
+
+        # a page whose content was reused without rendering it records nothing
+        previous = self._pages.get(src_uri)
+        if previous is None or previous.digest != digest:
+            self._pages.pop(src_uri, None)
+        else:
+            self._pages[src_uri] = previous._replace(url=url)
+
+    def data(self) -> Optional[Dict[str, Any]]:
+        """The index of the current build, or ``None`` if no page recorded keys."""
+
+        for src_uri in set(self._pages) - self._seen:
+            del self._pages[src_uri]
+        if not self._pages:
+            return None
+
+        pages = sorted({page.url for page in self._pages.values()})
+        numbers = {url: number for number, url in enumerate(pages)}
+        unique = {
+            (f"{key}.{entry[0]}", entry[1], entry[2], numbers[page.url], anchor)
+            for page in self._pages.values()
+            for key, entry, anchor in page.entries
+        }
+        keys = sorted(
+            (list(item) for item in unique),
+            key=lambda item: (item[0].lower(), item[0], item[3], item[4] or ""),
+        )
+        return {"pages": pages, "keys": keys}
+
+
+def _anchored(
+    pending: List[Tuple[str, List[Entry]]], content: str
+) -> List[Tuple[str, Entry, Optional[str]]]:
+    result = []
+    position = 0
+    for key, entries in pending:
+        anchor = None
+        if entries:
+            cell = f"<td><code>{html.escape(entries[0][0], quote=False)}</code></td>"
+            found = content.find(cell, position)
+            if found >= 0:
+                position = found
+                headings = HEADING.findall(content, 0, found)
+                anchor = headings[-1] if headings else None
+        result.extend((key, entry, anchor) for entry in entries)
+    return result
+
+
+def lookup_widget(placeholder: str = "") -> str:
+    """The markup of the lookup widget, as a raw HTML block."""
+
+    placeholder = html.escape(placeholder)
+    return (
+        '<div class="config-keys">'
+        f'<input type="search" class="config-keys__input" placeholder="{placeholder}" '
+        f'aria-label="{placeholder}" autocomplete="off" spellcheck="false">'
+        '<ul class="config-keys__results"></ul>'
+        "</div>"
+    )
+
+
+index = KeyIndex()
@@ -0,0 +1,350 @@
+"""Pre-rendering of all pydantic invocations found in the docs.
+
+Before the pages are built, ``prerender`` scans the docs for ``{{ pydantic...(...) }}``
+macro calls, ``%%% pydantic...`` blocks and the examples of ``/// pydantic`` blocks,
+deduplicates them, takes whatever it can from the fragment cache and renders the rest
+in a process pool. Each worker imports OctoPrint once and renders its share of the
+models. The page pass then only looks up the results in ``memo``. With a single
+worker (``DOCS_PRERENDER=1`` or a single CPU), there is no pool, and what isn't cached
+is rendered by the page pass.
+
+``memo`` holds every fragment of the current build under its normalized invocation,
+no matter whether it was pre-rendered or rendered by the page pass, and whether a
+macro or a Markdown block asked for it. A full ``pydantic`` invocation is made up of
+the example and table fragments, so it shares those with ``pydantic_example`` and
+``pydantic_table`` invocations of the same model. The Markdown blocks build their
+tables from ``pydantic_cells`` fragments instead, so that is what their invocations
+are made up of.
+"""
+
+import ast
+import json
+import logging
+import os
+import re
+import sys
+import textwrap
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+log = logging.getLogger("mkdocs.extensions.schema.prerender")
+
+MACRO_RE = re.compile(
+    r"\{\{\s*(?P<mode>pydantic(?:_table|_example)?)\s*\((?P<args>.*?)\)\s*\}\}",
+    re.DOTALL,
+)
+BLOCK_RE = re.compile(r"%%% (?P<mode>pydantic(-table|-example)?) (?P<identifier>.*)")
+BLOCK_SPLIT_RE = re.compile(r"\n\s*\n")
+BLOCK_MODES = {
+    "pydantic": "full",
+    "pydantic-table": "table",
+    "pydantic-example": "example",
+}
+PYMDOWN_BLOCK_RE = re.compile(
+    r"^/// pydantic \| (?P<identifier>\S+)[ \t]*\n(?P<options>(?:[ \t]+\S.*\n)*)",
+    re.MULTILINE,
+)
+
+PARAMETERS = {
+    "pydantic": (("key", None), ("subs", None)),
+    "pydantic_table": (("subs", None),),
+    "pydantic_cells": (("subs", None),),
+    "pydantic_example": (("key", None), ("recursive", True)),
+    "pydantic_keys": (("key", None), ("subs", None)),
+}
+
+InvocationKey = Tuple[str, str, Any, str, Optional[bool]]
+
+
+class Invocation(NamedTuple):
+    mode: str
+    identifier: str
+    options: Dict[str, Any]
+
+    @property
+    def key(self) -> InvocationKey:
+        return invocation_key(self.mode, self.identifier, self.options)
+
+    def fragments(self) -> List["Invocation"]:
+        """The invocations of the fragments this one is made up of."""
+
+        if self.mode != "pydantic":
+            return [self]
+        fragments = [
+            Invocation(
+                "pydantic_example",
+                self.identifier,
+                normalize_options("pydantic_example", {"key": self.options["key"]}),
+            ),
+            Invocation(
+                "pydantic_table",
+                self.identifier,
+                normalize_options("pydantic_table", {"subs": self.options["subs"]}),
+            ),
+        ]
+        if self.options["key"] is not None:
+            fragments.append(
+                Invocation("pydantic_keys", self.identifier, dict(self.options))
+            )
+        return fragments
+
+
+def invocation_key(mode: str, identifier: str, options: Dict) -> InvocationKey:
+    """Mode, identifier and the key, subs and recursive options ``mode`` takes."""
+
+    options = normalize_options(mode, options)
+    return (
+        mode,
+        identifier,
+        options.get("key"),
+        json.dumps(options.get("subs"), sort_keys=True, default=repr),
+        options.get("recursive"),
+    )
+
+
+def normalize_options(mode: str, options: Dict) -> Dict[str, Any]:
+    return {name: options.get(name, default) for name, default in PARAMETERS[mode]}
+
+
+class FragmentMemo:
+    """Build-scoped memo of rendered fragments by normalized invocation."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        self._fragments: Dict[InvocationKey, Any] = {}
+        self.prerendered = 0
+        self.hits = 0
+        self.misses = 0
+
+    def put(self, key: InvocationKey, fragment: Any) -> None:
+        """Stores a pre-rendered fragment."""
+        self._fragments[key] = fragment
+        self.prerendered += 1
+
+    def get_or_render(self, key: InvocationKey, render: Callable[[], Any]) -> Any:
+        try:
+            fragment = self._fragments[key]
+        except KeyError:
+            pass
+        else:
+            self.hits += 1
+            return fragment
+
+        self.misses += 1
+        fragment = self._fragments[key] = render()
+        return fragment
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "fragments": len(self._fragments),
+            "prerendered": self.prerendered,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    def __contains__(self, key: InvocationKey) -> bool:
+        return key in self._fragments
+
+    def __len__(self) -> int:
+        return len(self._fragments)
+
+
+memo = FragmentMemo()
+
+
+def scan(docs_dir: str) -> List[Invocation]:
+    """Collects the distinct fragment invocations of the Markdown in ``docs_dir``."""
+
+    invocations = {}
+    for path in sorted(Path(docs_dir).rglob("*.md")):
+        try:
+            text = path.read_text(encoding="utf-8")
+        except OSError:
+            continue
+        if "pydantic" not in text:
+            continue
+
+        for invocation in scan_text(text):
+            for fragment in invocation.fragments():
+                invocations.setdefault(fragment.key, fragment)
+    return list(invocations.values())
+
+
+def prerender(docs_dir: str, src_paths: Iterable[str], workers: int) -> Dict:
+    from extensions.schema.cache import fragments
+
+    start = time.monotonic()
+    memo.reset()
+
+    pending = []
+    for invocation in scan(docs_dir):
+        cached = fragments.lookup(*invocation)
+        if cached is not None:
+            memo.put(invocation.key, cached)
+        else:
+            pending.append(invocation)
+    cached = memo.prerendered
+
+    rendered = 0
+    if len(pending) > 1 and workers > 1:
+        workers = min(workers, len(pending))
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(list(src_paths),),
+        ) as executor:
+            for invocation, (ok, result) in zip(
+                pending, executor.map(_render_invocation, pending)
+            ):
+                if ok:
+                    memo.put(invocation.key, result)
+                    rendered += 1
+                else:
+                    # the page pass will try again and fail with the full error
+                    log.warning(
+                        f"Could not pre-render {invocation.mode} of "
+                        f"{invocation.identifier}: {result}"
+                    )
+    elif pending:
+        log.info(
+            f"Pre-render pool skipped ({workers} worker(s) for {len(pending)} "
+            f"uncached pydantic fragment(s)), the page pass renders them instead"
+        )
+
+    stats = {
+        "invocations": cached + len(pending),
+        "cached": cached,
+        "rendered": rendered,
+        "workers": workers if rendered else 0,
+        "duration": time.monotonic() - start,
+    }
+    log.info(
+        f"Pre-rendered {cached + rendered} of {stats['invocations']} pydantic "
+        f"fragments ({cached} from cache, {rendered} in {stats['workers']} "
+        f"processes) in {stats['duration']:.2f}s"
+    )
+    return stats
+
+
+def scan_text(text: str) -> Iterable[Invocation]:
+    for match in MACRO_RE.finditer(text):
+        invocation = _parse_macro(match.group("mode"), match.group("args"))
+        if invocation is not None:
+            yield invocation
+
+    for block in BLOCK_SPLIT_RE.split(text):
+        block = block.strip("\n")
+        match = BLOCK_RE.match(block)
+        if match:
+            yield from _parse_block(match, block)
+
+    for match in PYMDOWN_BLOCK_RE.finditer(text):
+        yield from _parse_pymdown_block(match)
+
+
+def _parse_macro(mode: str, args: str) -> Optional[Invocation]:
+    try:
+        call = ast.parse(f"f({args})", mode="eval").body
+        positional = [ast.literal_eval(arg) for arg in call.args]
+        keywords = {kw.arg: ast.literal_eval(kw.value) for kw in call.keywords}
+    except (SyntaxError, ValueError):
+        # not something we can evaluate statically, leave it to the page pass
+        return None
+
+    if not positional or not isinstance(positional[0], str):
+        return None
+
+    for (name, _), value in zip(PARAMETERS[mode], positional[1:]):
+        keywords[name] = value
+    return Invocation(mode, positional[0], normalize_options(mode, keywords))
+
+
+def _parse_block(match, block: str) -> List[Invocation]:
+    from extensions.schema.render import MyYAML
+
+    try:
+        config = MyYAML(typ="safe").load(BLOCK_RE.sub("", block, count=1)) or {}
+    except Exception:
+        return []
+
+    mode = BLOCK_MODES[match.group("mode")]
+    return _block_fragments(mode, match.group("identifier"), config)
+
+
+def _parse_pymdown_block(match) -> List[Invocation]:
+    from extensions.schema.render import MyYAML
+
+    try:
+        config = MyYAML(typ="safe").load(textwrap.dedent(match.group("options"))) or {}
+    except Exception:
+        return []
+
+    mode = str(config.get("mode", "full")).lower()
+    return _block_fragments(mode, match.group("identifier"), config)
+
+
+def _block_fragments(mode: str, identifier: str, config: Dict) -> List[Invocation]:
+    """The fragments a Markdown block in ``mode`` (full, table or example) uses."""
+
+    key = config.get("key") or None
+    fragments = []
+    if mode in ("full", "example"):
+        options = {"key": key}
+        if mode == "example":
+            options["recursive"] = config.get("recursive", True)
+        fragments.append(
+            Invocation(
+                "pydantic_example",
+                identifier,
+                normalize_options("pydantic_example", options),
+            )
+        )
+    if mode in ("full", "table"):
+        options = {"subs": config.get("subs")}
+        fragments.append(
+            Invocation(
+                "pydantic_cells",
+                identifier,
+                normalize_options("pydantic_cells", options),
+            )
+        )
+    if mode == "full" and key is not None:
+        options = {"key": key, "subs": config.get("subs")}
+        fragments.append(
+            Invocation(
+                "pydantic_keys", identifier, normalize_options("pydantic_keys", options)
+            )
+        )
+    return fragments
+
+
+def _init_worker(src_paths: List[str]) -> None:
+    for path in reversed(src_paths):
+        sys.path.insert(0, path)
+
+
+def _render_invocation(invocation: Invocation) -> Tuple[bool, Any]:
+    from extensions.schema.render import RENDERERS
+
+    try:
+        return True, RENDERERS[invocation.mode](
+            invocation.identifier, **invocation.options
+        )
+    except Exception as exc:
+        return False, repr(exc)
+
+
+def default_workers() -> int:
+    setting = os.environ.get("DOCS_PRERENDER", "").lower()
+    if setting in ("0", "off", "false"):
+        return 0
+    try:
+        return int(setting)
+    except ValueError:
+        return os.cpu_count() or 1
@@ -0,0 +1,181 @@
+"""Process-wide registry of classes looked up by the pydantic renderers.
+
+Both the macros plugin and the Markdown extensions resolve identifiers like
+``octoprint.schema.config.ServerConfig`` through the same ``registry`` instance.
+Modules are imported once and only re-imported when one of the source files of
+their top-level package changed on disk since the last load, so ``mkdocs serve``
+still picks up edits to OctoPrint without re-executing the schema package for
+every single lookup. That is checked once per build, by ``check`` from
+``extensions/hooks/pydantic_prerender.py``, not on every lookup.
+
+``dependencies`` tells the fragment cache which source modules a rendered model is
+made of: the modules of the classes of its MRO and of its field types, recursively,
+as far as they are in its top-level package. Modules a model only takes constants
+from aren't included.
+"""
+
+import importlib
+import inspect
+import os
+import sys
+import threading
+import typing
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from extensions.profiling import profiler
+
+
+def _source_mtime(module) -> Optional[int]:
+    path = getattr(module, "__file__", None)
+    if not path:
+        return None
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+class ClassRegistry:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._objects: Dict[str, Any] = {}
+        self._snapshots: Dict[str, Dict[str, Optional[int]]] = {}
+        self._recorded: Dict[str, List[str]] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+
+    def load(self, identifier: str) -> Any:
+        module_name, class_name = identifier.rsplit(".", 1)
+        package = module_name.split(".", 1)[0]
+
+        with self._lock:
+            try:
+                result = self._objects[identifier]
+                self.hits += 1
+                return result
+            except KeyError:
+                pass
+
+            self.misses += 1
+            try:
+                with profiler.measure("import"):
+                    module = importlib.import_module(module_name)
+                result = getattr(module, class_name)
+            except Exception as exc:
+                print(
+                    f"Could not import {class_name} from {module_name}:",
+                    exc,
+                    file=sys.stderr,
+                )
+                raise
+
+            self._objects[identifier] = result
+            self._snapshots[package] = self._snapshot(package)
+            return result
+
+    def check(self) -> None:
+        """Forgets the packages whose source files changed since they were loaded."""
+
+        with self._lock:
+            for package in list(self._snapshots):
+                if self._is_stale(package):
+                    with profiler.measure("reload"):
+                        self._invalidate(package)
+                    self.reloads += 1
+
+    def dependencies(self, identifier: str) -> List[str]:
+        """Names of the source modules ``identifier`` is made of, see the module docs.
+
+        Prefers what another process recorded, otherwise the identifier must have
+        been loaded, or there are none.
+        """
+
+        recorded = self._recorded.get(identifier)
+        if recorded is not None:
+            return list(recorded)
+
+        with self._lock:
+            obj = self._objects.get(identifier, None)
+        if obj is None:
+            return []
+        return package_modules(identifier, model_modules(obj))
+
+    def record_dependencies(self, identifier: str, modules: List[str]) -> None:
+        """Records the source modules of ``identifier`` another process found."""
+
+        self._recorded[identifier] = list(modules)
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "reloads": self.reloads}
+
+    def clear(self) -> None:
+        with self._lock:
+            for package in list(self._snapshots):
+                self._invalidate(package)
+
+    def _modules(self, package):
+        prefix = package + "."
+        for name, module in list(sys.modules.items()):
+            if module is not None and (name == package or name.startswith(prefix)):
+                yield name, module
+
+    def _snapshot(self, package):
+        return {name: _source_mtime(module) for name, module in self._modules(package)}
+
+    def _is_stale(self, package):
+        snapshot = self._snapshots.get(package)
+        if snapshot is None:
+            return False
+
+        for name, mtime in snapshot.items():
+            module = sys.modules.get(name)
+            if module is None or _source_mtime(module) != mtime:
+                return True
+        return False
+
+    def _invalidate(self, package):
+        for name, _ in list(self._modules(package)):
+            del sys.modules[name]
+        importlib.invalidate_caches()
+
+        prefix = package + "."
+        for identifier in [i for i in self._objects if i.startswith(prefix)]:
+            del self._objects[identifier]
+        self._snapshots.pop(package, None)
+
+
+def model_modules(obj: Any) -> Set[str]:
+    """The modules of the classes of the MRO and field types of an imported model."""
+
+    from pydantic import BaseModel
+
+    modules = set()
+    seen = set()
+    stack = [obj]
+    while stack:
+        item = stack.pop()
+        stack.extend(typing.get_args(item))
+        if not inspect.isclass(item) or item in seen:
+            continue
+        seen.add(item)
+
+        modules.update(base.__module__ for base in item.__mro__)
+        if issubclass(item, BaseModel):
+            stack.extend(field.outer_type_ for field in item.__fields__.values())
+    return modules
+
+
+def package_modules(identifier: str, modules: Iterable[str]) -> List[str]:
+    """The module of ``identifier`` and those of ``modules`` in its top-level package."""
+
+    package = identifier.split(".", 1)[0]
+    return sorted(
+        name
+        for name in {identifier.rsplit(".", 1)[0], *modules}
+        if name == package or name.startswith(package + ".")
+    )
+
+
+registry = ClassRegistry()
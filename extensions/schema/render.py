@@ -0,0 +1,267 @@
+"""Rendering of pydantic models into Markdown tables and YAML examples.
+
+This is the engine behind both the ``pydantic*`` macros and the ``%%% pydantic``
+Markdown blocks. Everything that is looked up by identifier goes through the
+build-scoped fragment memo of ``extensions.schema.prerender`` and, on a miss, the
+persistent fragment cache, so each distinct fragment is rendered at most once per
+build, whichever syntax or page asks for it. If the schema snapshot of
+``extensions.schema.extract`` is active, fragments are rendered from it instead of
+the imported models. Full ``pydantic`` invocations with a ``key`` also add the rows of
+their table to the config key index of ``extensions.schema.keys``.
+"""
+
+import ast
+from io import StringIO
+from typing import Iterable, Iterator, Tuple
+
+from ruamel.yaml import YAML
+
+from extensions.dependencies import graph
+from extensions.profiling import profiler
+from extensions.schema.cache import fragments
+from extensions.schema.emitter import emitter
+from extensions.schema.extract import snapshot
+from extensions.schema.keys import index
+from extensions.schema.prerender import invocation_key, memo
+from extensions.schema.registry import registry
+from extensions.schema.fields import REQUIRED, FieldRow, model_fields
+
+
+class MyYAML(YAML):
+    def dump(self, data, stream=None, **kw):
+        inefficient = False
+        if stream is None:
+            inefficient = True
+            stream = StringIO()
+        YAML.dump(self, data, stream, **kw)
+        if inefficient:
+            return stream.getvalue()
+
+
+def pydantic(identifier, key=None, subs=None):
+    if key is not None:
+        index.record(key, pydantic_keys(identifier, key=key, subs=subs))
+
+    return [
+        "### Defaults",
+        _fragment(
+            "pydantic_example",
+            identifier,
+            {"key": key, "recursive": True},
+            lambda: _snapshot_example(identifier, key=key)
+            or _pydantic_example(load_model(identifier), key=key),
+        ),
+        "### Data model",
+        _fragment(
+            "pydantic_table",
+            identifier,
+            {"subs": subs},
+            lambda: "".join(table_lines(field_rows(identifier, subs=subs))),
+        ),
+    ]
+
+
+def pydantic_table(identifier, clz=None, subs=None):
+    if clz is not None:
+        return _pydantic_table(clz, subs=subs)
+
+    return _fragment(
+        "pydantic_table",
+        identifier,
+        {"subs": subs},
+        lambda: "".join(table_lines(field_rows(identifier, subs=subs))),
+    )
+
+
+def pydantic_cells(identifier, subs=None):
+    """The cells of the data model table, for the blocks that build it as elements."""
+
+    return _fragment(
+        "pydantic_cells",
+        identifier,
+        {"subs": subs},
+        lambda: [list(table_cells(row)) for row in field_rows(identifier, subs=subs)],
+    )
+
+
+def pydantic_example(identifier, key=None, clz=None, recursive=True):
+    if clz is not None:
+        return _pydantic_example(clz, key=key, recursive=recursive)
+
+    return _fragment(
+        "pydantic_example",
+        identifier,
+        {"key": key, "recursive": recursive},
+        lambda: _snapshot_example(identifier, key=key, recursive=recursive)
+        or _pydantic_example(registry.load(identifier), key=key, recursive=recursive),
+    )
+
+
+def pydantic_keys(identifier, key=None, subs=None):
+    """The entries of the data model rows of a model in the config key index."""
+
+    return _fragment(
+        "pydantic_keys",
+        identifier,
+        {"key": key, "subs": subs},
+        lambda: [
+            [row.path, row.type or None, _key_default(row.default)]
+            for row in field_rows(identifier, subs=subs)
+        ],
+    )
+
+
+def _key_default(default):
+    # the rows carry the repr of the default, the index shows it like config.yaml
+    if default is None or default is REQUIRED:
+        return default
+    try:
+        value = ast.literal_eval(default)
+    except (ValueError, SyntaxError):
+        return default
+    return None if value is None else emitter.inline(value)
+
+
+RENDERERS = {
+    "pydantic": pydantic,
+    "pydantic_table": pydantic_table,
+    "pydantic_cells": pydantic_cells,
+    "pydantic_example": pydantic_example,
+    "pydantic_keys": pydantic_keys,
+}
+
+
+def _fragment(mode, identifier, options, render):
+    graph.record_identifier(identifier)
+    with profiler.measure("pydantic", identifier=identifier):
+        return memo.get_or_render(
+            invocation_key(mode, identifier, options),
+            lambda: fragments.get_or_render(mode, identifier, options, render),
+        )
+
+
+def load_model(identifier):
+    from pydantic import BaseModel
+
+    _, class_name = identifier.rsplit(".", 1)
+    clz = registry.load(identifier)
+    if not issubclass(clz, BaseModel):
+        raise ValueError(f"{class_name} is not a subclass of BaseModel")
+    return clz
+
+
+def field_rows(identifier, subs=None) -> Tuple[FieldRow, ...]:
+    """The data model rows of a model, from the schema snapshot if possible."""
+
+    graph.record_identifier(identifier)
+    rows = snapshot.rows(identifier, subs=subs)
+    if rows is None:
+        rows = model_fields(load_model(identifier), subs=subs)
+    return rows
+
+
+def _pydantic_table(clz, subs=None):
+    return "".join(table_lines(model_fields(clz, subs=subs)))
+
+
+TABLE_HEADER = ("Name", "Type", "Description", "Default")
+
+
+def table_lines(rows: Iterable[FieldRow]) -> Iterator[str]:
+    yield "| Name | Type | Description | Default |\n"
+    yield "| ---- | ---- | ----------- | ------- |\n"
+    for row in rows:
+        yield _table_row(row)
+
+
+def table_cells(row: FieldRow) -> Tuple[str, str, str, str]:
+    """The Markdown contents of the four table cells of ``row``."""
+
+    description = row.description
+    if row.choices:
+        choices = ", ".join(f"`{choice}`" for choice in row.choices)
+        description += (" " if description else "") + f"Valid values: {choices}."
+
+    if row.is_section:
+        return f"`{row.path}`", "", description, ""
+
+    if row.is_required:
+        default = row.default
+    elif row.default is None:
+        default = "*unset*"
+    else:
+        default = f"`{row.default}`"
+
+    return f"`{row.path}`", f"`{row.type}`", description, default
+
+
+def _table_row(row: FieldRow) -> str:
+    path, type_, description, default = table_cells(row)
+    if row.is_section:
+        return f"| {path} | | {description} | |\n"
+    return f"| {path} | {type_} | {description} | {default} |\n"
+
+
+def _snapshot_example(identifier, key=None, recursive=True):
+    defaults = snapshot.defaults(identifier)
+    if defaults is None:
+        return None
+
+    example, fields = defaults
+    if recursive or fields is None:
+        return _fenced_example(example, key=key)
+    return _top_level_example(fields, key=key)
+
+
+def _pydantic_example(clz, key=None, recursive=True):
+    from pydantic import BaseModel
+    import inspect
+
+    if inspect.isclass(clz) and issubclass(clz, BaseModel):
+        if recursive:
+            return _fenced_example(clz.construct().dict(by_alias=True), key=key)
+        else:
+            # the top level keys straight from the fields, without constructing the
+            # full defaults, so unlike those they include required fields
+            return _top_level_example(
+                [field.alias for field in clz.__fields__.values()], key=key
+            )
+
+    elif isinstance(clz, list):
+        return _fenced_example(list_example(clz), key=key)
+
+    else:
+        raise ValueError(f"Don't know how to render {clz}")
+
+
+def list_example(items):
+    from pydantic import BaseModel
+
+    example = []
+    for item in items:
+        if isinstance(item, BaseModel):
+            example.append(item.dict(by_alias=True))
+        elif isinstance(item, (dict, list, int, float, bool, str)):
+            example.append(item)
+    return example
+
+
+def _fenced_example(example, key=None):
+    if key:
+        example = {key: example}
+    return emitter.fenced(example)
+
+
+def _top_level_example(fields, key=None):
+    lines = ["```yaml\n"]
+
+    prefix = ""
+    if key:
+        prefix = "  "
+        lines.append(f"{key}:\n")
+
+    for alias in fields:
+        lines.append(f"{prefix}{alias}:\n{prefix}  # ...\n")
+    lines.append("\n```\n")
+
+    return "".join(lines)
@@ -0,0 +1,1050 @@
+"""Static extraction of the pydantic schema, parsing the sources instead of importing.
+
+With ``DOCS_SCHEMA_EXTRACT=static`` the schema snapshot of ``extensions.schema.extract``
+is filled from ``octoprint/schema`` as parsed by ``ast``, in process and without
+OctoPrint (or even pydantic) being importable.
+
+This understands what the schema sources actually use:
+
+- classes deriving from pydantic's ``BaseModel``, directly or through other models,
+  including their nested ``Config``
+- annotated fields with defaults made of literals, arithmetic, module constants,
+  enum members and instances of other models, which are validated like pydantic
+  would for the basic types
+- ``Field(...)`` with ``default``, ``default_factory``, ``alias`` and ``description``
+- attribute docstrings and ``#:`` comments of classes decorated with
+  ``with_attrs_docs``
+- annotations made of ``typing`` generics, ``Literal``, enums, other models and
+  forward references
+- module level ``if`` statements whose condition evaluates, e.g. the choice of the
+  base model on ``pydantic.__version__``, which is that of the installed pydantic,
+  the one the import-based renderers would use
+
+Annotations are evaluated into real ``typing`` objects over stand-in classes for the
+models and real ``Enum`` classes for the enums, so that the type names, choices and
+defaults come out of the same code as for imported models. Anything else raises
+``StaticError``, which leaves the model to the import-based renderers.
+
+``python -m benchmarks.static_schema`` checks the result against the imported
+models for everything the docs reference.
+"""
+
+import ast
+import builtins
+import copy
+import enum
+import inspect
+import operator
+import os
+import typing
+from importlib import metadata
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from extensions.schema.fields import REQUIRED, FieldRow, field_row
+from extensions.schema.typenames import subs_key
+
+# modules that are imported for real instead of being parsed
+STDLIB_MODULES = {"typing": typing, "enum": enum, "builtins": builtins}
+
+BASE_MODELS = {"pydantic.BaseModel", "pydantic.main.BaseModel"}
+FIELD_FUNCTIONS = {"pydantic.Field", "pydantic.fields.Field"}
+ATTRIBUTE_DOCS_DECORATORS = {"with_attrs_docs"}
+
+BUILTIN_CALLS = {list, dict, set, frozenset, tuple, str, int, float, bool}
+
+# attributes of modules that aren't parsed, which the sources branch on
+KNOWN_SYMBOLS = {"pydantic.__version__": lambda: metadata.version("pydantic")}
+
+OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: operator.pow,
+    ast.BitOr: operator.or_,
+}
+UNARY_OPERATORS = {
+    ast.USub: operator.neg,
+    ast.UAdd: operator.pos,
+    ast.Not: operator.not_,
+}
+
+_NONE_TYPE = type(None)
+_MISSING = object()
+
+
+class StaticError(Exception):
+    """Raised for anything in the sources that can't be evaluated statically."""
+
+
+class Symbol(typing.NamedTuple):
+    """A name that is known but not evaluated, like functions or pydantic itself."""
+
+    qualname: str
+
+    @property
+    def name(self) -> str:
+        return self.qualname.rsplit(".", 1)[-1]
+
+
+class StaticField(typing.NamedTuple):
+    name: str
+    alias: Optional[str]
+    annotation: Any
+    default: Any
+    default_factory: Any
+    description: str
+
+    @property
+    def key(self) -> str:
+        return self.alias or self.name
+
+    @property
+    def required(self) -> bool:
+        return self.default is REQUIRED and self.default_factory is None
+
+    def get_default(self) -> Any:
+        if self.default_factory is not None:
+            return self.default_factory()
+        return copy.deepcopy(self.default)
+
+
+class StaticInstance:
+    """A model instance, with its values by field name."""
+
+    __slots__ = ("model", "values")
+
+    def __init__(self, model: "StaticModel", values: Dict[str, Any]):
+        self.model = model
+        self.values = values
+
+    def __deepcopy__(self, memo):
+        return StaticInstance(self.model, copy.deepcopy(self.values, memo))
+
+    def __repr__(self):
+        values = ", ".join(f"{k}={v!r}" for k, v in self.values.items())
+        return f"{self.model.name}({values})"
+
+
+class StaticModule:
+    def __init__(self, schema: "StaticSchema", name: str, path: str, package: bool):
+        self.schema = schema
+        self.name = name
+        self.path = path
+        self.package = name if package else name.rpartition(".")[0]
+
+        with open(path, encoding="utf-8") as f:
+            source = f.read()
+        self.lines = source.splitlines(keepends=True)
+        self.tree = ast.parse(source, filename=path)
+
+        # all top level statements binding a name, the last one wins unless it's an
+        # if statement that doesn't bind it in the branch taken
+        self._bindings: Dict[str, List[ast.AST]] = {}
+        for node in self.tree.body:
+            for name in _bound_names(node):
+                self._bindings.setdefault(name, []).append(node)
+        self._values: Dict[str, Any] = {}
+
+    def names(self) -> List[str]:
+        return list(self._bindings)
+
+    def lookup(self, name: str) -> Any:
+        try:
+            value = self._values[name]
+        except KeyError:
+            pass
+        else:
+            if value is _MISSING:
+                raise StaticError(f"{self.name}.{name} depends on itself")
+            return value
+
+        nodes = self._bindings.get(name)
+        if nodes is None:
+            if hasattr(builtins, name):
+                return getattr(builtins, name)
+            raise StaticError(f"{self.name} doesn't define {name}")
+
+        self._values[name] = _MISSING
+        try:
+            for node in reversed(nodes):
+                node = self._branch(name, node)
+                if node is not None:
+                    value = self._resolve(name, node)
+                    break
+            else:
+                raise StaticError(f"{self.name} doesn't define {name}")
+        except BaseException:
+            del self._values[name]
+            raise
+        self._values[name] = value
+        return value
+
+    def evaluate(self, node: ast.AST, annotation: bool = False) -> Any:
+        if isinstance(node, ast.Constant):
+            if annotation and isinstance(node.value, str):
+                # forward reference
+                return self.evaluate(
+                    ast.parse(node.value, mode="eval").body, annotation=True
+                )
+            return node.value
+
+        elif isinstance(node, ast.Name):
+            return _annotation(self.lookup(node.id), annotation)
+
+        elif isinstance(node, ast.Attribute):
+            return _annotation(
+                self._attribute(self.evaluate(node.value, annotation), node.attr),
+                annotation,
+            )
+
+        elif isinstance(node, (ast.List, ast.Tuple, ast.Set)):
+            items = [self.evaluate(item, annotation) for item in node.elts]
+            if isinstance(node, ast.List):
+                return items
+            return tuple(items) if isinstance(node, ast.Tuple) else set(items)
+
+        elif isinstance(node, ast.Dict):
+            if any(key is None for key in node.keys):
+                raise StaticError("dict unpacking")
+            return {
+                self.evaluate(key): self.evaluate(value)
+                for key, value in zip(node.keys, node.values)
+            }
+
+        elif isinstance(node, ast.Subscript):
+            value = self.evaluate(node.value, annotation)
+            # the strings in a Literal aren't forward references
+            index = self.evaluate(
+                node.slice, annotation and value is not typing.Literal
+            )
+            return _apply(node, operator.getitem, value, index)
+
+        elif isinstance(node, ast.BinOp) and type(node.op) in OPERATORS:
+            return _apply(
+                node,
+                OPERATORS[type(node.op)],
+                self.evaluate(node.left, annotation),
+                self.evaluate(node.right, annotation),
+            )
+
+        elif isinstance(node, ast.UnaryOp) and type(node.op) in UNARY_OPERATORS:
+            return _apply(
+                node, UNARY_OPERATORS[type(node.op)], self.evaluate(node.operand)
+            )
+
+        elif isinstance(node, ast.Call) and not annotation:
+            return self._call(node)
+
+        raise StaticError(f"Can't evaluate {ast.unparse(node)} in {self.name}")
+
+    def _branch(self, name: str, node: ast.AST) -> Optional[ast.AST]:
+        # the statement binding name in the branch taken, if any
+        while isinstance(node, ast.If):
+            branch = node.body if self.evaluate(node.test) else node.orelse
+            node = next(
+                (item for item in reversed(branch) if name in _bound_names(item)),
+                None,
+            )
+        return node
+
+    def _resolve(self, name: str, node: ast.AST) -> Any:
+        if isinstance(node, ast.ClassDef):
+            return self.schema.class_(self, node)
+
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            return Symbol(f"{self.name}.{name}")
+
+        elif isinstance(node, ast.Import):
+            for alias in node.names:
+                if alias.asname == name:
+                    return self.schema.module(alias.name)
+                elif alias.asname is None and alias.name.split(".")[0] == name:
+                    return self.schema.module(name)
+
+        elif isinstance(node, ast.ImportFrom):
+            module = self._absolute(node.module, node.level)
+            for alias in node.names:
+                if (alias.asname or alias.name) == name:
+                    return self.schema.import_from(module, alias.name)
+
+        elif isinstance(node, (ast.Assign, ast.AnnAssign)):
+            if node.value is None:
+                raise StaticError(f"{self.name}.{name} has no value")
+            return self.evaluate(node.value)
+
+        raise StaticError(f"Can't resolve {self.name}.{name}")
+
+    def _absolute(self, module: Optional[str], level: int) -> str:
+        if not level:
+            return module
+        parts = self.package.split(".")
+        if level > 1:
+            parts = parts[: -(level - 1)]
+        return ".".join(parts + ([module] if module else []))
+
+    def _attribute(self, value: Any, name: str) -> Any:
+        if isinstance(value, StaticModule):
+            return value.lookup(name)
+        elif isinstance(value, Symbol):
+            return _symbol(f"{value.qualname}.{name}")
+        elif isinstance(value, StaticModel):
+            raise StaticError(f"Can't access {value.name}.{name}")
+        try:
+            return getattr(value, name)
+        except AttributeError as exc:
+            raise StaticError(str(exc)) from exc
+
+    def _call(self, node: ast.Call) -> Any:
+        function = self.evaluate(node.func)
+        if any(isinstance(arg, ast.Starred) for arg in node.args) or any(
+            keyword.arg is None for keyword in node.keywords
+        ):
+            raise StaticError(f"Unpacking in {ast.unparse(node)}")
+
+        args = [self.evaluate(arg) for arg in node.args]
+        kwargs = {
+            keyword.arg: self.evaluate(keyword.value) for keyword in node.keywords
+        }
+
+        if isinstance(function, StaticModel):
+            if args:
+                raise StaticError(f"Positional arguments to {function.name}")
+            return function.instantiate(kwargs)
+        elif function in BUILTIN_CALLS or (
+            inspect.isclass(function) and issubclass(function, enum.Enum)
+        ):
+            return function(*args, **kwargs)
+        elif inspect.isbuiltin(function) and isinstance(function.__self__, str):
+            # string methods, e.g. in version checks
+            return function(*args, **kwargs)
+
+        raise StaticError(f"Can't call {ast.unparse(node.func)} in {self.name}")
+
+
+class StaticModel:
+    def __init__(
+        self,
+        module: StaticModule,
+        node: ast.ClassDef,
+        bases: List["StaticModel"],
+        attribute_docs: bool,
+    ):
+        self.module = module
+        self.node = node
+        self.bases = bases
+        self.attribute_docs = attribute_docs
+        self.name = node.name
+
+        # what annotations are evaluated over, see typenames
+        self.cls = type(
+            node.name,
+            (),
+            {
+                "__module__": module.name,
+                "__qualname__": node.name,
+                "__static_model__": self,
+            },
+        )
+        self.validators = any(
+            isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef))
+            and item.decorator_list
+            for item in node.body
+        )
+
+        self._config = None
+        self._fields = None
+
+    @property
+    def id(self) -> str:
+        return f"{self.module.name}.{self.name}"
+
+    @property
+    def config(self) -> Dict[str, Any]:
+        if self._config is None:
+            config = {}
+            for base in self.bases:
+                config.update(base.config)
+            for item in self.node.body:
+                if isinstance(item, ast.ClassDef) and item.name == "Config":
+                    for statement in item.body:
+                        if isinstance(statement, (ast.Assign, ast.AnnAssign)):
+                            for name in _bound_names(statement):
+                                config[name] = self.module.evaluate(statement.value)
+            for unsupported in ("alias_generator", "fields"):
+                if unsupported in config:
+                    raise StaticError(f"{self.name}.Config.{unsupported}")
+            self._config = config
+        return self._config
+
+    @property
+    def fields(self) -> Dict[str, StaticField]:
+        if self._fields is None:
+            fields = {}
+            for base in reversed(self.bases):
+                fields.update(base.fields)
+
+            docs = _attribute_docs(self.module.lines, self.node)
+            for item in self.node.body:
+                if isinstance(item, ast.AnnAssign) and isinstance(
+                    item.target, ast.Name
+                ):
+                    name = item.target.id
+                    if name.startswith("_"):
+                        continue
+                    field = self._field(name, item)
+                    if field is not None:
+                        fields[name] = field
+                elif isinstance(item, ast.Assign):
+                    names = [n for n in _bound_names(item) if not n.startswith("_")]
+                    if names:
+                        raise StaticError(f"{self.name}.{names[0]} isn't annotated")
+
+            if self.attribute_docs:
+                for name, field in fields.items():
+                    if name in docs:
+                        fields[name] = field._replace(description=docs[name])
+            self._fields = fields
+        return self._fields
+
+    def instantiate(self, kwargs: Dict[str, Any]) -> StaticInstance:
+        """What ``Model(**kwargs)`` results in."""
+
+        if self.validators:
+            raise StaticError(f"{self.name} has validators")
+
+        values = {}
+        for name, field in self.fields.items():
+            value = kwargs.get(field.key, _MISSING)
+            if value is _MISSING:
+                if field.required:
+                    raise StaticError(f"{self.name}.{name} is required")
+                values[name] = field.get_default()
+            else:
+                values[name] = _validate(field.annotation, value, self.config)
+        return StaticInstance(self, values)
+
+    def construct(self) -> StaticInstance:
+        """What ``Model.construct()`` results in."""
+
+        return StaticInstance(
+            self,
+            {
+                name: field.get_default()
+                for name, field in self.fields.items()
+                if not field.required
+            },
+        )
+
+    def _field(self, name: str, node: ast.AnnAssign) -> Optional[StaticField]:
+        annotation = self.module.evaluate(node.annotation, annotation=True)
+        if typing.get_origin(annotation) is typing.ClassVar:
+            return None
+
+        alias = None
+        description = ""
+        default_factory = None
+
+        value = node.value
+        if value is None:
+            default = _MISSING
+        elif isinstance(value, ast.Call) and self._is_field(value.func):
+            options = {"default": _MISSING}
+            for arg, keyword in zip(value.args, ("default",)):
+                options[keyword] = self.module.evaluate(arg)
+            for keyword in value.keywords:
+                options[keyword.arg] = self.module.evaluate(keyword.value)
+
+            default = options["default"]
+            default_factory = options.get("default_factory")
+            alias = options.get("alias")
+            description = options.get("description") or ""
+
+            if default is Ellipsis:
+                default = REQUIRED
+            elif default is _MISSING and default_factory is None:
+                raise StaticError(f"{self.name}.{name} has no default")
+            elif default_factory is not None and default_factory not in BUILTIN_CALLS:
+                raise StaticError(f"{self.name}.{name} has a default factory")
+            elif default is _MISSING:
+                # pydantic keeps the default undefined when there's a factory
+                default = REQUIRED
+        else:
+            default = self.module.evaluate(value)
+
+        if default is _MISSING:
+            default = None if _allows_none(annotation) else REQUIRED
+
+        return StaticField(
+            name, alias, annotation, default, default_factory, description
+        )
+
+    def _is_field(self, node: ast.AST) -> bool:
+        try:
+            function = self.module.evaluate(node)
+        except StaticError:
+            return False
+        return isinstance(function, Symbol) and function.qualname in FIELD_FUNCTIONS
+
+
+class StaticSchema:
+    """The parsed modules of the packages to document, found on ``src_paths``."""
+
+    def __init__(self, src_paths: Iterable[str], packages: Iterable[str]):
+        self.src_paths = [os.path.abspath(path) for path in src_paths]
+        self.packages = {package.split(".", 1)[0] for package in packages}
+
+        self._modules: Dict[str, Optional[StaticModule]] = {}
+        self._classes: Dict[Tuple[str, str], Any] = {}
+        self._rows: Dict[Tuple[str, Any], Tuple[FieldRow, ...]] = {}
+
+    @property
+    def modules(self) -> List[StaticModule]:
+        return [module for module in self._modules.values() if module is not None]
+
+    def module(self, name: str) -> Any:
+        if name in STDLIB_MODULES:
+            return STDLIB_MODULES[name]
+
+        try:
+            module = self._modules[name]
+        except KeyError:
+            module = self._modules[name] = self._load(name)
+        return module if module is not None else Symbol(name)
+
+    def submodules(self, package: str) -> List[str]:
+        """The names of all modules in ``package``, including itself."""
+
+        module = self.module(package)
+        if not isinstance(module, StaticModule) or module.package != package:
+            return [package]
+
+        names = []
+        root = os.path.dirname(module.path)
+        for directory, subdirectories, files in os.walk(root):
+            subdirectories[:] = sorted(
+                d
+                for d in subdirectories
+                if os.path.isfile(os.path.join(directory, d, "__init__.py"))
+            )
+            relative = os.path.relpath(directory, root)
+            prefix = ".".join(
+                [package] + ([] if relative == "." else relative.split(os.sep))
+            )
+            names.append(prefix)
+            names.extend(
+                f"{prefix}.{file[:-3]}"
+                for file in sorted(files)
+                if file.endswith(".py") and file != "__init__.py"
+            )
+        return names
+
+    def import_from(self, module: str, name: str) -> Any:
+        value = self.module(module)
+        if isinstance(value, StaticModule):
+            try:
+                return value.lookup(name)
+            except StaticError:
+                submodule = self.module(f"{module}.{name}")
+                if isinstance(submodule, StaticModule):
+                    return submodule
+                raise
+        elif isinstance(value, Symbol):
+            return _symbol(f"{module}.{name}")
+        try:
+            return getattr(value, name)
+        except AttributeError as exc:
+            raise StaticError(str(exc)) from exc
+
+    def resolve(self, identifier: str) -> Any:
+        module, _, name = identifier.rpartition(".")
+        value = self.module(module)
+        if not isinstance(value, StaticModule):
+            raise StaticError(f"Can't find the source of {module}")
+        return value.lookup(name)
+
+    def class_(self, module: StaticModule, node: ast.ClassDef) -> Any:
+        key = (module.name, node.name)
+        if key in self._classes:
+            return self._classes[key]
+
+        bases = [module.evaluate(base) for base in node.bases]
+        decorators = [module.evaluate(d) for d in node.decorator_list]
+        if node.keywords:
+            raise StaticError(f"Class keywords on {node.name}")
+
+        if any(_is_model(base) for base in bases):
+            unknown = [
+                d
+                for d in decorators
+                if not (isinstance(d, Symbol) and d.name in ATTRIBUTE_DOCS_DECORATORS)
+            ]
+            if unknown:
+                raise StaticError(f"Unknown decorators on {node.name}")
+            result = StaticModel(
+                module,
+                node,
+                [base for base in bases if isinstance(base, StaticModel)],
+                attribute_docs=bool(decorators),
+            )
+        elif any(inspect.isclass(b) and issubclass(b, enum.Enum) for b in bases):
+            result = _enum(module, node, bases)
+        else:
+            result = Symbol(f"{module.name}.{node.name}")
+
+        self._classes[key] = result
+        return result
+
+    def model_fields(
+        self, model: StaticModel, subs: Optional[Dict[str, str]] = None
+    ) -> Tuple[FieldRow, ...]:
+        """The rows ``fields.model_fields`` returns for the imported model."""
+
+        rows, _ = self._model_fields(model, subs or {}, subs_key(subs), set())
+        return rows
+
+    def example(self, value: Any) -> Tuple[Any, Optional[List[str]]]:
+        """The example data and, for models, the top level field aliases."""
+
+        if isinstance(value, StaticModel):
+            return (
+                _dict(value.construct()),
+                [field.key for field in value.fields.values()],
+            )
+        elif isinstance(value, list):
+            # render.list_example
+            return [
+                _dict(item) if isinstance(item, StaticInstance) else item
+                for item in value
+                if isinstance(item, (StaticInstance, dict, list, int, float, bool, str))
+            ], None
+        raise StaticError(f"Don't know how to render {value!r}")
+
+    def _model_fields(self, model, subs, key, active):
+        # mirrors fields._model_fields, including where cycles are cut
+        try:
+            return self._rows[(model.id, key)], set()
+        except KeyError:
+            pass
+
+        if model in active:
+            return (), {model}
+
+        active.add(model)
+        try:
+            rows = []
+            cuts = set()
+            for field in model.fields.values():
+                name = field.key
+                annotation = field.annotation
+
+                inner = _model_of(_inner_type(annotation))
+                if inner is not None:
+                    if _model_of(annotation) is not None:
+                        kind, marker, separator = FieldRow.MODEL, ".*", "."
+                    elif typing.get_origin(annotation) is list:
+                        kind, marker, separator = FieldRow.LIST, "[]", "[]."
+                    else:
+                        continue
+
+                    rows.append(
+                        FieldRow(
+                            name + marker, description=field.description, kind=kind
+                        )
+                    )
+                    nested, nested_cuts = self._model_fields(inner, subs, key, active)
+                    cuts |= nested_cuts
+                    prefix = name + separator
+                    rows.extend(row.with_prefix(prefix) for row in nested)
+                else:
+                    rows.append(
+                        field_row(
+                            name, annotation, field.default, field.description, subs
+                        )
+                    )
+        finally:
+            active.discard(model)
+
+        rows = tuple(rows)
+        cuts.discard(model)
+        if not cuts:
+            self._rows[(model.id, key)] = rows
+        return rows, cuts
+
+    def _load(self, name: str) -> Optional[StaticModule]:
+        if name.split(".", 1)[0] not in self.packages:
+            return None
+
+        parts = name.split(".")
+        for root in self.src_paths:
+            base = os.path.join(root, *parts)
+            for path, package in (
+                (base + ".py", False),
+                (os.path.join(base, "__init__.py"), True),
+            ):
+                if os.path.isfile(path):
+                    try:
+                        return StaticModule(self, name, path, package)
+                    except SyntaxError as exc:
+                        raise StaticError(f"Can't parse {path}: {exc}") from exc
+        return None
+
+
+def _symbol(qualname: str) -> Any:
+    known = KNOWN_SYMBOLS.get(qualname)
+    if known is None:
+        return Symbol(qualname)
+    try:
+        return known()
+    except metadata.PackageNotFoundError as exc:
+        raise StaticError(f"Can't evaluate {qualname}") from exc
+
+
+def _apply(node: ast.AST, function, *args) -> Any:
+    try:
+        return function(*args)
+    except Exception as exc:
+        raise StaticError(f"{ast.unparse(node)}: {exc}") from exc
+
+
+def _annotation(value: Any, annotation: bool) -> Any:
+    # models show up in annotations as their stand-in classes
+    if annotation and isinstance(value, StaticModel):
+        return value.cls
+    return value
+
+
+def _model_modules(value: Any) -> typing.Set[str]:
+    # like extensions.schema.registry.model_modules, for the parsed models
+    modules = set()
+    seen = set()
+    stack = [value]
+    while stack:
+        item = stack.pop()
+        item = _model_of(item) or item
+        if isinstance(item, StaticModel):
+            if item in seen:
+                continue
+            seen.add(item)
+            modules.add(item.module.name)
+            stack.extend(item.bases)
+            stack.extend(field.annotation for field in item.fields.values())
+            continue
+
+        stack.extend(typing.get_args(item))
+        if inspect.isclass(item):
+            modules.update(base.__module__ for base in item.__mro__)
+    return modules
+
+
+def _model_of(annotation: Any) -> Optional[StaticModel]:
+    if inspect.isclass(annotation):
+        return annotation.__dict__.get("__static_model__")
+    return None
+
+
+def _is_model(base: Any) -> bool:
+    return isinstance(base, StaticModel) or (
+        isinstance(base, Symbol) and base.qualname in BASE_MODELS
+    )
+
+
+def _inner_type(annotation: Any) -> Any:
+    # what pydantic's ModelField.type_ ends up as
+    origin = typing.get_origin(annotation)
+    args = typing.get_args(annotation)
+    if origin is typing.Union:
+        others = [arg for arg in args if arg is not _NONE_TYPE]
+        if len(others) == 1 and len(others) < len(args):
+            return _inner_type(others[0])
+        return annotation
+    elif origin in (list, set, frozenset) and args:
+        return args[0]
+    elif origin is tuple and len(args) == 2 and args[1] is Ellipsis:
+        return args[0]
+    elif origin is dict and len(args) == 2:
+        return args[1]
+    return annotation
+
+
+def _allows_none(annotation: Any) -> bool:
+    return (
+        annotation is None
+        or annotation is _NONE_TYPE
+        or annotation is typing.Any
+        or (
+            typing.get_origin(annotation) is typing.Union
+            and _NONE_TYPE in typing.get_args(annotation)
+        )
+    )
+
+
+def _enum(module: StaticModule, node: ast.ClassDef, bases: List[Any]) -> type:
+    members = []
+    for item in node.body:
+        if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef, ast.Pass)):
+            continue
+        elif isinstance(item, ast.Expr) and isinstance(item.value, ast.Constant):
+            continue
+        elif isinstance(item, ast.Assign):
+            for name in _bound_names(item):
+                if not name.startswith("_"):
+                    members.append((name, module.evaluate(item.value)))
+        else:
+            raise StaticError(f"Can't evaluate the body of {node.name}")
+
+    enum_base = next(
+        b for b in bases if inspect.isclass(b) and issubclass(b, enum.Enum)
+    )
+    mixins = [b for b in bases if not (inspect.isclass(b) and issubclass(b, enum.Enum))]
+    if len(mixins) > 1:
+        raise StaticError(f"Multiple mixins on {node.name}")
+    return enum_base(
+        node.name,
+        members,
+        module=module.name,
+        qualname=node.name,
+        type=mixins[0] if mixins else None,
+    )
+
+
+def _validate(annotation: Any, value: Any, config: Dict[str, Any]) -> Any:
+    """Validates a value passed to a model like pydantic v1, for the basic types."""
+
+    origin = typing.get_origin(annotation)
+    args = typing.get_args(annotation)
+
+    if annotation is typing.Any:
+        return value
+
+    elif origin is typing.Union:
+        if value is None and _NONE_TYPE in args:
+            return None
+        for arg in args:
+            if arg is _NONE_TYPE:
+                continue
+            try:
+                return _validate(arg, value, config)
+            except StaticError:
+                pass
+        raise StaticError(f"{value!r} isn't a valid {annotation}")
+
+    elif origin is typing.Literal:
+        if value in args:
+            return value
+
+    elif origin in (list, set, frozenset, tuple) and isinstance(
+        value, (list, set, frozenset, tuple)
+    ):
+        if origin is tuple and not (len(args) == 2 and args[1] is Ellipsis):
+            raise StaticError(f"{annotation} isn't supported")
+        item = args[0] if args else typing.Any
+        return origin(_validate(item, v, config) for v in value)
+
+    elif origin is dict and isinstance(value, dict):
+        key, item = args if args else (typing.Any, typing.Any)
+        return {
+            _validate(key, k, config): _validate(item, v, config)
+            for k, v in value.items()
+        }
+
+    elif _model_of(annotation) is not None:
+        model = _model_of(annotation)
+        if isinstance(value, StaticInstance) and value.model is model:
+            return StaticInstance(model, dict(value.values))
+        elif isinstance(value, dict):
+            return model.instantiate(value)
+
+    elif inspect.isclass(annotation) and issubclass(annotation, enum.Enum):
+        try:
+            member = annotation(value)
+        except ValueError:
+            pass
+        else:
+            return member.value if config.get("use_enum_values") else member
+
+    elif annotation is str:
+        if isinstance(value, enum.Enum) and isinstance(value, str):
+            return value.value
+        elif isinstance(value, str):
+            return value
+        elif isinstance(value, (int, float)):
+            return str(value)
+
+    elif annotation is int:
+        if isinstance(value, int) and not isinstance(value, bool):
+            return value
+        elif isinstance(value, (bool, float, str)):
+            try:
+                return int(value)
+            except ValueError:
+                pass
+
+    elif annotation is float:
+        if isinstance(value, float):
+            return value
+        elif isinstance(value, (int, str)):
+            try:
+                return float(value)
+            except ValueError:
+                pass
+
+    elif annotation is bool:
+        if value is True or value is False:
+            return value
+        elif value in (0, 1):
+            return bool(value)
+
+    elif annotation in (list, dict) and isinstance(value, annotation):
+        return value
+
+    raise StaticError(f"Can't validate {value!r} as {annotation}")
+
+
+def _dict(instance: StaticInstance) -> Dict[str, Any]:
+    """What ``.dict(by_alias=True)`` returns for the instance."""
+
+    fields = instance.model.fields
+    use_enum_values = instance.model.config.get("use_enum_values", False)
+    return {
+        fields[name].key: _value(value, use_enum_values)
+        for name, value in instance.values.items()
+    }
+
+
+def _value(value: Any, use_enum_values: bool) -> Any:
+    if isinstance(value, StaticInstance):
+        return _dict(value)
+    elif isinstance(value, dict):
+        return {k: _value(v, use_enum_values) for k, v in value.items()}
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        return type(value)(_value(v, use_enum_values) for v in value)
+    elif isinstance(value, enum.Enum) and use_enum_values:
+        return value.value
+    return value
+
+
+def _bound_names(node: ast.AST) -> List[str]:
+    if isinstance(node, (ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef)):
+        return [node.name]
+    elif isinstance(node, (ast.Import, ast.ImportFrom)):
+        return [
+            alias.asname or alias.name.split(".")[0]
+            for alias in node.names
+            if alias.name != "*"
+        ]
+    elif isinstance(node, ast.Assign):
+        return [
+            name.id
+            for target in node.targets
+            for name in (target.elts if isinstance(target, ast.Tuple) else [target])
+            if isinstance(name, ast.Name)
+        ]
+    elif isinstance(node, ast.AnnAssign) and node.value is not None:
+        if isinstance(node.target, ast.Name):
+            return [node.target.id]
+    elif isinstance(node, ast.If):
+        return [name for item in node.body + node.orelse for name in _bound_names(item)]
+    return []
+
+
+def _attribute_docs(lines: List[str], node: ast.ClassDef) -> Dict[str, str]:
+    """The attribute docs ``with_attrs_docs`` finds, ``#:`` comments over docstrings."""
+
+    docs = {}
+    for item, following in zip(node.body, node.body[1:]):
+        if (
+            isinstance(item, (ast.Assign, ast.AnnAssign))
+            and isinstance(following, ast.Expr)
+            and isinstance(following.value, ast.Constant)
+            and isinstance(following.value.value, str)
+            and following.lineno - item.end_lineno - 1 == 0
+        ):
+            for name in _targets(item):
+                docs[name] = inspect.cleandoc(following.value.value)
+
+    for item in node.body:
+        if isinstance(item, (ast.Assign, ast.AnnAssign)):
+            comments = _comments(lines, item)
+            if comments:
+                for name in _targets(item):
+                    docs[name] = "\n".join(comments)
+    return docs
+
+
+def _targets(node: ast.AST) -> List[str]:
+    if isinstance(node, ast.AnnAssign):
+        return [node.target.id] if isinstance(node.target, ast.Name) else []
+    return _bound_names(node)
+
+
+def _comments(lines: List[str], node: ast.AST) -> List[str]:
+    line = lines[node.end_lineno - 1]
+    position = line.find("#:", node.end_col_offset - 1)
+    if position != -1:
+        return [line[position + 2 :].strip()]
+
+    first = lines[node.lineno - 1]
+    marker = first[: len(first) - len(first.lstrip())] + "#:"
+    comments = []
+    for previous in reversed(lines[: node.lineno - 1]):
+        if not previous.startswith(marker):
+            break
+        comments.append(previous[len(marker) :].strip())
+    return comments[::-1]
+
+
+def extract(
+    requests: Iterable[Tuple[str, str]], src_paths: List[str], packages: List[str]
+) -> Dict[str, Any]:
+    """The snapshot data of ``extensions.schema.extract``, from the parsed sources."""
+
+    from extensions.schema.extract import Described, collect, file_sources
+    from extensions.schema.registry import package_modules
+
+    schema = StaticSchema(src_paths, packages)
+
+    candidates = {}
+    for package in packages:
+        for name in schema.submodules(package):
+            module = schema.module(name)
+            if not isinstance(module, StaticModule):
+                continue
+            for attribute in module.names():
+                try:
+                    value = module.lookup(attribute)
+                except Exception:
+                    continue
+                if isinstance(value, StaticModel):
+                    candidates[f"{name}.{attribute}"] = value
+
+    failed = []
+    for identifier, _ in requests:
+        if identifier not in candidates:
+            try:
+                candidates[identifier] = schema.resolve(identifier)
+            except Exception:
+                failed.append(identifier)
+
+    def describe(identifier, value):
+        if isinstance(value, StaticModel):
+            return Described(
+                value.id,
+                "model",
+                lambda subs: schema.model_fields(value, subs=subs),
+                lambda: schema.example(value),
+            )
+        elif isinstance(value, list):
+            return Described(identifier, "list", None, lambda: schema.example(value))
+        raise StaticError(f"Don't know how to render {identifier}")
+
+    data = collect(candidates, requests, failed, describe)
+
+    data["dependencies"] = {
+        identifier: package_modules(identifier, _model_modules(candidates[identifier]))
+        for identifier in data["identifiers"]
+    }
+    data["sources"] = file_sources(module.path for module in schema.modules)
+    return data
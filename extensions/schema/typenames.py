@@ -0,0 +1,139 @@
+"""Rendering of type annotations into the short names shown in the data model tables.
+
+Types are walked structurally via ``typing.get_origin`` and ``typing.get_args``
+instead of stringifying and re-tokenizing them, and the result is memoized per
+``(type, subs)``, since the same handful of annotations (``Optional[str]``,
+``List[...]``, ...) make up most rows of the config reference.
+"""
+
+import inspect
+import typing
+from enum import Enum
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
+
+TYPE_CACHE_SIZE = 2048
+
+_NONE_TYPE = type(None)
+
+SubsKey = Tuple[Tuple[str, str], ...]
+
+
+def subs_key(subs: Optional[Dict[str, str]]) -> SubsKey:
+    if not subs:
+        return ()
+    return tuple(sorted(subs.items()))
+
+
+def is_literal(type_: Any) -> bool:
+    return typing.get_origin(type_) is typing.Literal
+
+
+def convert_enum(enum_):
+    bases = [base for base in enum_.__bases__ if not issubclass(base, Enum)]
+    if bases:
+        return bases[0]
+    return enum_
+
+
+def type_doc(type_: Any, subs: Optional[Dict[str, str]] = None) -> str:
+    """Renders the type column of a field, e.g. ``Optional[str]`` in backticks."""
+
+    return f"`{type_label(type_, subs)}`"
+
+
+def type_label(type_: Any, subs: Optional[Dict[str, str]] = None) -> str:
+    """Renders the type of a field as documented, e.g. ``str`` for a ``str`` Enum."""
+
+    key = subs_key(subs)
+    try:
+        return _type_label(type_, key)
+    except TypeError:
+        # unhashable annotation, render it without the cache
+        return _type_label.__wrapped__(type_, key)
+
+
+def type_name(type_: Any, subs: Optional[Dict[str, str]] = None) -> str:
+    key = subs_key(subs)
+    try:
+        return _type_name(type_, key)
+    except TypeError:
+        return _type_name.__wrapped__(type_, key)
+
+
+def cache_info():
+    return {
+        "type_label": _type_label.cache_info(),
+        "type_name": _type_name.cache_info(),
+    }
+
+
+def clear_cache():
+    _type_label.cache_clear()
+    _type_name.cache_clear()
+
+
+@lru_cache(maxsize=TYPE_CACHE_SIZE)
+def _type_label(type_: Any, subs: SubsKey) -> str:
+    if inspect.isclass(type_) and issubclass(type_, Enum):
+        type_ = convert_enum(type_)
+    elif is_literal(type_):
+        args = typing.get_args(type_)
+        if args:
+            type_ = type(args[0])
+
+    return _type_name(type_, subs)
+
+
+@lru_cache(maxsize=TYPE_CACHE_SIZE)
+def _type_name(type_: Any, subs: SubsKey) -> str:
+    if inspect.isclass(type_) and hasattr(type_, "__name__"):
+        return _convert_name(type_.__name__, subs)
+    return _render(type_, subs)
+
+
+def _convert_name(name: str, subs: SubsKey) -> str:
+    if name.startswith("typing."):
+        return name[len("typing.") :]
+    elif name.startswith("typing_extensions."):
+        return name[len("typing_extensions.") :]
+
+    for original, replacement in subs:
+        if original == name:
+            return replacement
+    return name
+
+
+def _render(type_: Any, subs: SubsKey) -> str:
+    origin = typing.get_origin(type_)
+
+    if origin is None:
+        if isinstance(type_, type):
+            if type_.__module__ == "builtins":
+                return _convert_name(type_.__qualname__, subs)
+            return _convert_name(f"{type_.__module__}.{type_.__qualname__}", subs)
+        elif type_ is Ellipsis:
+            return "..."
+        elif isinstance(type_, list):
+            return "[" + ", ".join(_render(arg, subs) for arg in type_) + "]"
+        return _convert_name(str(type_), subs)
+
+    args = typing.get_args(type_)
+
+    if origin is typing.Union:
+        if len(args) == 2 and _NONE_TYPE in args:
+            name = "Optional"
+            args = tuple(arg for arg in args if arg is not _NONE_TYPE)
+        else:
+            name = "Union"
+    elif origin is typing.Literal:
+        return "Literal[" + ", ".join(repr(arg) for arg in args) + "]"
+    elif getattr(type_, "_name", None):
+        name = type_._name
+    else:
+        name = _convert_name(getattr(origin, "__qualname__", str(origin)), subs)
+
+    if not args:
+        return f"{name}[()]" if origin is tuple else name
+
+    return f"{name}[" + ", ".join(_render(arg, subs) for arg in args) + "]"
@@ -0,0 +1,105 @@
+/*
+ * Lookup widget for the keys of config.yaml, see extensions/schema/keys.py.
+ *
+ * Finds the widgets ({{ config_key_lookup() }}) on every page Material shows and
+ * only fetches search/config_keys.json once one of them is first focused. Keys
+ * starting with the query are listed first, then those containing it.
+ */
+
+(function () {
+  const LIMIT = 20
+
+  let index
+
+  function load() {
+    if (index === undefined) {
+      const config = JSON.parse(document.getElementById("__config").textContent)
+      const base = new URL(config.base + "/", location.href)
+      index = fetch(new URL("search/config_keys.json", base))
+        .then(response => {
+          if (!response.ok) throw new Error(`${response.status} ${response.url}`)
+          return response.json()
+        })
+        .then(data => ({
+          base,
+          pages: data.pages,
+          keys: data.keys,
+          lower: data.keys.map(entry => entry[0].toLowerCase())
+        }))
+      // try again on the next focus
+      index.catch(() => { index = undefined })
+    }
+    return index
+  }
+
+  // the keys are sorted by their lower case form
+  function lowerBound(lower, query) {
+    let low = 0
+    let high = lower.length
+    while (low < high) {
+      const middle = (low + high) >>> 1
+      if (lower[middle] < query) low = middle + 1
+      else high = middle
+    }
+    return low
+  }
+
+  function lookup(data, query) {
+    const found = []
+    for (let i = lowerBound(data.lower, query); i < data.lower.length; i++) {
+      if (!data.lower[i].startsWith(query) || found.length >= LIMIT) break
+      found.push(i)
+    }
+    for (let i = 0; i < data.lower.length && found.length < LIMIT; i++) {
+      const position = data.lower[i].indexOf(query)
+      if (position > 0) found.push(i)
+    }
+    return found.map(i => data.keys[i])
+  }
+
+  function item(data, [key, type, value, page, anchor]) {
+    const li = document.createElement("li")
+    const link = document.createElement("a")
+    link.href = new URL(data.pages[page] + (anchor ? `#${anchor}` : ""), data.base).href
+    const code = document.createElement("code")
+    code.textContent = key
+    link.appendChild(code)
+    li.appendChild(link)
+
+    if (type !== null) {
+      const details = document.createElement("span")
+      details.className = "config-keys__details"
+      details.textContent = ` ${type}, ` + (
+        value === null ? "unset" : value === "*required*" ? "required" : `default ${value}`
+      )
+      li.appendChild(details)
+    }
+    return li
+  }
+
+  function setup(widget) {
+    const input = widget.querySelector("input")
+    const results = widget.querySelector("ul")
+
+    const update = () => load().then(data => {
+      const query = input.value.trim().toLowerCase()
+      results.replaceChildren(
+        ...(query ? lookup(data, query).map(entry => item(data, entry)) : [])
+      )
+    }, () => {
+      results.replaceChildren()
+    })
+
+    input.addEventListener("focus", load, { once: true })
+    input.addEventListener("input", update)
+  }
+
+  function init() {
+    for (const widget of document.querySelectorAll(".config-keys"))
+      setup(widget)
+  }
+
+  // Material emits on every page it shows, also with instant navigation
+  if (typeof document$ !== "undefined") document$.subscribe(init)
+  else document.addEventListener("DOMContentLoaded", init)
+})()
@@ -0,0 +1,90 @@
+/*
+ * Search worker for a search index split into shards by
+ * extensions/hooks/search_shards.py.
+ *
+ * Wraps Material's own worker (passed as ?worker=), which is set up with the
+ * guides right away. Once that is ready, the shards of the code reference
+ * listed in the index's config are fetched in the background, and Material's
+ * worker is set up again with everything, before the first query comes in in
+ * most cases. A query answered from the guides alone is answered again then.
+ *
+ * All shards are fetched, whichever the query matches. Relies on Material's
+ * worker adding exactly one message listener, the hook only enables it for the
+ * tested Material versions.
+ */
+
+// Material's SearchMessageType
+const SETUP = 0
+const READY = 1
+const QUERY = 2
+
+const params = new URL(location.href).searchParams
+
+// take over the message listener of Material's worker
+let handle
+self.addEventListener = function (type, listener, options) {
+  if (type === "message" && handle === undefined) handle = listener
+  else WorkerGlobalScope.prototype.addEventListener.call(self, type, listener, options)
+}
+importScripts(params.get("worker"))
+delete self.addEventListener
+
+const post = self.postMessage.bind(self)
+const forward = message => handle({ data: message })
+
+let setup
+let query
+let loading
+let merging = 0
+
+// the page already knows the worker is ready, only answer the query again
+self.postMessage = message => {
+  if (message.type === READY && merging > 0) {
+    merging--
+    if (query !== undefined)
+      forward({ type: QUERY, data: query })
+    return
+  }
+  post(message)
+  // the guides are searchable, now prefetch the rest
+  if (message.type === READY)
+    load()
+}
+
+function load() {
+  const shards = setup.data.config.shards || []
+  if (loading || !shards.length)
+    return
+
+  const base = params.get("index")
+  loading = Promise.all(
+    shards.map(shard => fetch(new URL(shard, base)).then(response => {
+      if (!response.ok)
+        throw new Error(`${response.status} ${response.url}`)
+      return response.json()
+    }))
+  )
+    .then(results => {
+      const docs = results.reduce(
+        (all, shard) => all.concat(shard.docs), setup.data.docs
+      )
+      merging++
+      forward({ type: SETUP, data: { ...setup.data, docs } })
+    })
+    .catch(err => {
+      console.warn("Could not load the search index of the code reference", err)
+    })
+}
+
+addEventListener("message", ev => {
+  const message = ev.data
+  if (message.type === SETUP) {
+    // the index is set up from a copy, as Material's worker changes documents
+    setup = structuredClone(message)
+    loading = undefined
+  } else if (message.type === QUERY) {
+    query = message.data
+    load()
+  }
+  forward(message)
+})